@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+CDR Benchmarks
+Timing harness for the parser and analyzer hot paths on synthetic CDRs
+
+Usage:
+    python bench_cdr.py                 # run every benchmark
+    python bench_cdr.py clean --rows 2000000
+"""
+
+import argparse
+import sys
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cdr_parser import CDRParser
+from cdr_analyzer import CDRAnalyzer, DAY_HOURS, EVENING_HOURS, NIGHT_HOURS
+from cell_tower_db import CellTowerDatabase
+from location_analyzer import (LocationAnalyzer, distance_matrix, find_colocations, haversine_km,
+                               major_movement_indices, track_distances)
+from network_analyzer import NetworkAnalyzer
+
+
+def make_raw_airtel_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build a raw (pre-cleaning) Airtel CDR frame as read_csv would return it"""
+    rng = np.random.default_rng(seed)
+
+    days = rng.integers(1, 29, rows)
+    months = rng.integers(1, 13, rows)
+    hours = rng.integers(0, 24, rows)
+    minutes = rng.integers(0, 60, rows)
+    seconds = rng.integers(0, 60, rows)
+
+    dates = pd.Series([f"'{d:02d}/{m:02d}/2024'" for d, m in zip(days, months)])
+    times = pd.Series([f"'{h:02d}:{mi:02d}:{s:02d}'" for h, mi, s in zip(hours, minutes, seconds)])
+
+    contacts = np.array(
+        ["'91%010d'" % (6000000000 + i) for i in range(2000)]
+        + ["'%010d'" % (7000000000 + i) for i in range(500)]
+        + ['AD-HDFCBK', 'JD-AIRTEL', '12345']
+    )
+    b_party = pd.Series(contacts[rng.integers(0, len(contacts), rows)], dtype=object)
+    b_party[rng.random(rows) < 0.02] = np.nan
+
+    towers = np.array([
+        f"{28.5 + a:.6f}/{77.0 + b:.6f}"
+        for a, b in rng.random((3000, 2)) * 0.3
+    ])
+    first = pd.Series(towers[rng.integers(0, len(towers), rows)], dtype=object)
+    first[rng.random(rows) < 0.1] = np.nan
+    last = pd.Series(towers[rng.integers(0, len(towers), rows)], dtype=object)
+
+    return pd.DataFrame({
+        'Target No': "'9876543210'",
+        'Call Type': np.array(['IN', 'OUT', 'SMT', 'SMO'])[rng.integers(0, 4, rows)],
+        'B Party No': b_party,
+        'Date': dates,
+        'Time': times,
+        'Dur(s)': rng.integers(0, 900, rows),
+        'First CGI Lat/Long': first,
+        'First CGI': '404-96-290-1234',
+        'Last CGI Lat/Long': last,
+        'Last CGI': '404-96-290-1234',
+    })
+
+
+def make_analyzer_frame(rows: int, seed: int = 0, start: str = '2024-01-01', days: int = 365) -> pd.DataFrame:
+    """Build just the parsed columns the analyzer reads, without the parser"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start).value
+    datetimes = pd.to_datetime(np.sort(rng.integers(start, start + days * 86400 * 10**9, rows)))
+
+    contacts = np.array(["%010d" % (6000000000 + i) for i in range(5000)] + ['Unknown'], dtype=object)
+    imeis = np.array(['35%013d' % i for i in range(4)], dtype=object)
+    towers = rng.random((3000, 2)) * 0.3 + [28.5, 77.0]
+    tower = rng.integers(0, len(towers), rows)
+    lat = towers[tower, 0]
+    lat[rng.random(rows) < 0.1] = np.nan
+
+    return pd.DataFrame({
+        'DateTime': datetimes,
+        'Hour': datetimes.hour,
+        'Is_Night': np.isin(datetimes.hour, NIGHT_HOURS).astype(np.int8),
+        'Is_Day': np.isin(datetimes.hour, DAY_HOURS).astype(np.int8),
+        'Is_Evening': np.isin(datetimes.hour, EVENING_HOURS).astype(np.int8),
+        'Dur(s)': rng.integers(0, 600, rows),
+        'B_Party_Clean': contacts[np.minimum(rng.zipf(1.3, rows), len(contacts)) - 1],
+        'Call_Category': np.array(['Incoming Call', 'Outgoing Call', 'SMS Received', 'SMS Sent'],
+                                  dtype=object)[rng.integers(0, 4, rows)],
+        'First_Lat': lat,
+        'First_Long': towers[tower, 1],
+        # Long runs on one handset with occasional swaps
+        'IMEI': imeis[np.cumsum(rng.random(rows) < 0.001) % len(imeis)],
+    })
+
+
+def _clean_airtel_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """The original _clean_airtel_data (per-row .apply), kept as the benchmark baseline"""
+    df = df.copy()
+    df = df.dropna(how='all')
+
+    df['Date'] = df['Date'].astype(str).str.strip().str.strip("'\"")
+    df['Time'] = df['Time'].astype(str).str.strip().str.strip("'\"")
+    df['DateTime'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+    mask = df['DateTime'].isna()
+    if mask.any():
+        df.loc[mask, 'DateTime'] = pd.to_datetime(df.loc[mask, 'Date'], format='%d/%m/%Y', errors='coerce')
+    df = df.dropna(subset=['DateTime'])
+
+    df['Hour'] = df['DateTime'].dt.hour
+    df['DayOfWeek'] = df['DateTime'].dt.day_name()
+    df['Date_Only'] = df['DateTime'].dt.date
+    df['TimePeriod'] = df['Hour'].apply(CDRParser._classify_time_period)
+    df['Dur(s)'] = pd.to_numeric(df['Dur(s)'], errors='coerce').fillna(0).astype(int)
+
+    coords_first = df['First CGI Lat/Long'].apply(CDRParser._parse_coordinates)
+    df['First_Lat'] = coords_first.apply(lambda x: x[0] if x else None)
+    df['First_Long'] = coords_first.apply(lambda x: x[1] if x else None)
+    coords_last = df['Last CGI Lat/Long'].apply(CDRParser._parse_coordinates)
+    df['Last_Lat'] = coords_last.apply(lambda x: x[0] if x else None)
+    df['Last_Long'] = coords_last.apply(lambda x: x[1] if x else None)
+
+    df['B_Party_Clean'] = df['B Party No'].apply(CDRParser._clean_phone_number)
+    df['Call_Category'] = df['Call Type'].apply(CDRParser._classify_call_type)
+    df['Is_Night'] = df['Hour'].apply(lambda x: 1 if (x >= 22 or x < 6) else 0)
+    df['Is_Day'] = df['Hour'].apply(lambda x: 1 if (6 <= x < 18) else 0)
+    df['Is_Evening'] = df['Hour'].apply(lambda x: 1 if (18 <= x < 22) else 0)
+    return df
+
+
+def _new_contacts_rowwise(df: pd.DataFrame) -> list:
+    """The original iterrows first-seen scan, kept as the benchmark baseline"""
+    timeline, seen = [], set()
+    for _, row in df.sort_values('DateTime').iterrows():
+        contact = row['B_Party_Clean']
+        if contact not in seen and contact != 'Unknown':
+            seen.add(contact)
+            timeline.append({'date': row['DateTime'].strftime('%Y-%m-%d'), 'contact': contact,
+                             'call_type': row['Call_Category']})
+    return timeline
+
+
+def _movement_rowwise(df: pd.DataFrame) -> int:
+    """The original iterrows movement count"""
+    changes, prev_lat, prev_lon = 0, None, None
+    for _, row in df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime').iterrows():
+        lat, lon = row['First_Lat'], row['First_Long']
+        if prev_lat is not None and (abs(lat - prev_lat) > 0.01 or abs(lon - prev_lon) > 0.01):
+            changes += 1
+        prev_lat, prev_lon = lat, lon
+    return changes
+
+
+def _major_movements_rowwise(movement_df: pd.DataFrame, location: LocationAnalyzer) -> pd.DataFrame:
+    """The original Location tab loop: iloc per row, distance from the last kept row"""
+    major_movements = [movement_df.iloc[0]]
+    for i in range(1, len(movement_df)):
+        prev = major_movements[-1]
+        curr = movement_df.iloc[i]
+        if location.calculate_distance(prev['First_Lat'], prev['First_Long'],
+                                       curr['First_Lat'], curr['First_Long']) > 5:
+            major_movements.append(curr)
+    return pd.DataFrame(major_movements).reset_index(drop=True)
+
+
+def _timeline_rowwise(df: pd.DataFrame) -> list:
+    """The original iterrows movement timeline"""
+    timeline = []
+    for _, row in df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime').iterrows():
+        timeline.append({'datetime': row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
+                         'lat': float(row['First_Lat']), 'lon': float(row['First_Long']),
+                         'call_type': row['Call_Category'], 'contact': row['B_Party_Clean']})
+    return timeline
+
+
+def _device_changes_rowwise(df: pd.DataFrame) -> list:
+    """The original iterrows IMEI transition scan"""
+    changes, prev = [], None
+    for _, row in df.sort_values('DateTime').iterrows():
+        if prev is not None and row['IMEI'] != prev:
+            changes.append({'date': row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
+                            'from_imei': prev, 'to_imei': row['IMEI']})
+        prev = row['IMEI']
+    return changes
+
+
+def _timed(func, *args, **kwargs):
+    """Run func once and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_clean(rows: int) -> None:
+    """The original row-wise _clean_airtel_data vs the vectorized one, end to end"""
+    print(f"\n=== Airtel cleaning ({rows:,} rows) ===")
+    raw = make_raw_airtel_frame(rows)
+
+    legacy, legacy_s = _timed(_clean_airtel_rowwise, raw)
+    fast, fast_s = _timed(CDRParser('<benchmark>')._clean_airtel_data, raw)
+
+    pd.testing.assert_frame_equal(fast, legacy, check_dtype=False)
+    print(f"Row-wise _clean_airtel_data:   {legacy_s:8.3f}s")
+    print(f"Vectorized _clean_airtel_data: {fast_s:8.3f}s  ({legacy_s / max(fast_s, 1e-9):.1f}x faster)")
+
+
+def bench_cgi(rows: int) -> None:
+    """Scalar parse_cell_id vs the vectorized parse_cell_ids decoder"""
+    print(f"\n=== Cell ID decoding ({rows:,} rows) ===")
+    rng = np.random.default_rng(0)
+    airtel = np.char.add('404-96-', np.char.add(
+        rng.integers(100, 65535, rows).astype(str),
+        np.char.add('-', rng.integers(0, 2**28, rows).astype(str))))
+    jio = np.char.add('405872', rng.integers(10**6, 10**7, rows).astype(str))
+    cells = pd.Series(np.where(rng.random(rows) < 0.5, airtel, jio), dtype=object)
+
+    db = CellTowerDatabase(cache_file=':memory:', offline_index_dir='<none>')
+    sample = cells.iloc[:min(rows, 100_000)]
+    _, scalar_s = _timed(lambda: [db.parse_cell_id(cell) for cell in sample])
+    scalar_s *= rows / len(sample)
+    _, unique_s = _timed(db.parse_cell_ids, cells)
+    _, repeated_s = _timed(db.parse_cell_ids, cells.iloc[rng.integers(0, 10_000, rows)])
+
+    print(f"Scalar parse_cell_id (extrapolated): {scalar_s:8.3f}s")
+    print(f"parse_cell_ids, all distinct:        {unique_s:8.3f}s  ({scalar_s / max(unique_s, 1e-9):.1f}x faster)")
+    print(f"parse_cell_ids, 10k distinct:        {repeated_s:8.3f}s")
+
+
+def bench_helpers(rows: int) -> None:
+    """iterrows analyzer helpers vs their vectorized versions at rows/10, rows and 5x rows"""
+    for size in (rows // 10, rows, rows * 5):
+        print(f"\n=== Analyzer helpers ({size:,} rows) ===")
+        df = make_analyzer_frame(size)
+        analyzer = CDRAnalyzer(df)
+
+        # iterrows is linear and slow; time it on a prefix and extrapolate
+        sample = df.iloc[:min(size, 100_000)]
+        scale = size / len(sample)
+        cases = [
+            ('New contacts', _new_contacts_rowwise, analyzer._analyze_new_contacts),
+            ('Movement', _movement_rowwise, analyzer._analyze_movement),
+            ('Device changes', _device_changes_rowwise, analyzer._detect_device_changes),
+        ]
+        for name, rowwise, vectorized in cases:
+            _, legacy_s = _timed(rowwise, sample)
+            legacy_s *= scale
+            _, fast_s = _timed(vectorized)
+            print(f"{name + ':':16} iterrows {legacy_s:8.3f}s{'*' if scale > 1 else ' '}  "
+                  f"vectorized {fast_s:7.3f}s  ({legacy_s / max(fast_s, 1e-9):.0f}x faster)")
+        if size > 100_000:
+            print("* extrapolated from the first 100,000 rows")
+
+
+def _warm_running_aggregates(analyzer: CDRAnalyzer) -> None:
+    """Touch every aggregate CDRAnalyzer.append maintains"""
+    analyzer.get_temporal_analysis()
+    analyzer._contact_counts()
+    analyzer.get_activity_cube()
+    analyzer._detect_burst_activity()
+    analyzer.get_new_contacts()
+    analyzer.get_device_changes()
+
+
+def bench_append(rows: int) -> None:
+    """Rebuilding CDRAnalyzer for a one-week top-up vs CDRAnalyzer.append"""
+    base = make_analyzer_frame(rows, days=358)
+    top_up = make_analyzer_frame(rows // 52, seed=1, start='2024-12-24', days=7)
+    print(f"\n=== Append a week ({len(top_up):,} rows) to {rows:,} rows ===")
+
+    def rebuild():
+        analyzer = CDRAnalyzer(pd.concat([base, top_up]))
+        _warm_running_aggregates(analyzer)
+
+    analyzer = CDRAnalyzer(base)
+    _warm_running_aggregates(analyzer)
+
+    def append():
+        analyzer.append(top_up)
+        _warm_running_aggregates(analyzer)
+
+    _, rebuild_s = _timed(rebuild)
+    _, append_s = _timed(append)
+    print(f"Rebuild: {rebuild_s:.3f}s  append: {append_s:.3f}s  ({rebuild_s / append_s:.0f}x faster)")
+
+
+def _render_session(df: pd.DataFrame, copy: bool) -> tuple:
+    """One Streamlit render's analyzers; copy=True replays the old copying constructors"""
+    def share(frame):
+        if not copy:
+            return frame
+        return frame.copy()
+
+    analyzer = CDRAnalyzer(share(df))  # kept in session_state
+    analyzer.get_location_analysis()
+    NetworkAnalyzer(df).build_network_graph()
+    # The location tab built LocationAnalyzer(df) for the tab plus two distance helpers
+    location_analyzers = [LocationAnalyzer(share(df)) for _ in range(1 if not copy else 3)]
+    valid = [df.dropna(subset=['First_Lat', 'First_Long']) for _ in location_analyzers if copy]
+    location_analyzers[0].get_location_clusters()
+    location_analyzers[0].get_time_based_locations()
+    return analyzer, location_analyzers, valid
+
+
+def bench_memory(rows: int) -> None:
+    """Per-session memory with copying analyzer constructors vs one shared frame"""
+    print(f"\n=== Session memory ({rows:,} parsed rows) ===")
+    df = CDRParser('<benchmark>')._clean_airtel_data(make_raw_airtel_frame(rows))
+    frame_mb = df.memory_usage(deep=False).sum() / 1e6
+    print(f"Parsed frame: {frame_mb:.0f} MB (excluding shared string objects)")
+
+    for label, copy in (('Copying constructors', True), ('Shared frame', False)):
+        tracemalloc.start()
+        session = _render_session(df, copy)
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del session
+        print(f"{label + ':':22} held {held / 1e6:7.0f} MB  peak {peak / 1e6:7.0f} MB")
+
+
+def bench_bursts(rows: int) -> None:
+    """Calendar-hour burst buckets vs the sliding-window detector"""
+    for size in (rows, rows * 5):
+        print(f"\n=== Burst detection ({size:,} rows) ===")
+        df = make_analyzer_frame(size)
+        _, hourly_s = _timed(CDRAnalyzer(df)._detect_burst_activity)
+        print(f"(date, hour) buckets:       {hourly_s:7.3f}s")
+        for window, step in (('5min', '1min'), ('15min', '5min'), ('60min', '15min')):
+            bursts, sliding_s = _timed(CDRAnalyzer(df).detect_bursts, window, step)
+            print(f"Sliding {window:>5} / {step:>5}:    {sliding_s:7.3f}s  ({len(bursts)} bursts)")
+
+
+def bench_distance(rows: int) -> None:
+    """Per-pair calculate_distance loop vs the NumPy distance kernels"""
+    located = make_analyzer_frame(rows).dropna(subset=['First_Lat'])
+    lat, lon = located['First_Lat'].to_numpy(), located['First_Long'].to_numpy()
+    print(f"\n=== Track distances ({len(lat):,} points) ===")
+
+    scalar = LocationAnalyzer(located).calculate_distance
+    sample = min(len(lat), 200_000)
+    _, loop_s = _timed(lambda: sum(scalar(lat[i], lon[i], lat[i + 1], lon[i + 1]) for i in range(sample - 1)))
+    loop_s *= len(lat) / sample
+    total, vector_s = _timed(lambda: track_distances(lat, lon).sum())
+    print(f"Scalar loop (extrapolated): {loop_s:7.3f}s")
+    print(f"track_distances:            {vector_s:7.3f}s  ({loop_s / vector_s:.0f}x faster, {total:,.0f} km)")
+
+    towers = located[['First_Lat', 'First_Long']].drop_duplicates().to_numpy()
+    matrix, matrix_s = _timed(distance_matrix, towers[:, 0], towers[:, 1])
+    print(f"Tower distance matrix {matrix.shape[0]:,} x {matrix.shape[1]:,}: {matrix_s:7.3f}s")
+
+
+def bench_movements(rows: int) -> None:
+    """Location tab major-movement filter: iloc loop vs the reduced scan"""
+    df = make_analyzer_frame(rows)
+    # A few cities, with the towers of each inside a few km
+    rng = np.random.default_rng(1)
+    cities = rng.random((20, 2)) * 5 + [20, 75]
+    city = cities[np.repeat(rng.integers(0, 20, rows // 5000 + 1), 5000)[:rows]]
+    df['First_Lat'] = (df['First_Lat'] - 28.5) * 0.1 + city[:, 0]
+    df['First_Long'] = (df['First_Long'] - 77.0) * 0.1 + city[:, 1]
+    movement_df = df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime').reset_index(drop=True)
+    print(f"\n=== Major movements ({len(movement_df):,} located records) ===")
+
+    location = LocationAnalyzer(movement_df)
+    sample = min(len(movement_df), 20_000)
+    _, loop_s = _timed(_major_movements_rowwise, movement_df.iloc[:sample], location)
+    loop_s *= len(movement_df) / sample
+    lat, lon = movement_df['First_Lat'], movement_df['First_Long']
+    keep, scan_s = _timed(major_movement_indices, lat, lon)
+    print(f"iloc loop (extrapolated):   {loop_s:7.3f}s")
+    print(f"major_movement_indices:     {scan_s:7.3f}s  ({loop_s / scan_s:.0f}x faster, {len(keep):,} kept)")
+    keep, scan_s = _timed(major_movement_indices, lat, lon, movement_df['DateTime'], 5.0, '30min', 120)
+    print(f"  + 30 min / 120 km/h:      {scan_s:7.3f}s  ({len(keep):,} kept)")
+
+
+def bench_geofence(rows: int) -> None:
+    """Full-scan radius queries vs the tower grid index"""
+    df = make_analyzer_frame(rows)
+    print(f"\n=== Geofence queries ({rows:,} rows) ===")
+    location = LocationAnalyzer(df)
+    index, build_s = _timed(location.get_spatial_index)
+    print(f"Index build ({len(index):,} towers): {build_s:7.3f}s")
+
+    lat, lon = df['First_Lat'].to_numpy(), df['First_Long'].to_numpy()
+    points = np.random.default_rng(2).random((50, 2)) * 0.3 + [28.5, 77.0]
+    _, scan_s = _timed(lambda: [np.flatnonzero(haversine_km(a, b, lat, lon) <= 2.0) for a, b in points])
+    _, index_s = _timed(lambda: [location.get_records_within(a, b, 2.0) for a, b in points])
+    _, nearest_s = _timed(lambda: [index.nearest_towers(a, b, 5) for a, b in points])
+    print(f"2 km radius, full scan:     {scan_s / len(points) * 1e3:8.3f}ms per query")
+    print(f"2 km radius, grid index:    {index_s / len(points) * 1e3:8.3f}ms per query")
+    print(f"5 nearest towers:           {nearest_s / len(points) * 1e3:8.3f}ms per query")
+
+
+def bench_regions(rows: int) -> None:
+    """Weighted DBSCAN stay regions on a year-long CDR"""
+    for towers in (3000, 300_000):
+        df = make_analyzer_frame(rows)
+        rng = np.random.default_rng(3)
+        # Towers cluster in 200 towns (~4 km spread) over a state-sized area
+        towns = rng.random((200, 2)) * [4.0, 4.0] + [26.5, 75.0]
+        town_of = np.sort(rng.integers(0, len(towns), towers))
+        points = towns[town_of] + rng.normal(0, 0.04, (towers, 2))
+        starts = np.searchsorted(town_of, np.arange(len(towns)))
+        sizes = np.diff(np.append(starts, towers))
+        # The target keeps to a few towns (home, work, family) and passes through the rest
+        town = rng.permutation(len(towns))[np.minimum(rng.zipf(1.5, rows), len(towns)) - 1]
+        town = np.where(sizes[town] > 0, town, town_of[0])
+        tower = starts[town] + (rng.random(rows) * sizes[town]).astype(np.int64)
+        located = df['First_Lat'].notna().to_numpy()
+        df.loc[located, 'First_Lat'] = points[tower[located], 0]
+        df.loc[located, 'First_Long'] = points[tower[located], 1]
+        print(f"\n=== Stay regions ({rows:,} rows, {towers:,} towers) ===")
+
+        location = LocationAnalyzer(df)
+        _, index_s = _timed(location.get_spatial_index)
+        regions, regions_s = _timed(location.get_stay_regions, 0.5, 20)
+        assert len(regions) > 0, "no tower reached min_records; the synthetic layout is too sparse"
+        print(f"Index build:                {index_s:7.3f}s")
+        print(f"DBSCAN + region stats:      {regions_s:7.3f}s  ({len(regions):,} regions, "
+              f"{regions['records'].sum() / located.sum():.0%} of located records)")
+
+
+def bench_stays(rows: int) -> None:
+    """Movement timeline dicts vs the columnar stay/trip segmentation"""
+    df = make_analyzer_frame(rows)
+    print(f"\n=== Movement timeline and visits ({rows:,} rows) ===")
+    sample = min(rows, 50_000)
+    _, rowwise_s = _timed(_timeline_rowwise, df.iloc[:sample])
+    _, timeline_s = _timed(LocationAnalyzer(df).get_movement_timeline)
+    print(f"Timeline, iterrows:         {rowwise_s * rows / sample:7.3f}s*")
+    print(f"Timeline, vectorized:       {timeline_s:7.3f}s")
+
+    # Runs of about 30 records per tower, so there are visits to find
+    rng = np.random.default_rng(4)
+    towers = df[['First_Lat', 'First_Long']].dropna().drop_duplicates().to_numpy()
+    tower = np.repeat(rng.integers(0, len(towers), rows // 10), rng.geometric(1 / 30, rows // 10))[:rows]
+    tower = np.resize(tower, rows)
+    located = df['First_Lat'].notna().to_numpy()
+    df.loc[located, 'First_Lat'] = towers[tower[located], 0]
+    df.loc[located, 'First_Long'] = towers[tower[located], 1]
+
+    location = LocationAnalyzer(df)
+    _, regions_s = _timed(location.get_stay_regions)
+    (stays, trips), segment_s = _timed(location.get_stays_and_trips)
+    print(f"Stay regions:               {regions_s:7.3f}s")
+    print(f"Stays and trips:            {segment_s:7.3f}s  ({len(stays):,} visits, {len(trips):,} trips)")
+    print(f"* extrapolated from the first {sample:,} rows")
+
+
+def bench_colocation(rows: int) -> None:
+    """Co-location across target CDRs: spatio-temporal bucket join"""
+    for targets in (2, 8):
+        frames = {f"target_{i}": make_analyzer_frame(rows // targets, seed=i) for i in range(targets)}
+        print(f"\n=== Co-location ({targets} targets, {rows:,} rows in total) ===")
+        meetings, join_s = _timed(find_colocations, frames, 0.5, '15min')
+        print(f"find_colocations:           {join_s:7.3f}s  ({len(meetings):,} meetings)")
+
+
+def bench_lod(rows: int) -> None:
+    """Level of detail for the animated movement map"""
+    df = make_analyzer_frame(rows).sort_values('DateTime', ignore_index=True)
+    print(f"\n=== Animated map level of detail ({rows:,} rows) ===")
+    location = LocationAnalyzer(df)
+    (path, frames), lod_s = _timed(location.get_track_lod, 2000, 300, 11)
+    print(f"get_track_lod:              {lod_s:7.3f}s  ({len(path):,} path points, {len(frames):,} frames "
+          f"of {len(location.valid_rows):,})")
+
+
+BENCHMARKS = {
+    'clean': bench_clean,
+    'cgi': bench_cgi,
+    'helpers': bench_helpers,
+    'append': bench_append,
+    'memory': bench_memory,
+    'bursts': bench_bursts,
+    'distance': bench_distance,
+    'movements': bench_movements,
+    'geofence': bench_geofence,
+    'regions': bench_regions,
+    'stays': bench_stays,
+    'colocation': bench_colocation,
+    'lod': bench_lod,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CDR performance benchmarks")
+    parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Synthetic CDR size")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,73 +6,421 @@ Advanced analytics and pattern detection for CDR data
 import pandas as pd
 import numpy as np
 from datetime import datetime, time, timedelta
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 from collections import Counter
 import logging
 
+from cdr_parser import CDRParser
+
 logger = logging.getLogger(__name__)
 
+# Hours behind the Is_Night / Is_Day / Is_Evening flags (see CDRParser._add_time_flags)
+NIGHT_HOURS = [22, 23, 0, 1, 2, 3, 4, 5]
+DAY_HOURS = list(range(6, 18))
+EVENING_HOURS = list(range(18, 22))
+
+# Call_Category values that are voice calls (the rest are SMS or unclassified)
+VOICE_CATEGORIES = ['Incoming Call', 'Outgoing Call']
+
+# Baselines CDRAnalyzer.detect_bursts compares each window against
+BURST_BASELINES = ('robust', 'weekday')
+_DAY_NS = 86400 * 10**9
+
+
+def _observed_counts(series: pd.Series) -> pd.Series:
+    """value_counts without the zero rows categoricals report for unseen categories"""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+
+def _paginate(frame: pd.DataFrame, page: int, page_size: int) -> Dict:
+    """One 1-based page of a result frame as records, with paging totals"""
+    total = len(frame)
+    start = (max(page, 1) - 1) * page_size
+    return {
+        'items': frame.iloc[start:start + page_size].to_dict('records'),
+        'page': page,
+        'page_size': page_size,
+        'total': total,
+        'pages': max(1, -(-total // page_size)),
+    }
+
 
 class CDRAnalyzer:
-    """Advanced analysis of Call Detail Records"""
+    """
+    Advanced analysis of Call Detail Records
+    
+    The frame is shared with the caller, not copied; the analyzer never
+    modifies it. Every get_* section is computed on first access and
+    memoized for the analyzer's frame, so Streamlit reruns and repeat calls
+    from several tabs reuse the result. Results are shared objects; treat
+    them as read-only.
+    
+    append() adds top-up records and folds them into the running aggregates
+    (temporal and activity cubes, contact counts, hourly activity, burst
+    window counts, first-seen contacts, IMEI transitions) from the new rows
+    alone.
+    """
     
     def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+        self._frames = [df]  # appended chunks are concatenated on first read of df
+        self.version = 0  # bumped whenever cached results are dropped
+        self._results = {}
+        self._results_frame = self._frames[0]
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        if len(self._frames) > 1:
+            # Compact top-ups carry their own categories; keep them categorical
+            merged = CDRParser.concat_compact(self._frames)
+            if self._results_frame is self._frames[0]:
+                self._results_frame = merged  # cached results already cover every chunk
+            self._frames = [merged]
+        return self._frames[0]
+    
+    @df.setter
+    def df(self, df: pd.DataFrame) -> None:
+        self._frames = [df]
+    
+    def _memoized(self, section: str, compute: Callable):
+        """Return the cached result for section, computing it on first access"""
+        if self._results_frame is not self._frames[0]:
+            # self.df was replaced; nothing cached describes the new frame
+            self.invalidate()
+        if section not in self._results:
+            self._results[section] = compute()
+        return self._results[section]
+    
+    def invalidate(self) -> None:
+        """Drop all cached results, e.g. after modifying self.df in place"""
+        self._results = {}
+        self._results_frame = self.df
+        self.version += 1
+    
+    def append(self, new_df: pd.DataFrame) -> None:
+        """
+        Add records (e.g. an operator top-up for a later date range)
+        
+        Cached running aggregates are merged with the same aggregates over
+        new_df, so the cost grows with the new rows only:
+        
+        - temporal cube, contact counts, hourly activity and the sliding
+          window counts behind detect_bursts always
+        - activity cubes while their top contacts stay the same set
+        - first-seen contacts and IMEI transitions when new_df starts no
+          earlier than the existing records
+        
+        Everything else is recomputed on next access. Summaries of the
+        merged cubes (temporal and contact analysis, dashboard charts) cost
+        no pass over the records. detect_bursts re-derives its median/MAD
+        baselines from the merged window counts and then reads the frame once,
+        unsorted, for the records of flagged intervals; contact stats and the
+        location/communication sections take a full pass.
+        Chunks are concatenated on the next read of df, unioning the
+        categories of compact frames, and re-indexed 0..n-1.
+        """
+        if len(new_df) == 0:
+            return
+        if self._results_frame is not self._frames[0]:
+            self.invalidate()
+        
+        added = CDRAnalyzer(new_df)
+        old = self._results
+        tail = None
+        if 'new_contacts' in old or 'device_changes' in old:
+            tail = self._memoized('tail', self._compute_tail)
+        
+        merged = {}
+        if 'temporal_cube' in old:
+            merged['temporal_cube'] = self._merge_cubes(old['temporal_cube'], added.get_temporal_cube())
+        if 'contact_totals' in old:
+            # First-appearance order carries over, so ties rank as in a rebuild
+            totals, added_totals = old['contact_totals'], added._contact_totals()
+            contacts = totals.index.append(added_totals.index.difference(totals.index, sort=False))
+            merged['contact_totals'] = (totals.reindex(contacts, fill_value=0)
+                                        + added_totals.reindex(contacts, fill_value=0))
+        for key in [key for key in old if isinstance(key, tuple) and key[0] == 'activity_cube']:
+            if 'contact_totals' in merged:
+                cube = self._merge_activity_cubes(old[key], added, old['contact_totals'],
+                                                  merged['contact_totals'], key[1])
+                if cube is not None:
+                    merged[key] = cube
+        for key in [key for key in old if isinstance(key, tuple) and key[0] == 'window_counts']:
+            merged[key] = self._merge_window_counts(old[key], added._window_counts(*key[1:]))
+        if 'hourly_activity' in old:
+            merged['hourly_activity'] = old['hourly_activity'].add(
+                added._hourly_activity(), fill_value=0).astype(np.int64)
+        
+        if tail is not None:
+            start = added.df['DateTime'].min()
+            if tail[0] is None or start >= tail[0]:
+                if 'new_contacts' in old:
+                    first_seen = added._analyze_new_contacts()
+                    first_seen = first_seen[~first_seen['contact'].isin(old['new_contacts']['contact'])]
+                    merged['new_contacts'] = pd.concat([old['new_contacts'], first_seen], ignore_index=True)
+                if 'device_changes' in old:
+                    merged['device_changes'] = self._join_device_changes(
+                        old['device_changes'], tail, added)
+                merged['tail'] = added._compute_tail()
+        
+        self._frames.append(added.df)
+        self._results = merged
+        self.version += 1
+    
+    def get_temporal_cube(self) -> pd.DataFrame:
+        """
+        Hour x Call_Category x contact aggregate behind every temporal metric
+        
+        Built in one pass on first use and memoized like the other sections.
+        Rows are in order of first appearance, so ties rank like value_counts.
+        
+        Returns:
+            DataFrame with Hour, Call_Category, Contact, count and duration
+            (summed Dur(s)) columns
+        """
+        return self._memoized('temporal_cube', self._build_temporal_cube)
+    
+    def _build_temporal_cube(self) -> pd.DataFrame:
+        df = self.df
+        return self._aggregate_cube(df['Hour'], df['Call_Category'], df['B_Party_Clean'],
+                                    None, df['Dur(s)'])
+    
+    @classmethod
+    def _merge_cubes(cls, cube: pd.DataFrame, added: pd.DataFrame) -> pd.DataFrame:
+        """Combine two temporal cubes as if built from the concatenated records"""
+        union = pd.api.types.union_categoricals
+        return cls._aggregate_cube(
+            np.concatenate([cube['Hour'].to_numpy(), added['Hour'].to_numpy()]),
+            union([cube['Call_Category'].array, added['Call_Category'].array]),
+            union([cube['Contact'].array, added['Contact'].array]),
+            np.concatenate([cube['count'].to_numpy(), added['count'].to_numpy()]),
+            np.concatenate([cube['duration'].to_numpy(), added['duration'].to_numpy()]),
+        )
+    
+    @staticmethod
+    def _aggregate_cube(hour, category, contact, count, duration) -> pd.DataFrame:
+        """Sum count (1 per row when None) and duration per (Hour, Call_Category, Contact)"""
+        hour = np.asarray(hour, dtype=np.int64)
+        category_codes, categories = pd.factorize(category)
+        contact_codes, contacts = pd.factorize(contact)
+        
+        # One integer key per (contact, category, hour); NaN (code -1)
+        # takes the extra slot after each key's known values
+        n_categories, n_contacts = len(categories) + 1, len(contacts) + 1
+        cell_key = ((contact_codes % n_contacts) * n_categories + category_codes % n_categories) * 24 + hour
+        cell_codes, cells = pd.factorize(cell_key)
+        
+        # Labels are categoricals over the factorized values, so slices group on codes
+        category_codes = cells // 24 % n_categories
+        contact_codes = cells // 24 // n_categories
+        return pd.DataFrame({
+            'Hour': (cells % 24).astype(np.int8),
+            'Call_Category': pd.Categorical.from_codes(
+                np.where(category_codes < len(categories), category_codes, -1),
+                categories=pd.Index(categories, dtype=object)),
+            'Contact': pd.Categorical.from_codes(
+                np.where(contact_codes < len(contacts), contact_codes, -1),
+                categories=pd.Index(contacts, dtype=object)),
+            'count': np.bincount(cell_codes, weights=count, minlength=len(cells)).astype(np.int64),
+            'duration': np.bincount(cell_codes, weights=np.asarray(duration, dtype=float),
+                                    minlength=len(cells)),
+        })
+    
+    @staticmethod
+    def _ranked_counts(cube: pd.DataFrame, column: str, mask: np.ndarray, n: int = None) -> Dict:
+        """Record counts per value of a categorical cube column within mask, largest first"""
+        labels = cube[column].array
+        # Shift codes by one so NaN (-1) lands in a bin that is dropped
+        totals = np.bincount(labels.codes + 1, weights=cube['count'].to_numpy() * mask,
+                             minlength=len(labels.categories) + 1)[1:]
+        
+        # Categories are in order of first appearance, so a stable sort ranks ties like value_counts
+        order = np.argsort(-totals, kind='stable')
+        order = order[totals[order] > 0][:n]
+        return {labels.categories[i]: int(totals[i]) for i in order}
+    
+    def get_activity_cube(self, contact_buckets: int = 20) -> pd.DataFrame:
+        """
+        Date x Hour x Call_Category x contact-bucket aggregate behind the dashboard charts
+        
+        Contact_Bucket is the contact itself for the ``contact_buckets``
+        busiest contacts and 'Other' for everyone else, so the cube grows
+        with the date range rather than the record count. The app builds it
+        right after parsing; every chart is then a slice of it.
         
+        Returns:
+            DataFrame sorted by date and hour with Date (midnight timestamps),
+            Hour, Call_Category, Contact_Bucket, count and duration (summed
+            Dur(s)) columns
+        """
+        return self._memoized(('activity_cube', contact_buckets),
+                              lambda: self._build_activity_cube(contact_buckets))
+    
+    def _build_activity_cube(self, contact_buckets: int) -> pd.DataFrame:
+        df = self.df
+        times = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+        dated = ~np.isnat(times)
+        
+        # Records outside the top contacts (and without a contact) share the last bucket
+        top = self._contact_counts().index[:contact_buckets]
+        bucket_codes = pd.Categorical(df['B_Party_Clean'], categories=top).codes[dated].astype(np.int64)
+        bucket_codes[bucket_codes < 0] = len(top)
+        category_codes, categories = pd.factorize(df['Call_Category'])
+        return self._aggregate_activity_cube(
+            times[dated].astype('datetime64[D]').astype(np.int64), df['Hour'].to_numpy(dtype=np.int64)[dated],
+            category_codes[dated], categories, bucket_codes, top, None, df['Dur(s)'].to_numpy(dtype=float)[dated])
+    
+    @classmethod
+    def _merge_activity_cubes(cls, cube: pd.DataFrame, added: 'CDRAnalyzer', old_totals: pd.Series,
+                              totals: pd.Series, contact_buckets: int):
+        """
+        Fold added's records into an activity cube, as if rebuilt over both frames
+        
+        Contacts leaving the top buckets fold into 'Other'. None when a
+        contact with earlier records enters them, since 'Other' cannot be
+        split back into contacts.
+        """
+        top = totals.sort_values(ascending=False, kind='stable').index[:contact_buckets]
+        old_top = cube['Contact_Bucket'].cat.categories[:-1]
+        if top.difference(old_top).isin(old_totals.index).any():
+            return None
+        
+        # Category codes follow first appearance over the old frame, then the new one
+        df = added.df
+        times = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+        dated = ~np.isnat(times)
+        categories = cube['Call_Category'].cat.categories
+        added_categories = pd.Index(pd.unique(df['Call_Category'].dropna()), dtype=object)
+        categories = categories.append(added_categories.difference(categories, sort=False))
+        
+        # Old buckets move to the new rank order; 'Other' stays last
+        bucket_map = np.append(top.get_indexer(old_top), len(top))
+        bucket_map[bucket_map < 0] = len(top)
+        added_buckets = pd.Categorical(df['B_Party_Clean'], categories=top).codes[dated].astype(np.int64)
+        added_buckets[added_buckets < 0] = len(top)
+        return cls._aggregate_activity_cube(
+            np.concatenate([cube['Date'].to_numpy(dtype='datetime64[D]').astype(np.int64),
+                            times[dated].astype('datetime64[D]').astype(np.int64)]),
+            np.concatenate([cube['Hour'].to_numpy(dtype=np.int64), df['Hour'].to_numpy(dtype=np.int64)[dated]]),
+            np.concatenate([categories.get_indexer(cube['Call_Category']),
+                            categories.get_indexer(df['Call_Category'])[dated]]),
+            categories,
+            np.concatenate([bucket_map[cube['Contact_Bucket'].cat.codes], added_buckets]),
+            top,
+            np.concatenate([cube['count'].to_numpy(), np.ones(dated.sum(), dtype=np.int64)]),
+            np.concatenate([cube['duration'].to_numpy(), df['Dur(s)'].to_numpy(dtype=float)[dated]]),
+        )
+    
+    @staticmethod
+    def _aggregate_activity_cube(days, hour, category_codes, categories, bucket_codes, top,
+                                 count, duration) -> pd.DataFrame:
+        """Sum count (1 per row when None) and duration per (day, Hour, category, bucket)"""
+        first_day = days.min() if len(days) else 0
+        n_categories, n_buckets = len(categories) + 1, len(top) + 1
+        cell_key = (((days - first_day) * 24 + hour) * n_categories
+                    + category_codes % n_categories) * n_buckets + bucket_codes
+        cell_codes, cells = pd.factorize(cell_key, sort=True)
+        
+        category_codes = cells // n_buckets % n_categories
+        slots = cells // n_buckets // n_categories
+        return pd.DataFrame({
+            'Date': pd.to_datetime((first_day + slots // 24).astype('datetime64[D]')),
+            'Hour': (slots % 24).astype(np.int8),
+            'Call_Category': pd.Categorical.from_codes(
+                np.where(category_codes < len(categories), category_codes, -1),
+                categories=pd.Index(categories, dtype=object)),
+            'Contact_Bucket': pd.Categorical.from_codes(
+                cells % n_buckets, categories=pd.Index(list(top) + ['Other'], dtype=object)),
+            'count': np.bincount(cell_codes, weights=count, minlength=len(cells)).astype(np.int64),
+            'duration': np.bincount(cell_codes, weights=duration, minlength=len(cells)),
+        })
+    
+    def top_contacts(self, n: int = 10, categories: List[str] = None, hours: List[int] = None) -> Dict:
+        """
+        Busiest contacts by record count, optionally limited to call categories and hours
+        
+        Read from get_temporal_cube(), so any slice is exact and costs no
+        pass over the records.
+        """
+        cube = self.get_temporal_cube()
+        mask = np.ones(len(cube), dtype=bool)
+        if categories is not None:
+            mask &= cube['Call_Category'].isin(categories).to_numpy()
+        if hours is not None:
+            mask &= np.isin(cube['Hour'].to_numpy(), hours)
+        return self._ranked_counts(cube, 'Contact', mask, n)
+    
+    @staticmethod
+    def _slice_summary(cube: pd.DataFrame, mask: np.ndarray) -> Tuple[int, int, float]:
+        """(records, total duration, average duration) of the cube cells in mask"""
+        records = int(cube['count'].to_numpy() @ mask)
+        duration = float(cube['duration'].to_numpy() @ mask)
+        return records, int(duration), duration / records if records > 0 else 0
+    
     def get_temporal_analysis(self) -> Dict:
         """
         STATE-OF-THE-ART TEMPORAL ANALYSIS
         Comprehensive day/night and hourly pattern analysis
+        
+        Every metric is read from get_temporal_cube(), so repeat calls on the
+        same analyzer do not touch the full frame.
         """
+        return self._memoized('temporal', self._compute_temporal_analysis)
+    
+    def _compute_temporal_analysis(self) -> Dict:
         analysis = {}
+        cube = self.get_temporal_cube()
+        hours = cube['Hour'].to_numpy()
+        hourly = pd.Series(np.bincount(hours, weights=cube['count'].to_numpy(), minlength=24).astype(np.int64))
+        total = int(hourly.sum())
         
         # === NIGHT vs DAY ANALYSIS ===
-        night_calls = self.df[self.df['Is_Night'] == 1]
-        day_calls = self.df[self.df['Is_Day'] == 1]
-        evening_calls = self.df[self.df['Is_Evening'] == 1]
+        night = np.isin(hours, NIGHT_HOURS)
+        day = np.isin(hours, DAY_HOURS)
+        night_count, night_duration, night_avg = self._slice_summary(cube, night)
+        day_count, day_duration, day_avg = self._slice_summary(cube, day)
+        evening_count = int(hourly.loc[EVENING_HOURS].sum())
         
         analysis['night_day_summary'] = {
-            'night_count': len(night_calls),
-            'day_count': len(day_calls),
-            'evening_count': len(evening_calls),
-            'night_percentage': (len(night_calls) / len(self.df) * 100) if len(self.df) > 0 else 0,
-            'day_percentage': (len(day_calls) / len(self.df) * 100) if len(self.df) > 0 else 0,
-            'evening_percentage': (len(evening_calls) / len(self.df) * 100) if len(self.df) > 0 else 0,
+            'night_count': night_count,
+            'day_count': day_count,
+            'evening_count': evening_count,
+            'night_percentage': (night_count / total * 100) if total > 0 else 0,
+            'day_percentage': (day_count / total * 100) if total > 0 else 0,
+            'evening_percentage': (evening_count / total * 100) if total > 0 else 0,
         }
         
         # Night activity breakdown
         analysis['night_activity'] = {
-            'late_night_00_03': len(self.df[(self.df['Hour'] >= 0) & (self.df['Hour'] < 3)]),
-            'late_night_03_06': len(self.df[(self.df['Hour'] >= 3) & (self.df['Hour'] < 6)]),
-            'night_22_00': len(self.df[(self.df['Hour'] >= 22)]),
-            'top_night_contacts': self._get_top_contacts(night_calls, 10),
-            'night_call_types': night_calls['Call_Category'].value_counts().to_dict(),
-            'night_duration_total': int(night_calls['Dur(s)'].sum()),
-            'night_duration_avg': float(night_calls['Dur(s)'].mean()) if len(night_calls) > 0 else 0,
+            'late_night_00_03': int(hourly.iloc[0:3].sum()),
+            'late_night_03_06': int(hourly.iloc[3:6].sum()),
+            'night_22_00': int(hourly.iloc[22:].sum()),
+            'top_night_contacts': self._ranked_counts(cube, 'Contact', night, 10),
+            'night_call_types': self._ranked_counts(cube, 'Call_Category', night),
+            'night_duration_total': night_duration,
+            'night_duration_avg': night_avg,
         }
         
         # Day activity breakdown
         analysis['day_activity'] = {
-            'morning_06_09': len(self.df[(self.df['Hour'] >= 6) & (self.df['Hour'] < 9)]),
-            'morning_09_12': len(self.df[(self.df['Hour'] >= 9) & (self.df['Hour'] < 12)]),
-            'afternoon_12_15': len(self.df[(self.df['Hour'] >= 12) & (self.df['Hour'] < 15)]),
-            'afternoon_15_18': len(self.df[(self.df['Hour'] >= 15) & (self.df['Hour'] < 18)]),
-            'top_day_contacts': self._get_top_contacts(day_calls, 10),
-            'day_call_types': day_calls['Call_Category'].value_counts().to_dict(),
-            'day_duration_total': int(day_calls['Dur(s)'].sum()),
-            'day_duration_avg': float(day_calls['Dur(s)'].mean()) if len(day_calls) > 0 else 0,
+            'morning_06_09': int(hourly.iloc[6:9].sum()),
+            'morning_09_12': int(hourly.iloc[9:12].sum()),
+            'afternoon_12_15': int(hourly.iloc[12:15].sum()),
+            'afternoon_15_18': int(hourly.iloc[15:18].sum()),
+            'top_day_contacts': self._ranked_counts(cube, 'Contact', day, 10),
+            'day_call_types': self._ranked_counts(cube, 'Call_Category', day),
+            'day_duration_total': day_duration,
+            'day_duration_avg': day_avg,
         }
         
         # Hourly distribution
-        hourly_dist = self.df.groupby('Hour').size().to_dict()
-        analysis['hourly_distribution'] = {str(h): hourly_dist.get(h, 0) for h in range(24)}
+        analysis['hourly_distribution'] = {str(h): int(count) for h, count in hourly.items()}
         
         # Peak hours
-        hourly_counts = self.df['Hour'].value_counts()
         analysis['peak_hours'] = {
-            'overall': int(hourly_counts.idxmax()) if len(hourly_counts) > 0 else None,
-            'night': int(night_calls['Hour'].value_counts().idxmax()) if len(night_calls) > 0 else None,
-            'day': int(day_calls['Hour'].value_counts().idxmax()) if len(day_calls) > 0 else None,
+            'overall': int(hourly.idxmax()) if total > 0 else None,
+            'night': int(hourly.loc[NIGHT_HOURS].idxmax()) if night_count > 0 else None,
+            'day': int(hourly.loc[DAY_HOURS].idxmax()) if day_count > 0 else None,
         }
         
         # Suspicious patterns
@@ -82,42 +430,47 @@ class CDRAnalyzer:
     
     def get_contact_analysis(self) -> Dict:
         """Analyze contact patterns and relationships"""
+        return self._memoized('contacts', self._compute_contact_analysis)
+    
+    def _compute_contact_analysis(self) -> Dict:
         analysis = {}
         
         # Top contacts overall
-        contact_counts = self.df['B_Party_Clean'].value_counts()
+        contact_counts = self._contact_counts()
         analysis['top_contacts'] = contact_counts.head(20).to_dict()
         
         # Contact frequency distribution
         analysis['contact_frequency'] = {
-            'unique_contacts': int(self.df['B_Party_Clean'].nunique()),
+            'unique_contacts': len(contact_counts),
             'one_time_contacts': int((contact_counts == 1).sum()),
             'frequent_contacts_5plus': int((contact_counts >= 5).sum()),
             'very_frequent_10plus': int((contact_counts >= 10).sum()),
         }
         
-        # Call type breakdown by contact
-        analysis['contact_call_types'] = {}
-        for contact in contact_counts.head(10).index:
-            contact_df = self.df[self.df['B_Party_Clean'] == contact]
-            analysis['contact_call_types'][contact] = {
-                'total': len(contact_df),
-                'incoming': len(contact_df[contact_df['Call Type'] == 'IN']),
-                'outgoing': len(contact_df[contact_df['Call Type'] == 'OUT']),
-                'sms': len(contact_df[contact_df['Call Type'].str.contains('SM', na=False)]),
-            }
+        # Call type breakdown by contact (get_contact_stats pages through every contact)
+        top_stats = self._contact_stats().head(10)
+        analysis['contact_call_types'] = {
+            row['contact']: {name: int(row[name]) for name in ['total', 'incoming', 'outgoing', 'sms']}
+            for row in top_stats.to_dict('records')
+        }
         
-        # New contacts over time
-        analysis['new_contacts_timeline'] = self._analyze_new_contacts()
+        # New contacts over time (first page; get_new_contacts pages through the rest)
+        new_contacts = self.get_new_contacts()
+        analysis['new_contacts_timeline'] = new_contacts['items']
+        analysis['new_contacts_total'] = new_contacts['total']
         
         return analysis
     
     def get_location_analysis(self) -> Dict:
         """Analyze location patterns from tower data"""
+        return self._memoized('location', self._compute_location_analysis)
+    
+    def _compute_location_analysis(self) -> Dict:
         analysis = {}
         
-        # Filter records with valid coordinates
-        valid_coords = self.df.dropna(subset=['First_Lat', 'First_Long'])
+        # Filter records with valid coordinates (only the columns used below)
+        valid_coords = self.df[['First_Lat', 'First_Long', 'Is_Night', 'Is_Day']].dropna(
+            subset=['First_Lat', 'First_Long'])
         
         if len(valid_coords) == 0:
             return {'error': 'No valid location data available'}
@@ -139,8 +492,8 @@ class CDRAnalyzer:
         ]
         
         # Night vs Day locations
-        night_locs = self.df[self.df['Is_Night'] == 1].dropna(subset=['First_Lat', 'First_Long'])
-        day_locs = self.df[self.df['Is_Day'] == 1].dropna(subset=['First_Lat', 'First_Long'])
+        night_locs = valid_coords[valid_coords['Is_Night'] == 1]
+        day_locs = valid_coords[valid_coords['Is_Day'] == 1]
         
         analysis['night_locations'] = len(night_locs.groupby(['First_Lat', 'First_Long']))
         analysis['day_locations'] = len(day_locs.groupby(['First_Lat', 'First_Long']))
@@ -152,6 +505,9 @@ class CDRAnalyzer:
     
     def get_communication_patterns(self) -> Dict:
         """Analyze communication patterns and behaviors"""
+        return self._memoized('communication', self._compute_communication_patterns)
+    
+    def _compute_communication_patterns(self) -> Dict:
         analysis = {}
         
         # Call duration analysis
@@ -169,7 +525,8 @@ class CDRAnalyzer:
             }
         
         # Daily activity patterns
-        daily_counts = self.df.groupby('Date_Only').size()
+        cube = self.get_activity_cube()
+        daily_counts = cube.groupby('Date')['count'].sum()
         analysis['daily_patterns'] = {
             'avg_daily_activity': float(daily_counts.mean()),
             'max_daily_activity': int(daily_counts.max()),
@@ -181,13 +538,16 @@ class CDRAnalyzer:
         analysis['burst_activity'] = self._detect_burst_activity()
         
         # Weekly patterns
-        dow_counts = self.df['DayOfWeek'].value_counts()
-        analysis['day_of_week'] = dow_counts.to_dict()
+        dow_counts = daily_counts.groupby(daily_counts.index.day_name()).sum()
+        analysis['day_of_week'] = dow_counts.sort_values(ascending=False, kind='stable').to_dict()
         
         return analysis
     
     def get_device_analysis(self) -> Dict:
         """Analyze device and SIM usage patterns"""
+        return self._memoized('devices', self._compute_device_analysis)
+    
+    def _compute_device_analysis(self) -> Dict:
         analysis = {}
         
         # IMEI analysis
@@ -196,7 +556,7 @@ class CDRAnalyzer:
             analysis['imei_info'] = {
                 'unique_devices': int(self.df['IMEI'].nunique()),
                 'devices_used': imei_counts.to_dict(),
-                'device_changes': self._detect_device_changes(),
+                'device_changes': self._memoized('device_changes', self._detect_device_changes).to_dict('records'),
             }
         
         # IMSI analysis
@@ -209,68 +569,324 @@ class CDRAnalyzer:
         
         return analysis
     
-    def _get_top_contacts(self, df: pd.DataFrame, n: int = 10) -> Dict:
-        """Get top N contacts from a dataframe"""
-        return df['B_Party_Clean'].value_counts().head(n).to_dict()
+    def get_new_contacts(self, page: int = 1, page_size: int = 50) -> Dict:
+        """
+        Page through first-seen contacts, oldest first
+        
+        Returns:
+            dict with 'items' (date, contact, call_type records) plus 'page',
+            'page_size', 'total' and 'pages'
+        """
+        return _paginate(self._memoized('new_contacts', self._analyze_new_contacts), page, page_size)
+    
+    def get_device_changes(self, page: int = 1, page_size: int = 50) -> Dict:
+        """
+        Page through IMEI changes in time order
+        
+        Returns:
+            dict with 'items' (date, from_imei, to_imei records) plus 'page',
+            'page_size', 'total' and 'pages'
+        """
+        return _paginate(self._memoized('device_changes', self._detect_device_changes), page, page_size)
+    
+    def detect_bursts(self, window: str = '15min', step: str = '5min', baseline: str = 'robust',
+                      sigma: float = 3.0, min_count: int = 5) -> pd.DataFrame:
+        """
+        Find intervals of unusually dense activity with a sliding window
+        
+        Windows of length ``window`` start every ``step`` along the record
+        timeline, so bursts that straddle hour boundaries are caught. A
+        window is a burst when it holds at least ``min_count`` records and
+        more than median + sigma * MAD (scaled, at least one record) of the
+        windows that saw any activity; idle stretches do not drag the
+        baseline down.
+        
+        Args:
+            window: Window length as a pandas offset, e.g. '5min', '15min', '60min'
+            step: Distance between window starts
+            baseline: 'robust' for one median/MAD over all active windows,
+                'weekday' for a separate median/MAD per day of the week
+            sigma: Scaled MADs above the median a window must exceed
+            min_count: Fewest records a burst window may hold
+        
+        Returns:
+            DataFrame with one row per burst (overlapping flagged windows
+            merged): start, end, records, peak_count (busiest window),
+            baseline and threshold (of that window), and contacts
+            ({contact: records}, largest first)
+        """
+        if baseline not in BURST_BASELINES:
+            raise ValueError(f"baseline must be one of {BURST_BASELINES}, got {baseline!r}")
+        width, stride = pd.Timedelta(window).value, pd.Timedelta(step).value
+        if width <= 0 or stride <= 0:
+            raise ValueError("window and step must be positive")
+        
+        return self._memoized(('bursts', width, stride, baseline, sigma, min_count),
+                              lambda: self._compute_bursts(width, stride, baseline, sigma, min_count))
+    
+    def _window_counts(self, width: int, stride: int) -> Tuple:
+        """
+        (first DateTime as ns, records per active window) behind detect_bursts
+        
+        Counts cover every step-aligned window holding a record, including
+        those that start before the first one, so the counts of two frames
+        add up to the counts of their concatenation (what append merges).
+        """
+        def count() -> Tuple:
+            times = self.df['DateTime'].to_numpy(dtype='datetime64[ns]')[self._time_order()]
+            ns = times[~np.isnat(times)].view(np.int64)
+            if len(ns) == 0:
+                return None, pd.Series(dtype=np.int64)
+            starts = np.arange(((ns[0] - width) // stride + 1) * stride, ns[-1] + 1, stride)
+            counts = np.searchsorted(ns, starts + width) - np.searchsorted(ns, starts)
+            active = counts > 0
+            return int(ns[0]), pd.Series(counts[active], index=starts[active])
+        return self._memoized(('window_counts', width, stride), count)
+    
+    @staticmethod
+    def _merge_window_counts(counts: Tuple, added: Tuple) -> Tuple:
+        """Combine two window counts as if counted over the concatenated records"""
+        if added[0] is None:
+            return counts
+        if counts[0] is None:
+            return added
+        return min(counts[0], added[0]), counts[1].add(added[1], fill_value=0).astype(np.int64)
+    
+    def _compute_bursts(self, width: int, stride: int, baseline: str, sigma: float,
+                        min_count: int) -> pd.DataFrame:
+        columns = ['start', 'end', 'records', 'peak_count', 'baseline', 'threshold', 'contacts']
+        first, active = self._window_counts(width, stride)
+        if first is None:
+            return pd.DataFrame(columns=columns)
+        
+        # Windows [start, start + width) on a step-aligned grid from the first record;
+        # idle windows never count towards the baseline, so only active ones are kept
+        active = active[active.index >= first - first % stride]
+        starts, counts = active.index.to_numpy(), active.to_numpy()
+        
+        # Robust baseline per group (a single group, or the weekday of the window start)
+        groups = (starts // _DAY_NS + 3) % 7 if baseline == 'weekday' else np.zeros(len(starts), dtype=np.int64)
+        medians, scales = np.zeros(7), np.ones(7)
+        for group in np.unique(groups):
+            values = counts[groups == group]
+            medians[group] = np.median(values)
+            scales[group] = max(1.4826 * np.median(np.abs(values - medians[group])), 1.0)
+        window_baseline = medians[groups]
+        threshold = window_baseline + sigma * scales[groups]
+        flagged = np.flatnonzero((counts > threshold) & (counts >= min_count))
+        if len(flagged) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        # Merge overlapping or touching flagged windows into intervals
+        flagged_starts = starts[flagged]
+        heads = np.flatnonzero(np.r_[True, flagged_starts[1:] > flagged_starts[:-1] + width])
+        tails = np.r_[heads[1:], len(flagged)] - 1
+        segment = np.repeat(np.arange(len(heads)), np.diff(np.r_[heads, len(flagged)]))
+        peaks = flagged[np.lexsort((-counts[flagged], segment))[heads]]
+        begin, end = flagged_starts[heads], flagged_starts[tails] + width
+        
+        # Records inside each interval, in time order (NaT sorts before every interval)
+        ns = self.df['DateTime'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        interval = np.searchsorted(begin, ns, side='right') - 1
+        rows = np.flatnonzero((interval >= 0) & (ns < end[np.maximum(interval, 0)]))
+        rows = rows[np.argsort(ns[rows], kind='stable')]
+        burst_of = interval[rows]
+        lengths = np.bincount(burst_of, minlength=len(heads))
+        
+        # Contacts of those records
+        contact_codes, contacts = pd.factorize(self.df['B_Party_Clean'].iloc[rows])
+        known = contact_codes >= 0
+        pairs, pair_counts = np.unique(burst_of[known] * len(contacts) + contact_codes[known],
+                                       return_counts=True)
+        burst_contacts = [{} for _ in heads]
+        for pair in np.lexsort((-pair_counts, pairs // max(len(contacts), 1))):
+            burst, code = divmod(int(pairs[pair]), len(contacts))
+            burst_contacts[burst][contacts[code]] = int(pair_counts[pair])
+        
+        return pd.DataFrame({
+            'start': pd.to_datetime(begin),
+            'end': pd.to_datetime(end),
+            'records': lengths,
+            'peak_count': counts[peaks],
+            'baseline': window_baseline[peaks],
+            'threshold': threshold[peaks],
+            'contacts': burst_contacts,
+        })
+    
+    def get_contact_stats(self, page: int = 1, page_size: int = 50) -> Dict:
+        """
+        Page through per-contact statistics, busiest contact first
+        
+        Returns:
+            dict with 'items' (contact, total, incoming, outgoing, sms,
+            total_duration, avg_duration, first_seen, last_seen, night_share,
+            distinct_cells records) plus 'page', 'page_size', 'total' and 'pages'
+        """
+        return _paginate(self._contact_stats(), page, page_size)
+    
+    def _contact_stats(self) -> pd.DataFrame:
+        return self._memoized('contact_stats', self._compute_contact_stats)
+    
+    def _compute_contact_stats(self) -> pd.DataFrame:
+        """
+        One pass over the frame for every contact's statistics
+        
+        Calls and SMS are counted by Call_Category, so Airtel and Jio call
+        types are treated alike. avg_duration is over voice calls; ties in
+        total keep the order contacts first appear in.
+        """
+        df = self.df
+        codes, contacts = pd.factorize(df['B_Party_Clean'])
+        known = codes >= 0
+        codes, n = codes[known], len(contacts)
+        
+        def per_contact(values) -> np.ndarray:
+            return np.bincount(codes, weights=np.asarray(values, dtype=float)[known], minlength=n)
+        
+        category = df['Call_Category']
+        is_voice = category.isin(VOICE_CATEGORIES)
+        incoming = per_contact(category == 'Incoming Call')
+        outgoing = per_contact(category == 'Outgoing Call')
+        sms = per_contact(category.isin(['SMS Received', 'SMS Sent']))
+        seconds = df['Dur(s)'].fillna(0)
+        duration = per_contact(seconds)
+        voice_duration = per_contact(seconds.where(is_voice, 0))
+        total = np.bincount(codes, minlength=n)
+        
+        # First/last seen over records with a timestamp
+        times = df['DateTime'].to_numpy(dtype='datetime64[ns]')[known]
+        timed = ~np.isnat(times)
+        first = np.full(n, np.iinfo(np.int64).max)
+        last = np.full(n, np.iinfo(np.int64).min)
+        np.minimum.at(first, codes[timed], times[timed].astype(np.int64))
+        np.maximum.at(last, codes[timed], times[timed].astype(np.int64))
+        never = first == np.iinfo(np.int64).max
+        
+        distinct_cells = np.zeros(n, dtype=np.int64)
+        if 'First CGI' in df.columns:
+            cell_codes, cells = pd.factorize(df['First CGI'])
+            cell_codes = cell_codes[known]
+            with_cell = cell_codes >= 0
+            pairs = pd.unique(codes[with_cell].astype(np.int64) * len(cells) + cell_codes[with_cell])
+            distinct_cells = np.bincount(pairs // max(len(cells), 1), minlength=n)
+        
+        stats = pd.DataFrame({
+            'contact': np.asarray(contacts, dtype=object),
+            'total': total,
+            'incoming': incoming.astype(np.int64),
+            'outgoing': outgoing.astype(np.int64),
+            'sms': sms.astype(np.int64),
+            'total_duration': duration.astype(np.int64),
+            'avg_duration': np.divide(voice_duration, incoming + outgoing, out=np.zeros(n),
+                                      where=(incoming + outgoing) > 0),
+            'first_seen': pd.to_datetime(np.where(never, np.datetime64('NaT', 'ns'), first.astype('datetime64[ns]'))),
+            'last_seen': pd.to_datetime(np.where(never, np.datetime64('NaT', 'ns'), last.astype('datetime64[ns]'))),
+            'night_share': per_contact(df['Is_Night']) / np.maximum(total, 1),
+            'distinct_cells': distinct_cells,
+        })
+        return stats.iloc[np.argsort(-total, kind='stable')].reset_index(drop=True)
+    
+    def _contact_counts(self) -> pd.Series:
+        """Records per contact, largest first; ties keep the order contacts first appear in"""
+        return self._memoized('contact_counts',
+                              lambda: self._contact_totals().sort_values(ascending=False, kind='stable'))
+    
+    def _contact_totals(self) -> pd.Series:
+        """Records per contact, in order of first appearance (what append merges)"""
+        def count() -> pd.Series:
+            codes, contacts = pd.factorize(self.df['B_Party_Clean'])
+            return pd.Series(np.bincount(codes[codes >= 0], minlength=len(contacts)),
+                             index=pd.Index(contacts, dtype=object))
+        return self._memoized('contact_totals', count)
+    
+    def _hourly_activity(self) -> pd.Series:
+        """Records per (date, hour) bucket"""
+        return self._memoized('hourly_activity', lambda: self.df['DateTime'].groupby(
+            [self.df['DateTime'].dt.date, self.df['DateTime'].dt.hour]).size())
+    
+    def _compute_tail(self) -> Tuple:
+        """(DateTime, IMEI) of the last record in time order; (None, None) when empty"""
+        if len(self.df) == 0:
+            return None, None
+        last = self._time_order()[-1]
+        imei = self.df['IMEI'].iloc[last] if 'IMEI' in self.df.columns else None
+        return self.df['DateTime'].iloc[last], imei
+    
+    @staticmethod
+    def _join_device_changes(changes: pd.DataFrame, tail: Tuple, added: 'CDRAnalyzer') -> pd.DataFrame:
+        """Extend IMEI transitions with later records, including the change at the seam"""
+        added_changes = added._detect_device_changes()
+        if tail[0] is None or 'IMEI' not in added.df.columns:
+            return pd.concat([changes, added_changes], ignore_index=True)
+        
+        first = added._time_order()[0]
+        first_imei = added.df['IMEI'].iloc[first]
+        seam = []
+        if first_imei != tail[1] or pd.isna(first_imei):
+            seam = [{'date': added.df['DateTime'].iloc[first].strftime('%Y-%m-%d %H:%M:%S'),
+                     'from_imei': tail[1], 'to_imei': first_imei}]
+        return pd.concat([changes, pd.DataFrame(seam, columns=changes.columns), added_changes],
+                         ignore_index=True)
+    
+    def _time_order(self) -> np.ndarray:
+        """Row positions in DateTime order; ties keep file order"""
+        times = self.df['DateTime']
+        if times.is_monotonic_increasing:
+            return np.arange(len(times))
+        return np.argsort(times.to_numpy(), kind='stable')
     
     def _detect_suspicious_temporal_patterns(self) -> Dict:
         """Detect suspicious temporal patterns"""
         patterns = {}
+        cube = self.get_temporal_cube()
+        hours = cube['Hour'].to_numpy()
+        counts = cube['count'].to_numpy()
+        total = int(counts.sum())
+        night = np.isin(hours, NIGHT_HOURS)
+        night_count = int(counts @ night)
         
         # Excessive night activity
-        night_pct = (self.df['Is_Night'].sum() / len(self.df) * 100) if len(self.df) > 0 else 0
+        night_pct = (night_count / total * 100) if total > 0 else 0
         patterns['excessive_night_activity'] = night_pct > 30
         patterns['night_activity_percentage'] = float(night_pct)
         
         # Late night activity (00:00 - 04:00)
-        late_night = len(self.df[(self.df['Hour'] >= 0) & (self.df['Hour'] < 4)])
+        late_night = int(counts[hours < 4].sum())
         patterns['late_night_activity'] = late_night
         patterns['late_night_suspicious'] = late_night > 50
         
         # Consistent night contacts
-        night_df = self.df[self.df['Is_Night'] == 1]
-        if len(night_df) > 0:
-            night_contacts = night_df['B_Party_Clean'].value_counts()
-            patterns['frequent_night_contacts'] = night_contacts.head(5).to_dict()
+        if night_count > 0:
+            patterns['frequent_night_contacts'] = self._ranked_counts(cube, 'Contact', night, 5)
         
         return patterns
     
-    def _analyze_new_contacts(self) -> List[Dict]:
-        """Analyze when new contacts appear"""
-        timeline = []
-        seen_contacts = set()
-        
-        for _, row in self.df.sort_values('DateTime').iterrows():
-            contact = row['B_Party_Clean']
-            if contact not in seen_contacts and contact != 'Unknown':
-                seen_contacts.add(contact)
-                timeline.append({
-                    'date': row['DateTime'].strftime('%Y-%m-%d'),
-                    'contact': contact,
-                    'call_type': row['Call_Category']
-                })
-        
-        return timeline[:50]  # Return first 50 new contacts
+    def _analyze_new_contacts(self) -> pd.DataFrame:
+        """First record of every contact, in time order (date, contact, call_type)"""
+        ordered = self.df[['DateTime', 'B_Party_Clean', 'Call_Category']].iloc[self._time_order()]
+        contacts = ordered['B_Party_Clean']
+        first_seen = ordered[contacts.notna() & (contacts != 'Unknown')].drop_duplicates('B_Party_Clean')
+        
+        return pd.DataFrame({
+            'date': first_seen['DateTime'].dt.strftime('%Y-%m-%d'),
+            'contact': first_seen['B_Party_Clean'].astype(object),
+            'call_type': first_seen['Call_Category'].astype(object),
+        }).reset_index(drop=True)
     
     def _analyze_movement(self) -> Dict:
         """Analyze movement between locations"""
         movement = {}
         
-        # Calculate movements (when location changes)
-        valid_df = self.df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime')
+        valid_df = self.df[['DateTime', 'First_Lat', 'First_Long']].dropna(subset=['First_Lat', 'First_Long'])
         
         if len(valid_df) > 1:
-            # Detect location changes
-            location_changes = 0
-            prev_lat, prev_lon = None, None
+            order = np.argsort(valid_df['DateTime'].to_numpy(), kind='stable')
+            lat = valid_df['First_Lat'].to_numpy(dtype=float)[order]
+            lon = valid_df['First_Long'].to_numpy(dtype=float)[order]
             
-            for _, row in valid_df.iterrows():
-                curr_lat, curr_lon = row['First_Lat'], row['First_Long']
-                if prev_lat is not None:
-                    # Consider it a movement if coordinates differ significantly
-                    if abs(curr_lat - prev_lat) > 0.01 or abs(curr_lon - prev_lon) > 0.01:
-                        location_changes += 1
-                prev_lat, prev_lon = curr_lat, curr_lon
+            # A movement is a change of more than 0.01 degrees from the previous record
+            moved = (np.abs(np.diff(lat)) > 0.01) | (np.abs(np.diff(lon)) > 0.01)
+            location_changes = int(moved.sum())
             
             movement['total_movements'] = location_changes
             movement['mobility_score'] = float(location_changes / len(valid_df) * 100)
@@ -282,7 +898,7 @@ class CDRAnalyzer:
         bursts = []
         
         # Group by hour
-        hourly_activity = self.df.groupby([self.df['DateTime'].dt.date, self.df['DateTime'].dt.hour]).size()
+        hourly_activity = self._hourly_activity()
         
         # Find hours with activity > mean + 2*std
         mean_activity = hourly_activity.mean()
@@ -301,24 +917,19 @@ class CDRAnalyzer:
         
         return sorted(bursts, key=lambda x: x['count'], reverse=True)[:20]
     
-    def _detect_device_changes(self) -> List[Dict]:
-        """Detect when device (IMEI) changes"""
-        changes = []
-        
+    def _detect_device_changes(self) -> pd.DataFrame:
+        """IMEI transitions in time order (date, from_imei, to_imei)"""
         if 'IMEI' not in self.df.columns:
-            return changes
-        
-        sorted_df = self.df.sort_values('DateTime')
-        prev_imei = None
-        
-        for _, row in sorted_df.iterrows():
-            curr_imei = row['IMEI']
-            if prev_imei is not None and curr_imei != prev_imei:
-                changes.append({
-                    'date': row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'from_imei': prev_imei,
-                    'to_imei': curr_imei
-                })
-            prev_imei = curr_imei
-        
-        return changes
+            return pd.DataFrame(columns=['date', 'from_imei', 'to_imei'])
+        
+        ordered = self.df[['DateTime', 'IMEI']].iloc[self._time_order()]
+        imei = ordered['IMEI'].astype(object)
+        previous = imei.shift()
+        changed = imei.ne(previous)
+        changed.iloc[:1] = False
+        
+        return pd.DataFrame({
+            'date': ordered['DateTime'][changed].dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'from_imei': previous[changed],
+            'to_imei': imei[changed],
+        }).reset_index(drop=True)
@@ -13,12 +13,15 @@ from streamlit_folium import folium_static
 import networkx as nx
 from datetime import datetime, timedelta
 import json
+import os
 
 # Import custom modules
-from cdr_parser import CDRParser
-from cdr_analyzer import CDRAnalyzer
+from cdr_parser import parse_cdr_batch
+from cdr_cache import CDRCache
+from cdr_analyzer import CDRAnalyzer, VOICE_CATEGORIES, NIGHT_HOURS, DAY_HOURS, EVENING_HOURS
 from network_analyzer import NetworkAnalyzer
-from location_analyzer import LocationAnalyzer
+from location_analyzer import (LocationAnalyzer, find_colocations, haversine_km, major_movement_indices,
+                               track_distances, track_level_of_detail)
 
 # Page configuration
 st.set_page_config(
@@ -249,12 +252,33 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'cdr_data' not in st.session_state:
-    st.session_state.cdr_data = None
+if 'memory_report' not in st.session_state:
+    st.session_state.memory_report = None
 if 'parsed_df' not in st.session_state:
     st.session_state.parsed_df = None
 if 'analyzer' not in st.session_state:
     st.session_state.analyzer = None
+if 'parse_cache' not in st.session_state:
+    st.session_state.parse_cache = CDRCache()
+
+def parse_uploaded_files(uploaded_files, compact: bool):
+    """Parse Streamlit uploads into one frame; returns (df, memory report or None)"""
+    # Save uploaded files temporarily
+    temp_paths = []
+    for uploaded_file in uploaded_files:
+        temp_path = f"/tmp/{uploaded_file.name}"
+        with open(temp_path, 'wb') as f:
+            f.write(uploaded_file.getbuffer())
+        temp_paths.append(temp_path)
+    
+    # Parse all files across a process pool, tagged by source (single files and top-ups too,
+    # so every frame the analyzer merges has the same columns)
+    df, failures, memory_report = parse_cdr_batch(temp_paths, compact=compact, cache=st.session_state.parse_cache)
+    for path, error in failures:
+        st.warning(f"⚠️ Skipped {os.path.basename(path)}: {error}")
+    if df.empty:
+        raise ValueError("None of the uploaded files could be parsed")
+    return df, memory_report
 
 def main():
     # Header
@@ -264,28 +288,31 @@ def main():
     # Sidebar
     with st.sidebar:
         st.markdown("### 📁 Upload CDR File")
-        uploaded_file = st.file_uploader(
-            "Upload Airtel CDR CSV",
+        uploaded_files = st.file_uploader(
+            "Upload Airtel / Jio CDR CSV",
             type=['csv'],
-            help="Upload Call Detail Record file in Airtel format"
+            accept_multiple_files=True,
+            help="Upload one or more Call Detail Record files (Airtel or Jio format)"
         )
         
-        if uploaded_file:
+        if uploaded_files:
+            compact = st.checkbox(
+                "Compact memory mode",
+                value=False,
+                help="Store low-cardinality columns as categoricals and coordinates as float32 to fit more CDRs per session"
+            )
+            
             if st.button("🔄 Parse CDR File", type="primary", use_container_width=True):
                 with st.spinner("Parsing CDR file..."):
                     try:
-                        # Save uploaded file temporarily
-                        temp_path = f"/tmp/{uploaded_file.name}"
-                        with open(temp_path, 'wb') as f:
-                            f.write(uploaded_file.getbuffer())
-                        
-                        # Parse the file
-                        parser = CDRParser(temp_path)
-                        df = parser.parse()
+                        df, memory_report = parse_uploaded_files(uploaded_files, compact)
                         
                         st.session_state.parsed_df = df
-                        st.session_state.cdr_data = parser
+                        st.session_state.memory_report = memory_report
+                        st.session_state.compact = compact
                         st.session_state.analyzer = CDRAnalyzer(df)
+                        # Dashboard charts are slices of this cube; build it once per upload
+                        st.session_state.analyzer.get_activity_cube()
                         
                         st.success(f"✅ Successfully parsed {len(df)} records!")
                         st.rerun()
@@ -297,7 +324,8 @@ def main():
         
         # Quick stats in sidebar
         if st.session_state.parsed_df is not None:
-            df = st.session_state.parsed_df
+            # Top-ups are concatenated into the analyzer's frame on this first read after append
+            df = st.session_state.parsed_df = st.session_state.analyzer.df
             st.markdown("### 📊 Quick Stats")
             st.metric("Total Records", f"{len(df):,}")
             st.metric("Unique Contacts", f"{df['B_Party_Clean'].nunique():,}")
@@ -305,6 +333,42 @@ def main():
             
             night_pct = (df['Is_Night'].sum() / len(df) * 100)
             st.metric("Night Activity", f"{night_pct:.1f}%")
+            
+            report = st.session_state.memory_report
+            if report and report['after_bytes'] is None:
+                # Merged categories are unioned, so chunk sizes don't add up; measure the merged frame
+                report['after_bytes'] = int(df.memory_usage(deep=True).sum())
+            if report:
+                st.metric(
+                    "Memory",
+                    f"{report['after_bytes'] / 1e6:.1f} MB",
+                    delta=f"{(report['after_bytes'] - report['before_bytes']) / 1e6:.1f} MB",
+                    delta_color="inverse"
+                )
+            
+            # Operator top-ups (e.g. a later date range) are folded into the running aggregates
+            with st.expander("➕ Add Top-up Records"):
+                top_up_files = st.file_uploader(
+                    "Upload more records for the same target",
+                    type=['csv'],
+                    accept_multiple_files=True,
+                    key="top_up_files"
+                )
+                if top_up_files and st.button("Append Records", use_container_width=True):
+                    with st.spinner("Parsing top-up..."):
+                        try:
+                            new_df, new_report = parse_uploaded_files(top_up_files, st.session_state.get('compact', False))
+                            st.session_state.analyzer.append(new_df)
+                            report = st.session_state.memory_report
+                            if report and new_report:
+                                st.session_state.memory_report = {
+                                    'before_bytes': report['before_bytes'] + new_report['before_bytes'],
+                                    'after_bytes': None,
+                                }
+                            st.success(f"✅ Appended {len(new_df)} records!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"❌ Error appending records: {str(e)}")
     
     # Main content
     if st.session_state.parsed_df is None:
@@ -410,11 +474,13 @@ def render_dashboard(df, analyzer):
     # Key metrics - Row 1: Overview
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    # Calculate call and SMS counts
-    incoming_calls = len(df[df['Call_Category'] == 'Incoming Call'])
-    outgoing_calls = len(df[df['Call_Category'] == 'Outgoing Call'])
-    sms_received = len(df[df['Call_Category'] == 'SMS Received'])
-    sms_sent = len(df[df['Call_Category'] == 'SMS Sent'])
+    # Calculate call and SMS counts (from the pre-aggregated activity cube)
+    cube = analyzer.get_activity_cube()
+    category_counts = cube.groupby('Call_Category', observed=True)['count'].sum()
+    incoming_calls = int(category_counts.get('Incoming Call', 0))
+    outgoing_calls = int(category_counts.get('Outgoing Call', 0))
+    sms_received = int(category_counts.get('SMS Received', 0))
+    sms_sent = int(category_counts.get('SMS Sent', 0))
     total_calls = incoming_calls + outgoing_calls
     total_sms = sms_received + sms_sent
     
@@ -422,7 +488,7 @@ def render_dashboard(df, analyzer):
         st.metric("Total Records", f"{len(df):,}")
     
     with col2:
-        st.metric("Unique Contacts", f"{df['B_Party_Clean'].nunique():,}")
+        st.metric("Unique Contacts", f"{analyzer.get_contact_stats(page_size=1)['total']:,}")
     
     with col3:
         st.metric("📞 Total Calls", f"{total_calls:,}", 
@@ -604,7 +670,7 @@ def render_dashboard(df, analyzer):
     
     with col1:
         st.markdown("### 📅 Daily Activity Pattern")
-        daily_counts = df.groupby(df['DateTime'].dt.date).size().reset_index()
+        daily_counts = cube.groupby('Date')['count'].sum().reset_index()
         daily_counts.columns = ['Date', 'Count']
         
         fig = px.line(daily_counts, x='Date', y='Count',
@@ -616,7 +682,7 @@ def render_dashboard(df, analyzer):
     
     with col2:
         st.markdown("### 🕐 Hourly Distribution")
-        hourly_counts = df.groupby('Hour').size().reset_index()
+        hourly_counts = cube.groupby('Hour')['count'].sum().reset_index()
         hourly_counts.columns = ['Hour', 'Count']
         
         fig = go.Figure(data=[
@@ -815,10 +881,10 @@ def render_dashboard(df, analyzer):
     
     with col1:
         st.markdown("### 👥 Top 10 Contacts (All)")
-        top_contacts = df['B_Party_Clean'].value_counts().head(10)
+        top_contacts = analyzer.top_contacts(10)
         
         fig = go.Figure(data=[
-            go.Bar(y=top_contacts.index, x=top_contacts.values,
+            go.Bar(y=list(top_contacts.keys()), x=list(top_contacts.values()),
                   orientation='h',
                   marker_color='#667eea')
         ])
@@ -835,11 +901,10 @@ def render_dashboard(df, analyzer):
         st.markdown("### 📞 Top 10 Call Contacts")
         
         if total_calls > 0:
-            calls_only = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])]
-            top_call_contacts = calls_only['B_Party_Clean'].value_counts().head(10)
+            top_call_contacts = analyzer.top_contacts(10, VOICE_CATEGORIES)
             
             fig = go.Figure(data=[
-                go.Bar(y=top_call_contacts.index, x=top_call_contacts.values,
+                go.Bar(y=list(top_call_contacts.keys()), x=list(top_call_contacts.values()),
                       orientation='h',
                       marker_color='#764ba2')
             ])
@@ -977,15 +1042,10 @@ def render_temporal_analysis(df, analyzer):
         st.markdown("### 📅 Calendar Heatmap")
         st.caption("Activity intensity by day of month")
         
-        # Prepare calendar data
-        df['Date'] = df['DateTime'].dt.date
-        df['Day'] = df['DateTime'].dt.day
-        df['Month'] = df['DateTime'].dt.month
-        df['Year'] = df['DateTime'].dt.year
-        df['Weekday'] = df['DateTime'].dt.dayofweek
-        
-        # Get activity by date
-        calendar_data = df.groupby(['Year', 'Month', 'Day']).size().reset_index(name='Count')
+        # Get activity by date (a slice of the pre-aggregated activity cube)
+        daily = analyzer.get_activity_cube().groupby('Date')['count'].sum()
+        calendar_data = pd.DataFrame({'Year': daily.index.year, 'Month': daily.index.month,
+                                      'Day': daily.index.day, 'Count': daily.values})
         calendar_data['Date'] = pd.to_datetime(calendar_data[['Year', 'Month', 'Day']])
         calendar_data['Weekday'] = calendar_data['Date'].dt.dayofweek
         calendar_data['Week'] = calendar_data['Date'].dt.isocalendar().week
@@ -1025,7 +1085,7 @@ def render_temporal_analysis(df, analyzer):
         st.caption("Circular visualization of hourly patterns")
         
         # Prepare polar data
-        hourly_counts = df.groupby('Hour').size().reset_index(name='Count')
+        hourly_counts = analyzer.get_activity_cube().groupby('Hour')['count'].sum().reset_index(name='Count')
         hourly_counts = hourly_counts.sort_values('Hour')
         
         # Create polar chart
@@ -1107,34 +1167,58 @@ def render_temporal_analysis(df, analyzer):
     st.markdown("### 📞 Call Patterns by Time Period")
     st.caption("Understanding **who** is being called during different times is critical for investigations")
     
-    # Filter for calls only
-    calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
+    # Filter for calls only (slices of the hour x category x contact cube)
+    temporal_cube = analyzer.get_temporal_cube()
+    calls_cube = temporal_cube[temporal_cube['Call_Category'].isin(VOICE_CATEGORIES)]
+    
+    def call_count(calls, category=None):
+        if category is not None:
+            calls = calls[calls['Call_Category'] == category]
+        return int(calls['count'].sum())
+    
+    def avg_call_duration(calls):
+        return calls['duration'].sum() / call_count(calls) if call_count(calls) > 0 else 0
+    
+    def top_call_contacts(calls, n=10):
+        """Per-contact totals, direction split and average duration, busiest first"""
+        by_contact = calls.groupby(['Contact', 'Call_Category'], observed=True)[['count', 'duration']].sum()
+        counts = by_contact['count'].unstack(fill_value=0).reindex(columns=VOICE_CATEGORIES, fill_value=0)
+        durations = by_contact['duration'].groupby(level='Contact', observed=True).sum()
+        totals = counts.sum(axis=1).sort_values(ascending=False, kind='stable').head(n)
+        return pd.DataFrame({
+            'Contact': totals.index.astype(object),
+            'Total': totals.values,
+            'In': counts.loc[totals.index, 'Incoming Call'].values,
+            'Out': counts.loc[totals.index, 'Outgoing Call'].values,
+            'Avg Duration': [f"{int(d // 60)}m {int(d % 60)}s"
+                             for d in durations.loc[totals.index].values / totals.values],
+        })
     
-    if len(calls_df) > 0:
+    if call_count(calls_cube) > 0:
         # Separate by time period
-        night_calls = calls_df[calls_df['Is_Night'] == 1]
-        day_calls = calls_df[calls_df['Is_Day'] == 1]
-        evening_calls = calls_df[calls_df['Is_Evening'] == 1]
+        night_calls = calls_cube[calls_cube['Hour'].isin(NIGHT_HOURS)]
+        day_calls = calls_cube[calls_cube['Hour'].isin(DAY_HOURS)]
+        evening_calls = calls_cube[calls_cube['Hour'].isin(EVENING_HOURS)]
         
         # Calculate metrics
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            night_incoming = len(night_calls[night_calls['Call_Category'] == 'Incoming Call'])
-            night_outgoing = len(night_calls[night_calls['Call_Category'] == 'Outgoing Call'])
-            st.metric("🌙 Night Calls", f"{len(night_calls):,}",
+            night_incoming = call_count(night_calls, 'Incoming Call')
+            night_outgoing = call_count(night_calls, 'Outgoing Call')
+            st.metric("🌙 Night Calls", f"{call_count(night_calls):,}",
                      delta=f"In: {night_incoming} | Out: {night_outgoing}")
         
         with col2:
-            day_incoming = len(day_calls[day_calls['Call_Category'] == 'Incoming Call'])
-            day_outgoing = len(day_calls[day_calls['Call_Category'] == 'Outgoing Call'])
-            st.metric("☀️ Day Calls", f"{len(day_calls):,}",
+            day_incoming = call_count(day_calls, 'Incoming Call')
+            day_outgoing = call_count(day_calls, 'Outgoing Call')
+            st.metric("☀️ Day Calls", f"{call_count(day_calls):,}",
                      delta=f"In: {day_incoming} | Out: {day_outgoing}")
         
         with col3:
-            evening_incoming = len(evening_calls[evening_calls['Call_Category'] == 'Incoming Call'])
-            evening_outgoing = len(evening_calls[evening_calls['Call_Category'] == 'Outgoing Call'])
-            st.metric("🌆 Evening Calls", f"{len(evening_calls):,}",
+            evening_incoming = call_count(evening_calls, 'Incoming Call')
+            evening_outgoing = call_count(evening_calls, 'Outgoing Call')
+            st.metric("🌆 Evening Calls", f"{call_count(evening_calls):,}",
                      delta=f"In: {evening_incoming} | Out: {evening_outgoing}")
         
         # Top Call Contacts by Time Period
@@ -1143,36 +1227,18 @@ def render_temporal_analysis(df, analyzer):
         with col1:
             st.markdown("#### 🌙 Top Night Call Contacts")
             
-            if len(night_calls) > 0:
-                night_contacts = night_calls['B_Party_Clean'].value_counts().head(10)
-                
-                # Create detailed table
-                night_contact_details = []
-                for contact in night_contacts.index[:10]:
-                    contact_calls = night_calls[night_calls['B_Party_Clean'] == contact]
-                    incoming = len(contact_calls[contact_calls['Call_Category'] == 'Incoming Call'])
-                    outgoing = len(contact_calls[contact_calls['Call_Category'] == 'Outgoing Call'])
-                    avg_duration = contact_calls['Dur(s)'].mean()
-                    
-                    night_contact_details.append({
-                        'Contact': contact,
-                        'Total': len(contact_calls),
-                        'In': incoming,
-                        'Out': outgoing,
-                        'Avg Duration': f"{int(avg_duration//60)}m {int(avg_duration%60)}s"
-                    })
-                
-                night_df = pd.DataFrame(night_contact_details)
+            if call_count(night_calls) > 0:
+                night_df = top_call_contacts(night_calls)
                 st.dataframe(night_df, use_container_width=True, hide_index=True)
                 
                 # Visualization
                 fig = go.Figure(data=[
                     go.Bar(
-                        y=night_contacts.index[:10],
-                        x=night_contacts.values[:10],
+                        y=night_df['Contact'],
+                        x=night_df['Total'],
                         orientation='h',
                         marker_color='#667eea',
-                        text=night_contacts.values[:10],
+                        text=night_df['Total'],
                         textposition='outside'
                     )
                 ])
@@ -1190,36 +1256,18 @@ def render_temporal_analysis(df, analyzer):
         with col2:
             st.markdown("#### ☀️ Top Day Call Contacts")
             
-            if len(day_calls) > 0:
-                day_contacts = day_calls['B_Party_Clean'].value_counts().head(10)
-                
-                # Create detailed table
-                day_contact_details = []
-                for contact in day_contacts.index[:10]:
-                    contact_calls = day_calls[day_calls['B_Party_Clean'] == contact]
-                    incoming = len(contact_calls[contact_calls['Call_Category'] == 'Incoming Call'])
-                    outgoing = len(contact_calls[contact_calls['Call_Category'] == 'Outgoing Call'])
-                    avg_duration = contact_calls['Dur(s)'].mean()
-                    
-                    day_contact_details.append({
-                        'Contact': contact,
-                        'Total': len(contact_calls),
-                        'In': incoming,
-                        'Out': outgoing,
-                        'Avg Duration': f"{int(avg_duration//60)}m {int(avg_duration%60)}s"
-                    })
-                
-                day_df = pd.DataFrame(day_contact_details)
+            if call_count(day_calls) > 0:
+                day_df = top_call_contacts(day_calls)
                 st.dataframe(day_df, use_container_width=True, hide_index=True)
                 
                 # Visualization
                 fig = go.Figure(data=[
                     go.Bar(
-                        y=day_contacts.index[:10],
-                        x=day_contacts.values[:10],
+                        y=day_df['Contact'],
+                        x=day_df['Total'],
                         orientation='h',
                         marker_color='#764ba2',
-                        text=day_contacts.values[:10],
+                        text=day_df['Total'],
                         textposition='outside'
                     )
                 ])
@@ -1244,11 +1292,11 @@ def render_temporal_analysis(df, analyzer):
             time_duration_data = pd.DataFrame({
                 'Time Period': ['Night', 'Day', 'Evening'],
                 'Avg Duration (s)': [
-                    night_calls['Dur(s)'].mean() if len(night_calls) > 0 else 0,
-                    day_calls['Dur(s)'].mean() if len(day_calls) > 0 else 0,
-                    evening_calls['Dur(s)'].mean() if len(evening_calls) > 0 else 0
+                    avg_call_duration(night_calls),
+                    avg_call_duration(day_calls),
+                    avg_call_duration(evening_calls)
                 ],
-                'Total Calls': [len(night_calls), len(day_calls), len(evening_calls)]
+                'Total Calls': [call_count(night_calls), call_count(day_calls), call_count(evening_calls)]
             })
             
             fig = go.Figure(data=[
@@ -1302,35 +1350,56 @@ def render_temporal_analysis(df, analyzer):
     # Burst activity detection
     st.markdown("---")
     st.markdown("### 🔥 Burst Activity Detection")
-    st.caption("Periods of unusually high activity (> mean + 2σ)")
+    st.caption("Sliding windows with unusually many records (> median + 3 MAD of active windows)")
     
-    comm_patterns = analyzer.get_communication_patterns()
-    bursts = comm_patterns.get('burst_activity', [])
+    col1, col2 = st.columns(2)
+    with col1:
+        window = st.radio("Window:", ["5 min", "15 min", "60 min"], index=1, horizontal=True)
+    with col2:
+        baseline = st.radio("Baseline:", ["Overall", "Per weekday"], horizontal=True)
     
-    if bursts:
-        burst_df = pd.DataFrame(bursts[:10])
-        burst_df['datetime'] = burst_df['date'] + ' ' + burst_df['hour'].astype(str) + ':00'
+    minutes = int(window.split()[0])
+    bursts = analyzer.detect_bursts(
+        window=f"{minutes}min",
+        step=f"{max(minutes // 5, 1)}min",
+        baseline='weekday' if baseline == "Per weekday" else 'robust'
+    )
+    
+    if len(bursts) > 0:
+        top_bursts = bursts.nlargest(10, 'peak_count').sort_values('start')
+        labels = top_bursts['start'].dt.strftime('%Y-%m-%d %H:%M')
         
         fig = go.Figure(data=[
-            go.Bar(x=burst_df['datetime'], y=burst_df['count'],
+            go.Bar(x=labels, y=top_bursts['peak_count'],
                   marker_color='#ff4b4b',
-                  text=burst_df['count'],
-                  textposition='outside')
+                  text=top_bursts['peak_count'],
+                  textposition='outside'),
+            go.Scatter(x=labels, y=top_bursts['threshold'], mode='markers',
+                      marker=dict(color='yellow', symbol='line-ew-open', size=30),
+                      name="Threshold")
         ])
         
-        fig.add_hline(y=burst_df['threshold'].iloc[0], line_dash="dash",
-                     line_color="yellow",
-                     annotation_text="Threshold")
-        
         fig.update_layout(
-            title="Top 10 Burst Activity Periods",
-            xaxis_title="Date & Hour",
-            yaxis_title="Activity Count",
+            title=f"Top 10 Bursts ({window} windows)",
+            xaxis_title="Burst Start",
+            yaxis_title="Records in Busiest Window",
             template="plotly_dark",
+            showlegend=False,
             height=400
         )
         
         st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown(f"**All {len(bursts)} burst intervals**")
+        burst_table = pd.DataFrame({
+            'Start': bursts['start'].dt.strftime('%Y-%m-%d %H:%M'),
+            'End': bursts['end'].dt.strftime('%Y-%m-%d %H:%M'),
+            'Records': bursts['records'],
+            'Peak Window': bursts['peak_count'],
+            'Top Contacts': bursts['contacts'].map(
+                lambda contacts: ', '.join(f"{c} ({n})" for c, n in list(contacts.items())[:3])),
+        })
+        st.dataframe(burst_table, use_container_width=True, hide_index=True)
     else:
         st.info("No significant burst activity detected")
 
@@ -1400,6 +1469,25 @@ def render_contact_network(df, analyzer):
         )
         st.plotly_chart(fig, use_container_width=True)
     
+    # ===== PER-CONTACT STATISTICS =====
+    st.markdown("### 📇 All Contacts")
+    
+    page_size = 50
+    page_count = analyzer.get_contact_stats(page_size=page_size)['pages']
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+    contact_stats = analyzer.get_contact_stats(page=int(page), page_size=page_size)
+    
+    stats_df = pd.DataFrame(contact_stats['items'])
+    if len(stats_df) > 0:
+        stats_df['first_seen'] = stats_df['first_seen'].dt.strftime('%Y-%m-%d %H:%M')
+        stats_df['last_seen'] = stats_df['last_seen'].dt.strftime('%Y-%m-%d %H:%M')
+        stats_df['avg_duration'] = stats_df['avg_duration'].round(1)
+        stats_df['night_share'] = (stats_df['night_share'] * 100).round(1)
+        stats_df.columns = ['Contact', 'Total', 'Incoming', 'Outgoing', 'SMS', 'Total Duration (s)',
+                            'Avg Call Duration (s)', 'First Seen', 'Last Seen', 'Night %', 'Distinct Cells']
+        st.dataframe(stats_df, use_container_width=True, hide_index=True)
+    st.caption(f"{contact_stats['total']:,} contacts")
+    
     # ===== NETWORK GRAPH - 2D/3D TOGGLE =====
     st.markdown("### 🕸️ Contact Network Visualization")
     
@@ -1691,7 +1779,10 @@ def render_location_intelligence(df, analyzer):
     """Render location intelligence"""
     st.markdown("## 🗺️ Location Intelligence")
     
-    location_analyzer = LocationAnalyzer(df)
+    # Kept across reruns so the spatial index is built once per frame
+    location_analyzer = st.session_state.get('location_analyzer')
+    if location_analyzer is None or location_analyzer.df is not df:
+        location_analyzer = st.session_state.location_analyzer = LocationAnalyzer(df)
     location_analysis = analyzer.get_location_analysis()
     
     if 'error' in location_analysis:
@@ -1792,14 +1883,9 @@ def render_location_intelligence(df, analyzer):
         ]].copy()
         
         # Calculate distance between GPS and Cell Tower
-        loc_analyzer = LocationAnalyzer(df)
-        
-        comparison_df['Distance_km'] = comparison_df.apply(
-            lambda row: loc_analyzer.calculate_distance(
-                row['First_Lat'], row['First_Long'],
-                row['Cell_Tower_Lat'], row['Cell_Tower_Long']
-            ) if pd.notna(row['Cell_Tower_Lat']) else None,
-            axis=1
+        comparison_df['Distance_km'] = haversine_km(
+            comparison_df['First_Lat'], comparison_df['First_Long'],
+            comparison_df['Cell_Tower_Lat'], comparison_df['Cell_Tower_Long']
         )
         
         st.dataframe(comparison_df, use_container_width=True)
@@ -1865,6 +1951,148 @@ def render_location_intelligence(df, analyzer):
     else:
         st.info("No location data available for selected filter")
     
+    # ===== GEOFENCE =====
+    st.markdown("---")
+    st.markdown("### 🛡️ Geofence")
+    st.caption("All records on towers within a radius of a point, e.g. a crime scene or an address")
+    
+    spatial_index = location_analyzer.get_spatial_index()
+    if len(spatial_index) > 0:
+        busiest = int(spatial_index.tower_records.argmax())
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            fence_lat = st.number_input("Latitude", value=float(spatial_index.tower_lat[busiest]), format="%.6f")
+        with col2:
+            fence_lon = st.number_input("Longitude", value=float(spatial_index.tower_lon[busiest]), format="%.6f")
+        with col3:
+            fence_km = st.number_input("Radius (km)", min_value=0.1, value=2.0, step=0.5)
+        
+        fence_towers, _ = spatial_index.towers_within(fence_lat, fence_lon, fence_km)
+        fence_df = df.iloc[location_analyzer.get_records_within(fence_lat, fence_lon, fence_km)]
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Records Inside", f"{len(fence_df):,}")
+        with col2:
+            st.metric("Towers Inside", f"{len(fence_towers):,}")
+        with col3:
+            st.metric("First Seen", fence_df['DateTime'].min().strftime('%Y-%m-%d %H:%M') if len(fence_df) else "N/A")
+        with col4:
+            st.metric("Last Seen", fence_df['DateTime'].max().strftime('%Y-%m-%d %H:%M') if len(fence_df) else "N/A")
+        
+        if len(fence_df) > 0:
+            fence_map = folium.Map(location=[fence_lat, fence_lon], zoom_start=13)
+            folium.Circle(location=[fence_lat, fence_lon], radius=fence_km * 1000,
+                          color='purple', fill=True, fillOpacity=0.1).add_to(fence_map)
+            fence_counts = pd.Series(spatial_index.tower_records[fence_towers], index=fence_towers)
+            for tower, count in fence_counts.nlargest(50).items():
+                folium.CircleMarker(
+                    location=[spatial_index.tower_lat[tower], spatial_index.tower_lon[tower]],
+                    radius=min(count / 2, 20),
+                    popup=f"Count: {count}",
+                    color='purple',
+                    fill=True,
+                    fillOpacity=0.6
+                ).add_to(fence_map)
+            folium_static(fence_map, width=1200, height=400)
+            
+            fence_daily = fence_df.groupby(fence_df['DateTime'].dt.date).size()
+            fig = px.bar(x=fence_daily.index, y=fence_daily.values,
+                         labels={'x': 'Date', 'y': 'Records'}, title="Days Present Inside the Geofence")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.dataframe(
+                fence_df[['DateTime', 'B_Party_Clean', 'Call_Category', 'Dur(s)', 'First_Lat', 'First_Long']].head(500),
+                use_container_width=True
+            )
+        else:
+            st.info("No records inside this geofence")
+            st.markdown("**Nearest towers:**")
+            st.dataframe(location_analyzer.get_nearest_towers(fence_lat, fence_lon, 5), use_container_width=True)
+    else:
+        st.info("No location data available for geofencing")
+    
+    # ===== STAY REGIONS =====
+    st.markdown("---")
+    st.markdown("### 🏠 Stay Regions")
+    st.caption("Clusters of nearby towers the target keeps returning to, with dwell time and time-of-day mix")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        region_eps = st.slider("Towers within (km)", min_value=0.1, max_value=3.0, value=0.5, step=0.1)
+    with col2:
+        region_min = st.number_input("Min records per region", min_value=1, value=20, step=5)
+    
+    regions = location_analyzer.get_stay_regions(eps_km=region_eps, min_records=int(region_min))
+    if len(regions) > 0:
+        regions = regions.copy()
+        regions['Likely'] = ''
+        # Label only regions that saw night (day) activity at all
+        night_records = regions['records'] * regions['night_share']
+        day_records = regions['records'] * regions['day_share']
+        if night_records.max() > 0:
+            home = night_records.idxmax()
+            regions.loc[home, 'Likely'] = '🏠 Home'
+            day_records = day_records.drop(home)
+        if len(day_records) > 0 and day_records.max() > 0:
+            regions.loc[day_records.idxmax(), 'Likely'] = '🏢 Work'
+        
+        region_map = folium.Map(location=[regions['lat'].iloc[0], regions['lon'].iloc[0]], zoom_start=11)
+        for _, region in regions.head(30).iterrows():
+            folium.Circle(
+                location=[region['lat'], region['lon']],
+                radius=max(region['radius_km'] * 1000, 200),
+                popup=f"Region {region['region']} {region['Likely']}: {region['records']:,} records, "
+                      f"{region['dwell_hours']:.1f} h",
+                color='green' if region['Likely'] else 'orange',
+                fill=True,
+                fillOpacity=0.3
+            ).add_to(region_map)
+        folium_static(region_map, width=1200, height=500)
+        
+        st.dataframe(
+            regions[['region', 'Likely', 'records', 'towers', 'radius_km', 'dwell_hours', 'days',
+                     'night_share', 'day_share', 'evening_share', 'first_seen', 'last_seen', 'lat', 'lon']],
+            use_container_width=True
+        )
+    else:
+        st.info("No stay regions at these settings; try a larger distance or fewer records")
+    
+    # ===== STAYS & TRIPS =====
+    st.markdown("---")
+    st.markdown("### 🧭 Visits & Trips")
+    st.caption("The track split into visits (consecutive records in one stay region or at one tower) and the trips between them")
+    
+    min_stay = st.select_slider("Minimum visit length", options=[5, 15, 30, 60, 120], value=15,
+                                format_func=lambda minutes: f"{minutes} min")
+    stays, trips = location_analyzer.get_stays_and_trips(
+        min_duration=pd.Timedelta(minutes=min_stay), eps_km=region_eps, min_records=int(region_min)
+    )
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Visits", f"{len(stays):,}")
+    with col2:
+        st.metric("Trips", f"{len(trips):,}")
+    with col3:
+        st.metric("Distance Between Visits", f"{trips['distance_km'].sum():,.1f} km")
+    with col4:
+        median_dwell = stays['dwell'].median() if len(stays) else pd.Timedelta(0)
+        st.metric("Median Visit", f"{median_dwell.total_seconds() / 3600:.1f} h")
+    
+    if len(stays) > 0:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Visits**")
+            visits_view = stays[['arrive', 'depart', 'dwell', 'region', 'records', 'lat', 'lon']].copy()
+            visits_view['dwell'] = visits_view['dwell'].astype(str)
+            st.dataframe(visits_view.tail(500), use_container_width=True)
+        with col2:
+            st.markdown("**Trips**")
+            trips_view = trips[['depart', 'arrive', 'duration', 'distance_km', 'path_km', 'speed_kmh']].copy()
+            trips_view['duration'] = trips_view['duration'].astype(str)
+            st.dataframe(trips_view.tail(500), use_container_width=True)
+    
     # ===== ANIMATED MOVEMENT TIMELINE WITH REVERSE GEOCODING =====
     st.markdown("---")
     st.markdown("### 🎬 Movement Timeline (Animated)")
@@ -1933,32 +2161,32 @@ def render_location_intelligence(df, analyzer):
         show_major_only = st.checkbox(
             "🏙️ Show Major Movements Only (City-to-City)",
             value=False,
-            help="Filter out minor movements within the same area. Shows only significant location changes (>5km distance)."
+            help="Filter out minor movements within the same area. Shows only significant location changes (>5km distance by default)."
         )
         
         # Store original count before filtering
         original_count = len(movement_df)
         
         if show_major_only:
-            # Filter to show only major movements (use LocationAnalyzer from top import)
-            loc_analyzer = LocationAnalyzer(movement_df)
-            
-            major_movements = [movement_df.iloc[0]]  # Always include first location
-            
-            for i in range(1, len(movement_df)):
-                prev_lat = major_movements[-1]['First_Lat']
-                prev_lon = major_movements[-1]['First_Long']
-                curr_lat = movement_df.iloc[i]['First_Lat']
-                curr_lon = movement_df.iloc[i]['First_Long']
-                
-                # Calculate distance from last major movement
-                distance = loc_analyzer.calculate_distance(prev_lat, prev_lon, curr_lat, curr_lon)
-                
-                # Only include if moved more than 5km
-                if distance > 5:
-                    major_movements.append(movement_df.iloc[i])
+            major_cols = st.columns(3)
+            with major_cols[0]:
+                min_distance_km = st.number_input("Min distance (km)", min_value=0.0, value=5.0, step=1.0)
+            with major_cols[1]:
+                min_gap_minutes = st.number_input("Min time between (minutes)", min_value=0, value=0, step=15)
+            with major_cols[2]:
+                max_speed_kmh = st.number_input(
+                    "Max plausible speed (km/h, 0 = off)", min_value=0, value=0, step=50,
+                    help="Skip jumps faster than this from the last major movement (tower noise)"
+                )
             
-            movement_df = pd.DataFrame(major_movements).reset_index(drop=True)
+            # Positions of the major movements; one scan over the coordinate arrays
+            keep = major_movement_indices(
+                movement_df['First_Lat'], movement_df['First_Long'], movement_df['DateTime'],
+                min_distance_km=min_distance_km,
+                min_interval=pd.Timedelta(minutes=min_gap_minutes) if min_gap_minutes else None,
+                max_speed_kmh=max_speed_kmh or None
+            )
+            movement_df = movement_df.iloc[keep].reset_index(drop=True)
             movement_df['Sequence'] = range(len(movement_df))
             st.success(f"🏙️ Showing {len(movement_df)} major movements (filtered from {original_count} total events)")
         
@@ -2058,14 +2286,43 @@ def render_location_intelligence(df, analyzer):
         speed_map = {"1x (Normal)": 1000, "2x (Fast)": 500, "3x (Faster)": 333, "4x (Fastest)": 250}
         frame_duration = speed_map[speed_option]
         
+        # Level of detail: long tracks animate at most max_frames time-spread events over
+        # a simplified trail; the full-resolution track is drawn on request
+        lod_cols = st.columns(3)
+        with lod_cols[0]:
+            full_resolution = st.checkbox(
+                "🔍 Full resolution", value=False,
+                help="Animate every event and draw the unsimplified path (slow for long tracks)"
+            )
+        with lod_cols[1]:
+            max_frames = st.number_input("Max animation frames", min_value=10, value=300, step=50)
+        with lod_cols[2]:
+            max_path_points = st.number_input("Max path points", min_value=10, value=2000, step=500)
+        
+        if full_resolution:
+            frames_df = path_df = sample_df
+        else:
+            path_pos, frame_pos = track_level_of_detail(
+                sample_df['DateTime'], sample_df['First_Lat'], sample_df['First_Long'],
+                max_points=int(max_path_points), max_frames=int(max_frames), zoom=11
+            )
+            frames_df = sample_df.iloc[frame_pos].reset_index(drop=True)
+            frames_df['Sequence'] = range(len(frames_df))
+            path_df = sample_df.iloc[path_pos]
+            if len(frames_df) < len(sample_df) or len(path_df) < len(sample_df):
+                st.caption(
+                    f"Animating {len(frames_df):,} of {len(sample_df):,} events spread over time; "
+                    f"path simplified to {len(path_df):,} points"
+                )
+        
         # Create animated scatter mapbox with LARGE markers
         fig = px.scatter_mapbox(
-            sample_df,
+            frames_df,
             lat='First_Lat',
             lon='First_Long',
             animation_frame='Sequence',
             color='TimePeriodColor',
-            size=[30] * len(sample_df),  # Large constant size for all markers
+            size=[30] * len(frames_df),  # Large constant size for all markers
             hover_name='Location',
             hover_data={
                 'DateTimeStr': True,
@@ -2098,8 +2355,8 @@ def render_location_intelligence(df, analyzer):
         
         # Add THICK movement path line to show complete trajectory (will be behind markers)
         fig.add_trace(go.Scattermapbox(
-            lat=sample_df['First_Lat'],
-            lon=sample_df['First_Long'],
+            lat=path_df['First_Lat'],
+            lon=path_df['First_Long'],
             mode='lines+markers',
             line=dict(width=4, color='rgba(150, 150, 150, 0.4)'),  # Gray trail
             marker=dict(size=8, color='rgba(200, 200, 200, 0.6)'),  # Small gray dots for visited
@@ -2143,11 +2400,11 @@ def render_location_intelligence(df, analyzer):
         
         # Update slider to show date/time instead of sequence number
         if hasattr(fig.layout, 'sliders') and len(fig.layout.sliders) > 0:
+            frame_labels = frames_df['DateTimeStr'].tolist()
             for i, frame in enumerate(fig.frames):
-                if i < len(sample_df):
+                if i < len(frame_labels):
                     # Get the actual date/time for this frame
-                    datetime_str = sample_df.iloc[i]['DateTimeStr']
-                    fig.layout.sliders[0].steps[i]['label'] = datetime_str
+                    fig.layout.sliders[0].steps[i]['label'] = frame_labels[i]
         
         # Display with full interactivity enabled
         st.plotly_chart(fig, use_container_width=True, config={
@@ -2170,14 +2427,7 @@ def render_location_intelligence(df, analyzer):
         with col3:
             # Calculate approximate distance traveled
             if len(movement_df) > 1:
-                loc_analyzer = LocationAnalyzer(df)
-                total_dist = 0
-                for i in range(len(movement_df) - 1):
-                    lat1 = movement_df.iloc[i]['First_Lat']
-                    lon1 = movement_df.iloc[i]['First_Long']
-                    lat2 = movement_df.iloc[i+1]['First_Lat']
-                    lon2 = movement_df.iloc[i+1]['First_Long']
-                    total_dist += loc_analyzer.calculate_distance(lat1, lon1, lat2, lon2)
+                total_dist = track_distances(movement_df['First_Lat'], movement_df['First_Long']).sum()
                 st.metric("Approx. Distance", f"{total_dist:.1f} km")
             else:
                 st.metric("Approx. Distance", "N/A")
@@ -2248,6 +2498,60 @@ def render_location_intelligence(df, analyzer):
         top_locs_df = pd.DataFrame(location_analysis['top_locations'][:10])
         top_locs_df.index = range(1, len(top_locs_df) + 1)
         st.dataframe(top_locs_df, use_container_width=True)
+    
+    # ===== CO-LOCATION ACROSS TARGETS =====
+    st.markdown("---")
+    st.markdown("### 🤝 Co-location (Multiple Targets)")
+    
+    if 'Target_Number' not in df.columns or df['Target_Number'].nunique() < 2:
+        st.info("Upload the CDRs of two or more targets together to find when they were in the same place")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        coloc_km = st.slider("Towers within (km)", min_value=0.1, max_value=5.0, value=0.5, step=0.1, key="coloc_km")
+    with col2:
+        coloc_minutes = st.select_slider("Records within (minutes)", options=[5, 15, 30, 60, 120], value=15)
+    
+    target_rows = df.groupby('Target_Number', observed=True).indices
+    frames = {
+        target: df.iloc[rows, df.columns.get_indexer(['DateTime', 'First_Lat', 'First_Long'])]
+        for target, rows in target_rows.items()
+    }
+    meetings = find_colocations(frames, radius_km=coloc_km, window=pd.Timedelta(minutes=coloc_minutes))
+    
+    if len(meetings) == 0:
+        st.info("No co-locations found at these settings")
+        return
+    
+    pairs = meetings.groupby(['target_a', 'target_b']).agg(
+        meetings=('start', 'size'), total_time=('duration', 'sum'), last_met=('end', 'max')
+    ).sort_values('meetings', ascending=False).reset_index()
+    pairs['total_time'] = pairs['total_time'].astype(str)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Meetings", f"{len(meetings):,}")
+    with col2:
+        st.metric("Target Pairs That Met", f"{len(pairs):,}")
+    st.dataframe(pairs, use_container_width=True)
+    
+    meeting_map = folium.Map(location=[meetings['lat'].mean(), meetings['lon'].mean()], zoom_start=11)
+    for _, meeting in meetings.nlargest(200, 'matches').iterrows():
+        folium.CircleMarker(
+            location=[meeting['lat'], meeting['lon']],
+            radius=min(4 + meeting['matches'], 15),
+            popup=f"{meeting['target_a']} + {meeting['target_b']}: {meeting['start']:%Y-%m-%d %H:%M} "
+                  f"({meeting['duration']})",
+            color='crimson',
+            fill=True,
+            fillOpacity=0.6
+        ).add_to(meeting_map)
+    folium_static(meeting_map, width=1200, height=500)
+    
+    meetings_view = meetings.copy()
+    meetings_view['duration'] = meetings_view['duration'].astype(str)
+    st.dataframe(meetings_view, use_container_width=True)
 
 
 def render_communication_patterns(df, analyzer):
@@ -2278,7 +2582,8 @@ def render_communication_patterns(df, analyzer):
         st.markdown("### 🎻 Call Duration Distribution")
         st.caption("Beautiful visualization of duration patterns")
         
-        calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
+        # Distributions need the raw durations; take just the two columns they read
+        calls_df = df.loc[df['Call_Category'].isin(VOICE_CATEGORIES), ['Call_Category', 'Dur(s)']]
         
         if len(calls_df) > 0:
             col1, col2 = st.columns(2)
@@ -2325,11 +2630,11 @@ def render_communication_patterns(df, analyzer):
                 st.markdown("### 🗂️ Contact Frequency Treemap")
                 st.caption("Hierarchical view of top contacts")
                 
-                contact_counts = calls_df['B_Party_Clean'].value_counts().head(20)
+                contact_counts = analyzer.top_contacts(20, VOICE_CATEGORIES)
                 
                 treemap_data = pd.DataFrame({
-                    'Contact': contact_counts.index,
-                    'Count': contact_counts.values
+                    'Contact': list(contact_counts.keys()),
+                    'Count': list(contact_counts.values())
                 })
                 
                 # Add categories based on frequency
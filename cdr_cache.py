@@ -0,0 +1,171 @@
+"""
+CDR Cache Module
+On-disk columnar cache of parsed CDRs keyed by file content hash
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cdr_parser import PARSER_VERSION
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cdr_parse_cache')
+
+
+class CDRCache:
+    """
+    Columnar cache of parsed CDR frames
+    
+    Each entry is an uncompressed Feather (Arrow IPC) file holding the cleaned
+    DataFrame plus a JSON sidecar with the parser ``metadata``,
+    ``format_type`` and the null kind of each object column. Entries are keyed
+    by a hash of the raw file bytes and ``PARSER_VERSION``, so a parser change
+    never serves stale output. Uncompressed Feather reloads without a
+    decompression pass, but converting it back to pandas still copies.
+    
+    Requires ``pyarrow``; without it every lookup is a miss and stores are
+    skipped.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.enabled = feather is not None
+        if not self.enabled:
+            logger.warning("pyarrow not installed - CDR parse cache disabled")
+        else:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def key_for(file_path: str, block_size: int = 1 << 20) -> str:
+        """Hash the file contents together with the parser version"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"cdr-parser-v{PARSER_VERSION}".encode())
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + '.feather', base + '.json'
+    
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict, str]]:
+        """Return (df, metadata, format_type) for a cached key, or None"""
+        if not self.enabled:
+            return None
+        
+        data_path, meta_path = self._paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        
+        try:
+            with open(meta_path, 'r') as f:
+                info = json.load(f)
+            df = feather.read_table(data_path).to_pandas()
+            for column in info.get('dictionary_columns', []):
+                df[column] = df[column].astype(object)
+            
+            # Arrow nulls come back as None (or NaN from a category); restore
+            # each object column's original null so NaN and None round trip
+            for column, kind in info['null_kinds'].items():
+                values = df[column]
+                df[column] = values.where(values.notna(), np.nan if kind == 'nan' else None)
+            logger.info(f"Loaded {len(df)} records from parse cache ({key[:12]})")
+            return df, info['metadata'], info['format_type']
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {key[:12]}: {e}")
+            return None
+    
+    @staticmethod
+    def _null_kinds(df: pd.DataFrame) -> Dict[str, str]:
+        """Map each object column holding nulls to 'nan' or 'none', whichever it holds"""
+        kinds = {}
+        for column in df.columns[(df.dtypes == object).to_numpy()]:
+            values = df[column]
+            nulls = values[values.isna()]
+            if len(nulls):
+                kinds[column] = 'nan' if any(v is not None for v in nulls) else 'none'
+        return kinds
+    
+    @staticmethod
+    def _encode_repeated(table: 'pa.Table', max_ratio: float = 0.5) -> Tuple['pa.Table', List[str]]:
+        """
+        Dictionary-encode repetitive string/date columns
+        
+        Rebuilding a million Python str/date objects dominates reload time;
+        decoding a categorical back to object only copies references to its
+        few distinct values. Returns the new table and the encoded names.
+        """
+        encoded = []
+        for i, name in enumerate(table.column_names):
+            column = table.column(i)
+            if not (pa.types.is_string(column.type) or pa.types.is_date32(column.type)):
+                continue
+            dictionary = column.dictionary_encode()
+            distinct = sum(len(chunk.dictionary) for chunk in dictionary.chunks)
+            if distinct <= max_ratio * len(column):
+                table = table.set_column(i, name, dictionary)
+                encoded.append(name)
+        return table, encoded
+    
+    def store(self, key: str, df: pd.DataFrame, metadata: Dict, format_type: str) -> bool:
+        """Write a parsed frame to the cache; returns False if it could not be stored"""
+        if not self.enabled:
+            return False
+        
+        data_path, meta_path = self._paths(key)
+        temp_paths = []
+        try:
+            table, dictionary_columns = self._encode_repeated(pa.Table.from_pandas(df, preserve_index=True))
+            
+            # Write to uniquely named temp files and rename, so readers never see
+            # partial entries and sessions storing the same key never share a file
+            fd, tmp_data = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            os.close(fd)
+            temp_paths.append(tmp_data)
+            feather.write_feather(table, tmp_data, compression='uncompressed')
+            fd, tmp_meta = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            temp_paths.append(tmp_meta)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'metadata': metadata,
+                    'format_type': format_type,
+                    'dictionary_columns': dictionary_columns,
+                    'null_kinds': self._null_kinds(df),
+                }, f)
+            
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving parse cache entry: {e}")
+            for path in temp_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            return False
+    
+    def clear(self) -> int:
+        """Delete all cache entries; returns the number of files removed"""
+        removed = 0
+        if not os.path.isdir(self.cache_dir):
+            return removed
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(('.feather', '.json', '.tmp')):
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
@@ -4,31 +4,86 @@ Handles parsing of multiple CDR formats (Airtel, Jio) and data extraction
 """
 
 import pandas as pd
+import numpy as np
 import re
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional, Union
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever cleaning output changes so cached parses are invalidated
+PARSER_VERSION = '2'
+
+# Bytes sniffed from the start of a file for format, metadata and header row
+HEAD_BYTES = 64 * 1024
+
+# Default rows per chunk for streaming parses
+DEFAULT_CHUNKSIZE = 100_000
+
+# (start hour, end hour, label) buckets; 22:00-00:00 is the fallthrough
+TIME_PERIODS = [
+    (0, 6, 'Late Night (00:00-06:00)'),
+    (6, 12, 'Morning (06:00-12:00)'),
+    (12, 18, 'Afternoon (12:00-18:00)'),
+    (18, 22, 'Evening (18:00-22:00)'),
+]
+
+# Ordered (substrings, category) rules applied to the upper-cased call type
+AIRTEL_CALL_CATEGORIES = [
+    (('IN',), 'Incoming Call'),
+    (('OUT',), 'Outgoing Call'),
+    (('SMT', 'SMS'), 'SMS Received'),
+    (('SMO',), 'SMS Sent'),
+]
+
+JIO_CALL_CATEGORIES = [
+    (('A_IN',), 'Incoming Call'),
+    (('A_OUT',), 'Outgoing Call'),
+    (('SMSIN', 'P2P_SMSIN', 'A2P_SMSIN'), 'SMS Received'),
+    (('SMSOUT', 'P2AOUT'), 'SMS Sent'),
+]
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+CALL_CATEGORIES = ['Incoming Call', 'Outgoing Call', 'SMS Received', 'SMS Sent', 'Other', 'Unknown']
+
+# NaT as a datetime64[ns] / timedelta64[ns] integer
+NAT = np.iinfo(np.int64).min
+
 
 class CDRParser:
     """Parse and process Call Detail Records from multiple formats (Airtel, Jio)"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, cache=None, compact: bool = False):
         self.file_path = file_path
         self.raw_data = None
         self.parsed_data = None
         self.metadata = {}
         self.format_type = None  # 'airtel' or 'jio'
+        self.cache = cache  # optional cdr_cache.CDRCache
+        self.compact = compact  # opt-in compact dtype schema
+        self.memory_report = None
         
     def parse(self) -> pd.DataFrame:
         """Parse the CDR file and return structured data"""
         try:
-            # Read the file to extract metadata and detect format
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.key_for(self.file_path)
+                cached = self.cache.load(cache_key)
+                if cached is not None:
+                    self.parsed_data, self.metadata, self.format_type = cached
+                    if self.compact:
+                        self.parsed_data, self.memory_report = self.compact_dtypes(self.parsed_data)
+                    return self.parsed_data
+            
+            # Only the file head is needed to detect format and metadata
+            lines = self._read_head()
             
             # Detect format type
             self.format_type = self._detect_format(lines)
@@ -46,12 +101,94 @@ class CDRParser:
                 raise ValueError(f"Unsupported CDR format: {self.format_type}")
             
             logger.info(f"Successfully parsed {len(self.parsed_data)} records from {self.format_type.upper()} CDR")
+            
+            # Cache the canonical frame so compact and default sessions share entries
+            if cache_key is not None:
+                self.cache.store(cache_key, self.parsed_data, self.metadata, self.format_type)
+            
+            if self.compact:
+                self.parsed_data, self.memory_report = self.compact_dtypes(self.parsed_data)
+            
             return self.parsed_data
             
         except Exception as e:
             logger.error(f"Error parsing CDR file: {str(e)}")
             raise
     
+    def iter_chunks(self, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Stream the CDR file as cleaned chunks with bounded memory
+        
+        Format, metadata and header row are sniffed from the file head only;
+        the body is then read ``chunksize`` rows at a time and each chunk is
+        passed through the same cleaning as ``parse``. ``parsed_data`` is not
+        populated, so peak memory stays flat as the file grows.
+        
+        Args:
+            chunksize: Number of raw CSV rows per chunk
+        
+        Yields:
+            Cleaned DataFrame chunks
+        """
+        lines = self._read_head()
+        
+        self.format_type = self._detect_format(lines)
+        logger.info(f"Detected CDR format: {self.format_type.upper()} (streaming)")
+        self._extract_metadata(lines)
+        
+        if self.format_type == 'airtel':
+            header_row = self._find_header_row(lines, 'airtel')
+            clean = self._clean_airtel_data
+        elif self.format_type == 'jio':
+            header_row = self._find_header_row(lines, 'jio')
+            clean = self._clean_jio_data
+        else:
+            raise ValueError(f"Unsupported CDR format: {self.format_type}")
+        
+        total = 0
+        reader = pd.read_csv(
+            self.file_path,
+            skiprows=header_row,
+            encoding='utf-8',
+            on_bad_lines='skip',
+            chunksize=chunksize
+        )
+        with reader:
+            for chunk in reader:
+                chunk = clean(chunk)
+                if self.compact:
+                    chunk, _ = self.compact_dtypes(chunk)
+                if len(chunk) == 0:
+                    continue
+                total += len(chunk)
+                yield chunk
+        
+        logger.info(f"Streamed {total} records from {self.format_type.upper()} CDR")
+    
+    def _read_head(self, max_bytes: int = HEAD_BYTES) -> List[str]:
+        """Read whole lines from the start of the file, up to about max_bytes"""
+        lines = []
+        size = 0
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                lines.append(line)
+                size += len(line)
+                if size >= max_bytes:
+                    break
+        return lines
+    
+    @staticmethod
+    def _find_header_row(lines: List[str], format_type: str) -> int:
+        """Locate the column header row within the sniffed file head"""
+        for i, line in enumerate(lines):
+            if format_type == 'airtel' and 'Target No' in line and 'Call Type' in line:
+                return i
+            if format_type == 'jio' and 'Calling Party Telephone Number' in line:
+                return i
+        
+        label = 'Airtel' if format_type == 'airtel' else 'Jio'
+        raise ValueError(f"Could not find header row in {label} CDR file")
+    
     def _detect_format(self, lines: List[str]) -> str:
         """Detect CDR format type"""
         # Check for Airtel indicators
@@ -108,14 +245,7 @@ class CDRParser:
     def _parse_airtel(self, lines: List[str]) -> pd.DataFrame:
         """Parse Airtel format CDR"""
         # Find the header row
-        header_row = None
-        for i, line in enumerate(lines):
-            if 'Target No' in line and 'Call Type' in line:
-                header_row = i
-                break
-        
-        if header_row is None:
-            raise ValueError("Could not find header row in Airtel CDR file")
+        header_row = self._find_header_row(lines, 'airtel')
         
         # Read the actual data
         df = pd.read_csv(
@@ -132,14 +262,7 @@ class CDRParser:
     def _parse_jio(self, lines: List[str]) -> pd.DataFrame:
         """Parse Jio format CDR"""
         # Find the header row
-        header_row = None
-        for i, line in enumerate(lines):
-            if 'Calling Party Telephone Number' in line:
-                header_row = i
-                break
-        
-        if header_row is None:
-            raise ValueError("Could not find header row in Jio CDR file")
+        header_row = self._find_header_row(lines, 'jio')
         
         # Read the actual data
         df = pd.read_csv(
@@ -158,62 +281,38 @@ class CDRParser:
         df = df.copy()
         
         # Remove empty rows
-        df = df.dropna(how='all')
-        
-        # Parse datetime
-        df['Date'] = df['Date'].astype(str).str.strip().str.strip("'\"")
-        df['Time'] = df['Time'].astype(str).str.strip().str.strip("'\"")
+        df = self._drop_empty_rows(df, 'Date')
         
-        df['DateTime'] = pd.to_datetime(
-            df['Date'] + ' ' + df['Time'],
-            format='%d/%m/%Y %H:%M:%S',
-            errors='coerce'
+        # Parse datetime, with a date-only fallback for rows without a valid time
+        df['Date'], df['Time'], df['DateTime'] = self._parse_date_time(
+            df['Date'], df['Time'], lambda v: v.astype(str).str.strip().str.strip("'\"")
         )
         
-        # Fallback for rows without time
-        mask = df['DateTime'].isna()
-        if mask.any():
-            df.loc[mask, 'DateTime'] = pd.to_datetime(
-                df.loc[mask, 'Date'],
-                format='%d/%m/%Y',
-                errors='coerce'
-            )
-        
         # Drop rows with invalid datetime
-        initial_count = len(df)
-        df = df.dropna(subset=['DateTime'])
-        dropped = initial_count - len(df)
-        if dropped > 0:
-            logger.warning(f"Dropped {dropped} records due to invalid datetime")
+        df = self._drop_invalid_datetimes(df)
         
         # Extract temporal features
         df['Hour'] = df['DateTime'].dt.hour
-        df['DayOfWeek'] = df['DateTime'].dt.day_name()
-        df['Date_Only'] = df['DateTime'].dt.date
-        df['TimePeriod'] = df['Hour'].apply(self._classify_time_period)
+        day = df['DateTime'].dt.normalize()
+        df['DayOfWeek'] = self._map_unique(day, lambda v: v.dt.day_name()).astype(object)
+        df['Date_Only'] = self._map_unique(day, lambda v: v.dt.date)
+        df['TimePeriod'] = self._classify_time_periods(df['Hour'])
         
         # Parse duration
         df['Dur(s)'] = pd.to_numeric(df['Dur(s)'], errors='coerce').fillna(0).astype(int)
         
         # Parse coordinates
-        coords_first = df['First CGI Lat/Long'].apply(self._parse_coordinates)
-        df['First_Lat'] = coords_first.apply(lambda x: x[0] if x else None)
-        df['First_Long'] = coords_first.apply(lambda x: x[1] if x else None)
-        
-        coords_last = df['Last CGI Lat/Long'].apply(self._parse_coordinates)
-        df['Last_Lat'] = coords_last.apply(lambda x: x[0] if x else None)
-        df['Last_Long'] = coords_last.apply(lambda x: x[1] if x else None)
+        df['First_Lat'], df['First_Long'] = self._parse_coordinate_series(df['First CGI Lat/Long'])
+        df['Last_Lat'], df['Last_Long'] = self._parse_coordinate_series(df['Last CGI Lat/Long'])
         
         # Clean B Party number
-        df['B_Party_Clean'] = df['B Party No'].apply(self._clean_phone_number)
+        df['B_Party_Clean'] = self._clean_phone_numbers(df['B Party No'])
         
         # Classify call type
-        df['Call_Category'] = df['Call Type'].apply(self._classify_call_type)
+        df['Call_Category'] = self._classify_call_types(df['Call Type'], AIRTEL_CALL_CATEGORIES)
         
         # Add time flags
-        df['Is_Night'] = df['Hour'].apply(lambda x: 1 if (x >= 22 or x < 6) else 0)
-        df['Is_Day'] = df['Hour'].apply(lambda x: 1 if (6 <= x < 18) else 0)
-        df['Is_Evening'] = df['Hour'].apply(lambda x: 1 if (18 <= x < 22) else 0)
+        self._add_time_flags(df)
         
         # Standardize column names for universal access
         df['Call Type'] = df['Call Type']  # Already exists
@@ -225,39 +324,22 @@ class CDRParser:
         df = df.copy()
         
         # Remove empty rows
-        df = df.dropna(how='all')
-        
-        # Parse datetime - Jio format: DD/MM/YYYY HH:MM:SS
-        df['Call Date'] = df['Call Date'].astype(str).str.strip()
-        df['Call Time'] = df['Call Time'].astype(str).str.strip()
+        df = self._drop_empty_rows(df, 'Call Date')
         
-        df['DateTime'] = pd.to_datetime(
-            df['Call Date'] + ' ' + df['Call Time'],
-            format='%d/%m/%Y %H:%M:%S',
-            errors='coerce'
+        # Parse datetime - Jio format: DD/MM/YYYY HH:MM:SS, date-only fallback without a valid time
+        df['Call Date'], df['Call Time'], df['DateTime'] = self._parse_date_time(
+            df['Call Date'], df['Call Time'], lambda v: v.astype(str).str.strip()
         )
         
-        # Fallback for rows without time
-        mask = df['DateTime'].isna()
-        if mask.any():
-            df.loc[mask, 'DateTime'] = pd.to_datetime(
-                df.loc[mask, 'Call Date'],
-                format='%d/%m/%Y',
-                errors='coerce'
-            )
-        
         # Drop rows with invalid datetime
-        initial_count = len(df)
-        df = df.dropna(subset=['DateTime'])
-        dropped = initial_count - len(df)
-        if dropped > 0:
-            logger.warning(f"Dropped {dropped} records due to invalid datetime")
+        df = self._drop_invalid_datetimes(df)
         
         # Extract temporal features
         df['Hour'] = df['DateTime'].dt.hour
-        df['DayOfWeek'] = df['DateTime'].dt.day_name()
-        df['Date_Only'] = df['DateTime'].dt.date
-        df['TimePeriod'] = df['Hour'].apply(self._classify_time_period)
+        day = df['DateTime'].dt.normalize()
+        df['DayOfWeek'] = self._map_unique(day, lambda v: v.dt.day_name()).astype(object)
+        df['Date_Only'] = self._map_unique(day, lambda v: v.dt.date)
+        df['TimePeriod'] = self._classify_time_periods(df['Hour'])
         
         # Parse duration
         df['Dur(s)'] = pd.to_numeric(df['Call Duration'], errors='coerce').fillna(0).astype(int)
@@ -273,15 +355,13 @@ class CDRParser:
         df['Last CGI'] = df['Last Cell ID'].astype(str)
         
         # Clean B Party number - Jio uses "Called Party Telephone Number"
-        df['B_Party_Clean'] = df['Called Party Telephone Number'].apply(self._clean_phone_number)
+        df['B_Party_Clean'] = self._clean_phone_numbers(df['Called Party Telephone Number'])
         
         # Classify call type - Jio uses different naming
-        df['Call_Category'] = df['Call Type'].apply(self._classify_jio_call_type)
+        df['Call_Category'] = self._classify_call_types(df['Call Type'], JIO_CALL_CATEGORIES)
         
         # Add time flags
-        df['Is_Night'] = df['Hour'].apply(lambda x: 1 if (x >= 22 or x < 6) else 0)
-        df['Is_Day'] = df['Hour'].apply(lambda x: 1 if (6 <= x < 18) else 0)
-        df['Is_Evening'] = df['Hour'].apply(lambda x: 1 if (18 <= x < 22) else 0)
+        self._add_time_flags(df)
         
         # Standardize column names for universal access
         df['Call Type'] = df['Call Type']  # Keep original
@@ -291,6 +371,174 @@ class CDRParser:
         
         return df
     
+    @staticmethod
+    def _drop_empty_rows(df: pd.DataFrame, column: str) -> pd.DataFrame:
+        """df.dropna(how='all'), scanning only the rows where column is missing"""
+        missing = df[column].isna().to_numpy()
+        if not missing.any():
+            return df
+        empty = np.zeros(len(df), dtype=bool)
+        empty[missing] = df[missing].isna().all(axis=1).to_numpy()
+        return df[~empty] if empty.any() else df
+    
+    @staticmethod
+    def _drop_invalid_datetimes(df: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows whose DateTime did not parse, logging how many"""
+        invalid = df['DateTime'].isna().to_numpy()
+        if not invalid.any():
+            return df
+        logger.warning(f"Dropped {int(invalid.sum())} records due to invalid datetime")
+        return df[~invalid]
+    
+    @staticmethod
+    def _factorize(values: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+        """
+        Codes and distinct values of a column
+        
+        A missing value becomes a trailing distinct value, which the NA code
+        -1 indexes directly. (use_na_sentinel=False gives the same result but
+        hashes object columns about half as fast.)
+        """
+        codes, uniques = pd.factorize(values)
+        if len(codes) and codes.min() < 0:
+            uniques = uniques.insert(len(uniques), np.nan)
+        return codes, pd.Series(uniques)
+    
+    @staticmethod
+    def _map_unique(values: pd.Series, func) -> pd.Series:
+        """
+        Evaluate a vectorized transform once per distinct value
+        
+        CDR columns repeat heavily (24 hours, a few call types, thousands of
+        contacts and towers over millions of rows), so factorizing first and
+        broadcasting back with the codes keeps string work off the row count.
+        """
+        codes, uniques = CDRParser._factorize(values)
+        mapped = func(uniques)
+        if isinstance(mapped, tuple):
+            return tuple(pd.Series(m.to_numpy()[codes], index=values.index) for m in mapped)
+        return pd.Series(mapped.to_numpy()[codes], index=values.index)
+    
+    @staticmethod
+    def _parse_date_time(dates: pd.Series, times: pd.Series, strip) -> Tuple[pd.Series, pd.Series, pd.Series]:
+        """
+        Strip and parse DD/MM/YYYY dates and HH:MM:SS times, falling back to midnight
+        
+        Each column is factorized once; the distinct values are stripped and
+        parsed, and DateTime is assembled from the codes as int64 nanoseconds.
+        
+        Returns:
+            (stripped dates, stripped times, DateTime)
+        """
+        date_codes, date_values = CDRParser._factorize(dates)
+        time_codes, time_values = CDRParser._factorize(times)
+        date_values, time_values = strip(date_values), strip(time_values)
+        
+        day = pd.to_datetime(date_values, format='%d/%m/%Y', errors='coerce')
+        day = day.to_numpy(dtype='datetime64[ns]').view(np.int64)[date_codes]
+        clock = CDRParser._parse_clock(time_values)[time_codes]
+        stamps = np.where(day == NAT, NAT, day + np.where(clock == NAT, 0, clock))
+        return (pd.Series(date_values.to_numpy()[date_codes], index=dates.index),
+                pd.Series(time_values.to_numpy()[time_codes], index=times.index),
+                pd.Series(stamps.view('datetime64[ns]'), index=dates.index))
+    
+    @staticmethod
+    def _parse_clock(times: pd.Series) -> np.ndarray:
+        """
+        Nanoseconds since midnight of '%H:%M:%S' strings, NaT (as int64) where invalid
+        
+        Zero-padded HH:MM:SS, the usual CDR layout, is decoded digit by digit;
+        anything else goes through pd.to_datetime, so the result matches it.
+        """
+        clock = np.full(len(times), NAT, dtype=np.int64)
+        values = times.tolist()
+        padded = np.fromiter(map(len, values), dtype=np.int64, count=len(values)) == 8
+        if padded.any():
+            rows = np.flatnonzero(padded)
+            chars = np.array([values[i] for i in rows], dtype='U8').view(np.uint32).reshape(-1, 8).astype(np.int64)
+            digits = chars - ord('0')
+            is_digit = (digits >= 0) & (digits <= 9)
+            layout = is_digit[:, [0, 1, 3, 4, 6, 7]].all(axis=1) & (chars[:, 2] == ord(':')) & (chars[:, 5] == ord(':'))
+            hours, minutes, seconds = (digits[:, i] * 10 + digits[:, i + 1] for i in (0, 3, 6))
+            valid = layout & (hours < 24) & (minutes < 60) & (seconds < 60)
+            clock[rows[valid]] = ((hours * 60 + minutes) * 60 + seconds)[valid] * 10**9
+            padded[rows[~valid]] = False
+        
+        rest = ~padded
+        if rest.any():
+            parsed = pd.to_datetime(times[rest], format='%H:%M:%S', errors='coerce') - pd.Timestamp('1900-01-01')
+            clock[rest] = parsed.to_numpy(dtype='timedelta64[ns]').view(np.int64)
+        return clock
+    
+    @staticmethod
+    def _classify_time_periods(hours: pd.Series) -> pd.Series:
+        """Vectorized _classify_time_period over a whole Hour column"""
+        def classify(h):
+            conditions = [h.isna()] + [(h >= lo) & (h < hi) for lo, hi, _ in TIME_PERIODS]
+            choices = ['Unknown'] + [label for _, _, label in TIME_PERIODS]
+            return pd.Series(np.select(conditions, choices, default='Night (22:00-00:00)'), dtype=object)
+        
+        return CDRParser._map_unique(hours, classify)
+    
+    @staticmethod
+    def _parse_coordinate_series(coords: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """Vectorized _parse_coordinates, returning (lat, long) float columns"""
+        def parse(values):
+            text = values.astype('string')
+            parts = text.str.split('/', expand=True)
+            if parts.shape[1] < 2:
+                empty = pd.Series(np.nan, index=values.index)
+                return empty, empty
+            
+            lat = pd.to_numeric(parts[0].str.strip(), errors='coerce')
+            lon = pd.to_numeric(parts[1].str.strip(), errors='coerce')
+            
+            # Exactly one separator and both halves numeric, as in the scalar parser
+            valid = (text.str.count('/') == 1).fillna(False) & lat.notna() & lon.notna()
+            return lat.where(valid).astype(float), lon.where(valid).astype(float)
+        
+        return CDRParser._map_unique(coords, parse)
+    
+    @staticmethod
+    def _clean_phone_numbers(numbers: pd.Series) -> pd.Series:
+        """Vectorized _clean_phone_number over a whole column"""
+        def clean(values):
+            text = values.astype(str).str.strip().str.strip("'\"")
+            digits = text.str.replace(r'\D', '', regex=True)
+            
+            # Keep special identifiers (AD-, AH-, CP-, JD-, etc.)
+            special = text.str.contains('-', regex=False) & ~text.str.match(r'\d')
+            
+            cleaned = text.where(special | (digits.str.len() < 10), digits.str[-10:])
+            return cleaned.where(values.notna(), 'Unknown').astype(object)
+        
+        return CDRParser._map_unique(numbers, clean)
+    
+    @staticmethod
+    def _classify_call_types(call_types: pd.Series, categories: List[Tuple[Tuple[str, ...], str]]) -> pd.Series:
+        """Vectorized call type classification; first matching rule wins"""
+        def classify(values):
+            upper = values.astype(str).str.upper()
+            conditions = [values.isna().to_numpy()]
+            choices = ['Unknown']
+            for tokens, category in categories:
+                matched = np.zeros(len(upper), dtype=bool)
+                for token in tokens:
+                    matched |= upper.str.contains(token, regex=False).to_numpy(dtype=bool)
+                conditions.append(matched)
+                choices.append(category)
+            return pd.Series(np.select(conditions, choices, default='Other'), dtype=object)
+        
+        return CDRParser._map_unique(call_types, classify)
+    
+    @staticmethod
+    def _add_time_flags(df: pd.DataFrame) -> None:
+        """Add Is_Night / Is_Day / Is_Evening 0/1 flags from the Hour column"""
+        hour = df['Hour']
+        df['Is_Night'] = ((hour >= 22) | (hour < 6)).astype('int64')
+        df['Is_Day'] = ((hour >= 6) & (hour < 18)).astype('int64')
+        df['Is_Evening'] = ((hour >= 18) & (hour < 22)).astype('int64')
+    
     @staticmethod
     def _classify_time_period(hour: int) -> str:
         """Classify hour into time period"""
@@ -382,6 +630,87 @@ class CDRParser:
         else:
             return 'Other'
     
+    @staticmethod
+    def compact_dtypes(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Convert a parsed CDR frame to the compact dtype schema
+        
+        Low-cardinality labels and B_Party_Clean become categoricals, Date_Only
+        a categorical of dates, Hour int8, the Is_* flags uint8 and the
+        coordinates float32. Categories are fixed where the value set is known;
+        Call Type, B_Party_Clean and Date_Only take whatever values the frame
+        holds, so join compact chunks with ``concat_compact`` rather than
+        ``pd.concat``, which widens mismatched categoricals to object.
+        
+        Returns:
+            (compact frame, memory report with before/after bytes per column)
+        """
+        before = df.memory_usage(deep=True)
+        df = df.copy()
+        
+        fixed_categories = {
+            'DayOfWeek': pd.CategoricalDtype(DAYS_OF_WEEK, ordered=True),
+            'TimePeriod': pd.CategoricalDtype([label for _, _, label in TIME_PERIODS]
+                                              + ['Night (22:00-00:00)', 'Unknown'], ordered=True),
+            'Call_Category': pd.CategoricalDtype(CALL_CATEGORIES),
+        }
+        for column, dtype in fixed_categories.items():
+            if column in df.columns:
+                df[column] = df[column].astype(dtype)
+        
+        for column in ['Call Type', 'B_Party_Clean', 'Date_Only']:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        
+        if 'Hour' in df.columns:
+            df['Hour'] = df['Hour'].astype('int8')
+        for column in ['Is_Night', 'Is_Day', 'Is_Evening']:
+            if column in df.columns:
+                df[column] = df[column].astype('uint8')
+        for column in ['First_Lat', 'First_Long', 'Last_Lat', 'Last_Long']:
+            if column in df.columns:
+                df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+        
+        after = df.memory_usage(deep=True)
+        report = {
+            'before_bytes': int(before.sum()),
+            'after_bytes': int(after.sum()),
+            'columns': {
+                column: {'before_bytes': int(before[column]), 'after_bytes': int(after[column])}
+                for column in after.index if before[column] != after[column]
+            },
+        }
+        logger.info(
+            f"Compact schema: {report['before_bytes'] / 1e6:.1f} MB -> {report['after_bytes'] / 1e6:.1f} MB"
+        )
+        return df, report
+    
+    @staticmethod
+    def concat_compact(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenate compact frames, keeping categorical columns categorical
+        
+        Where the frames disagree on a column's categories, each is recoded to
+        the sorted union first, so the result matches compacting the whole.
+        """
+        frames = list(frames)
+        if len(frames) < 2:
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        
+        frames = [frame.copy(deep=False) for frame in frames]
+        for column in frames[0].columns:
+            dtypes = [frame[column].dtype if column in frame.columns else None for frame in frames]
+            if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+                continue
+            if all(dtype == dtypes[0] for dtype in dtypes[1:]):
+                continue
+            categories = dtypes[0].categories.append([dtype.categories for dtype in dtypes[1:]]).unique()
+            if not dtypes[0].ordered:
+                categories = categories.sort_values()
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+        return pd.concat(frames, ignore_index=True)
+    
     def get_summary(self) -> Dict:
         """Get summary statistics of the CDR"""
         if self.parsed_data is None:
@@ -403,3 +732,121 @@ class CDRParser:
             'night_activity': df['Is_Night'].sum(),
             'day_activity': df['Is_Day'].sum(),
         }
+
+
+def _parse_for_batch(file_path: str, compact: bool, cache=None) -> Tuple[pd.DataFrame, Dict, str, Optional[Dict]]:
+    """Process-pool worker: parse one CDR file (module level so it pickles)"""
+    parser = CDRParser(file_path, cache=cache, compact=compact)
+    df = parser.parse()
+    return df, parser.metadata, parser.format_type, parser.memory_report
+
+
+def _batch_memory_report(combined: pd.DataFrame, reports: List[Dict], tag_columns: List[str]) -> Dict:
+    """
+    Memory report of a compact batch frame
+    
+    "Before" is what the files would take in the default schema: the sum of
+    their per-file reports plus the source tags as plain strings.
+    """
+    after = combined.memory_usage(deep=True)
+    columns = {}
+    for report in reports:
+        for column, sizes in report['columns'].items():
+            entry = columns.setdefault(column, {'before_bytes': 0, 'after_bytes': int(after[column])})
+            entry['before_bytes'] += sizes['before_bytes']
+    for column in tag_columns:
+        columns[column] = {
+            'before_bytes': int(combined[column].astype(object).memory_usage(deep=True, index=False)),
+            'after_bytes': int(after[column]),
+        }
+    
+    before_bytes = sum(report['before_bytes'] for report in reports)
+    before_bytes += sum(columns[column]['before_bytes'] for column in tag_columns)
+    return {'before_bytes': before_bytes, 'after_bytes': int(after.sum()), 'columns': columns}
+
+
+def parse_cdr_batch(sources: Union[str, List[str]], max_workers: Optional[int] = None,
+                    compact: bool = False, cache=None) -> Tuple[pd.DataFrame, List[Tuple[str, str]], Optional[Dict]]:
+    """
+    Parse many Airtel/Jio CDR files in parallel into one tagged frame
+    
+    Each file is parsed in its own worker process, so throughput scales with
+    cores up to the number of files. Every record is tagged with
+    ``Source_File``, ``Target_Number`` and ``Operator``, so a single file
+    parsed here carries the same columns as a batch.
+    
+    Args:
+        sources: List of CDR file paths, or a directory of ``*.csv`` files
+        max_workers: Process count (default: one per CPU, capped at file count)
+        compact: Apply the compact dtype schema
+        cache: Optional CDRCache shared by the workers
+    
+    Returns:
+        (combined DataFrame, list of (file, error) for files that failed,
+        memory report of the combined frame when compact, else None)
+    """
+    if isinstance(sources, str) and os.path.isdir(sources):
+        paths = sorted(glob.glob(os.path.join(sources, '*.csv')))
+    elif isinstance(sources, str):
+        paths = [sources]
+    else:
+        paths = list(sources)
+    
+    if not paths:
+        return pd.DataFrame(), [], None
+    
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    results = {}
+    failures = []
+    
+    if workers == 1:
+        for path in paths:
+            try:
+                results[path] = _parse_for_batch(path, compact, cache)
+            except Exception as e:
+                failures.append((path, str(e)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(_parse_for_batch, path, compact, cache) for path in paths}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    failures.append((path, str(e)))
+    
+    for path, error in failures:
+        logger.error(f"Failed to parse {path}: {error}")
+    
+    frames = []
+    reports = []
+    for path in paths:
+        if path not in results:
+            continue
+        df, metadata, format_type, memory_report = results[path]
+        
+        target = metadata.get('target_number')
+        if target is None and 'Target No' in df.columns and len(df) > 0:
+            target = str(df['Target No'].iloc[0]).strip("'\"")
+        
+        df['Source_File'] = os.path.basename(path)
+        df['Target_Number'] = target or 'Unknown'
+        df['Operator'] = metadata.get('operator', (format_type or 'unknown').title())
+        frames.append(df)
+        reports.append(memory_report)
+    
+    if not frames:
+        return pd.DataFrame(), failures, None
+    
+    memory_report = None
+    if not compact:
+        combined = pd.concat(frames, ignore_index=True)
+    else:
+        # Categories differ per file; union them rather than re-encode the whole frame
+        tag_columns = ['Source_File', 'Target_Number', 'Operator']
+        combined = CDRParser.concat_compact(frames)
+        for column in tag_columns:
+            combined[column] = combined[column].astype('category')
+        memory_report = _batch_memory_report(combined, reports, tag_columns)
+    
+    logger.info(f"Batch parsed {len(combined)} records from {len(frames)}/{len(paths)} files using {workers} workers")
+    return combined, failures, memory_report
@@ -0,0 +1,174 @@
+"""
+Cell Tower Cache Module
+Persistent, write-batched cache of cell tower lookups backed by SQLite
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Returned by CellTowerCache.get for cells no provider knows (within the TTL)
+NEGATIVE = 'negative'
+
+
+def _flush_at_exit(ref: 'weakref.ref') -> None:
+    cache = ref()
+    if cache is not None:
+        cache.flush()
+
+
+class CellTowerCache:
+    """
+    SQLite-backed lookup cache with an in-process LRU in front
+    
+    - WAL journal mode, so concurrent Streamlit sessions (and processes) can
+      read while one writes without corrupting the store
+    - Writes are buffered and committed in batches instead of rewriting the
+      whole cache after every lookup
+    - Negative entries remember cells that no provider knows, for
+      ``negative_ttl`` seconds, so repeated misses stay off the network
+    
+    An existing ``cell_tower_cache.json`` next to the database is imported
+    the first time the database is created.
+    """
+    
+    def __init__(self, db_path: str = "cell_tower_cache.db", lru_size: int = 50_000,
+                 batch_size: int = 200, flush_interval: float = 5.0,
+                 negative_ttl: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.lru_size = lru_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.negative_ttl = negative_ttl
+        
+        self.lru = OrderedDict()
+        self.pending: List[Tuple] = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.RLock()
+        
+        is_new = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                key TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                found INTEGER NOT NULL,
+                updated REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+        
+        if is_new:
+            self._import_legacy_json(os.path.splitext(db_path)[0] + '.json')
+        
+        # Buffered writes still reach disk if the process exits between batches
+        atexit.register(_flush_at_exit, weakref.ref(self))
+    
+    def _import_legacy_json(self, json_path: str) -> None:
+        """Copy entries from the old JSON cache file, if present"""
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, 'r') as f:
+                legacy = json.load(f)
+            now = time.time()
+            rows = [(key, value[0], value[1], 1, now) for key, value in legacy.items()]
+            with self.lock:
+                self.conn.executemany("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.commit()
+            logger.info(f"Imported {len(rows)} entries from {json_path}")
+        except Exception as e:
+            logger.error(f"Error importing legacy cache {json_path}: {e}")
+    
+    def _remember_lru(self, key: str, value) -> None:
+        self.lru[key] = value
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+    
+    def get(self, key: str) -> Union[None, str, Tuple[float, float]]:
+        """
+        Look up a cache key
+        
+        Returns:
+            (lat, lon) for a hit, NEGATIVE for a fresh known-miss, None if
+            the key is not cached (or its negative entry expired)
+        """
+        with self.lock:
+            if key in self.lru:
+                value, expires = self.lru[key]
+                if expires is None or expires > time.time():
+                    self.lru.move_to_end(key)
+                    return value
+                del self.lru[key]
+                return None
+            
+            row = self.conn.execute(
+                "SELECT lat, lon, found, updated FROM lookups WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            lat, lon, found, updated = row
+            if found:
+                value, expires = (lat, lon), None
+            else:
+                value, expires = NEGATIVE, updated + self.negative_ttl
+                if expires <= time.time():
+                    return None
+            self._remember_lru(key, (value, expires))
+            return value
+    
+    def put(self, key: str, lat: float, lon: float) -> None:
+        """Cache a successful lookup"""
+        self._add(key, (lat, lon), None, (key, lat, lon, 1, time.time()))
+    
+    def put_negative(self, key: str) -> None:
+        """Cache that no provider knows this key"""
+        now = time.time()
+        self._add(key, NEGATIVE, now + self.negative_ttl, (key, None, None, 0, now))
+    
+    def _add(self, key: str, value, expires: Optional[float], row: Tuple) -> None:
+        with self.lock:
+            self._remember_lru(key, (value, expires))
+            self.pending.append(row)
+            if (len(self.pending) >= self.batch_size
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self.flush()
+    
+    def flush(self) -> None:
+        """Commit buffered writes in one transaction"""
+        with self.lock:
+            self.last_flush = time.monotonic()
+            if not self.pending or self.conn is None:
+                return
+            rows, self.pending = self.pending, []
+            try:
+                self.conn.executemany("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.commit()
+            except Exception as e:
+                logger.error(f"Error saving cache: {e}")
+    
+    def __len__(self) -> int:
+        self.flush()
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+    
+    def close(self) -> None:
+        """Flush pending writes and close the database"""
+        self.flush()
+        with self.lock:
+            self.conn.close()
+            self.conn = None
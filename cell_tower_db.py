@@ -4,14 +4,119 @@ Lookup cell tower locations from Cell ID using open-source databases
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
+import numpy as np
 import logging
-from typing import Optional, Tuple, Dict
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Tuple, Dict, Iterable
 import os
 
+from cell_tower_cache import CellTowerCache, NEGATIVE
+
+try:
+    import pyarrow as pa
+    # Arrow-backed strings run the .str ops of parse_cell_ids in C++ rather than per value
+    _STRINGS, _INTEGERS = pd.ArrowDtype(pa.string()), pd.ArrowDtype(pa.int64())
+except ImportError:
+    _STRINGS, _INTEGERS = object, 'int64'
+from cell_tower_index import OfflineCellIndex
+
 logger = logging.getLogger(__name__)
 
+# ASCII code -> hex digit value ('0'-'9', 'A'-'F', 'a'-'f')
+_HEX_DIGITS = np.zeros(128, dtype=np.int64)
+_HEX_DIGITS[48:58] = np.arange(10)
+_HEX_DIGITS[65:71] = _HEX_DIGITS[97:103] = np.arange(10, 16)
+
+# Provider endpoints; overridable per instance (e.g. a local stub server in tests)
+DEFAULT_ENDPOINTS = {
+    'mls': "https://location.services.mozilla.com/v1/geolocate?key=test",
+    'opencellid': "https://opencellid.org/cell/get",
+    'unwired': "https://us1.unwiredlabs.com/v2/process.php",
+}
+
+# (requests per second, burst capacity) per provider. Daily-quota providers
+# refill their documented quota over 24h and may burst up to the whole quota.
+PROVIDER_RATE_LIMITS = {
+    'mls': (10.0, 10),                    # fair use
+    'opencellid': (1000 / 86400, 1000),   # 1000/day free tier
+    'unwired': (100 / 86400, 100),        # 100/day free tier
+}
+
+# Longest a worker waits for a provider token before skipping that provider
+RATE_LIMIT_WAIT = 30.0
+
+# Components of a parsed cell ID, in parse_cell_id order
+CELL_ID_COMPONENTS = ['mcc', 'mnc', 'lac', 'cell_id']
+
+# Most decimal / hex digits an int64 always holds; longer parts use parse_cell_id
+MAX_DECIMAL_DIGITS = 18
+MAX_HEX_DIGITS = 15
+
+# Decimal MCC-MNC-LAC-CellID with any further hyphenated parts
+AIRTEL_CELL_ID = (
+    r'(?s)^(?P<mcc>[0-9]{1,18})-(?P<mnc>[0-9]{1,18})-(?P<lac>[0-9]{1,18})-(?P<cell_id>[0-9]{1,18})(?:-.*)?$'
+)
+
+# Jio is LTE-only; its MNCs under MCC 405
+JIO_MNCS = range(840, 875)
+
+
+def _hex_values(digits: pd.Series) -> np.ndarray:
+    """int64 values of hex digit strings, already validated and at most MAX_HEX_DIGITS long"""
+    if len(digits) == 0:
+        return np.empty(0, dtype=np.int64)
+    width = int(digits.str.len().max())
+    chars = digits.to_numpy(dtype=f'U{width}').view(np.uint32).reshape(len(digits), width)
+    number = np.zeros(len(digits), dtype=np.int64)
+    for column in chars.T:
+        # Shorter strings are NUL-padded at the end; those positions add no digit
+        number = np.where(column > 0, number * 16 + _HEX_DIGITS[column & 127], number)
+    return number
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to timeout seconds; False if none came"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else float('inf')
+            
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# Provider quotas are per client IP/key, not per session: every CellTowerDatabase
+# in the process (e.g. one per Streamlit session) draws from these buckets
+PROVIDER_LIMITERS = {
+    provider: TokenBucket(rate, capacity)
+    for provider, (rate, capacity) in PROVIDER_RATE_LIMITS.items()
+}
+
 
 class CellTowerDatabase:
     """
@@ -23,31 +128,60 @@ class CellTowerDatabase:
     3. Unwired Labs (https://unwiredlabs.com/) - Free tier available
     """
     
-    def __init__(self, cache_file: str = "cell_tower_cache.json"):
+    def __init__(self, cache_file: str = "cell_tower_cache.db", offline_index_dir: Optional[str] = None,
+                 endpoints: Optional[Dict[str, str]] = None, max_workers: int = 8,
+                 negative_ttl: float = 7 * 24 * 3600):
+        # SQLite store (see cell_tower_cache.py); imports an old cell_tower_cache.json
         self.cache_file = cache_file
-        self.cache = self._load_cache()
+        self.cache = CellTowerCache(cache_file, negative_ttl=negative_ttl)
+        
+        # One pooled HTTP session shared by every lookup thread
+        self.endpoints = dict(DEFAULT_ENDPOINTS, **(endpoints or {}))
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Shared process-wide buckets; replacing an entry only affects this instance
+        self.limiters = dict(PROVIDER_LIMITERS)
+        
+        # Offline OpenCelliD index (see cell_tower_index.py), checked before any API
+        self.offline_index = None
+        offline_index_dir = offline_index_dir or os.environ.get('CELL_TOWER_INDEX_DIR', 'cell_tower_index')
+        if os.path.exists(os.path.join(offline_index_dir, 'keys.npy')):
+            try:
+                self.offline_index = OfflineCellIndex(offline_index_dir)
+                logger.info(f"Loaded offline cell index with {len(self.offline_index):,} cells")
+            except Exception as e:
+                logger.error(f"Error loading offline cell index: {e}")
         
         # API keys (optional - set via environment or config)
         self.opencellid_key = os.environ.get('OPENCELLID_API_KEY', '')
         self.unwired_key = os.environ.get('UNWIRED_API_KEY', '')
     
-    def _load_cache(self) -> Dict:
-        """Load cached cell tower data"""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+    def _cached(self, cache_key: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+        """Return (hit, result); a fresh negative entry is a hit with result None"""
+        value = self.cache.get(cache_key)
+        if value is None:
+            return False, None
+        if value == NEGATIVE:
+            return True, None
+        return True, value
     
-    def _save_cache(self):
-        """Save cache to file"""
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
-        except Exception as e:
-            logger.error(f"Error saving cache: {e}")
+    def _remember(self, cache_key: str, lat: float, lon: float) -> None:
+        """Record a successful lookup; safe to call from lookup threads"""
+        self.cache.put(cache_key, lat, lon)
+    
+    def _remember_miss(self, cache_key: str) -> None:
+        """Record that a provider answered but does not know the cell"""
+        self.cache.put_negative(cache_key)
+    
+    def _acquire(self, provider: str) -> bool:
+        """Wait for a rate-limit token for provider"""
+        if self.limiters[provider].acquire(timeout=RATE_LIMIT_WAIT):
+            return True
+        logger.warning(f"Rate limit reached for {provider}, skipping")
+        return False
     
     def parse_cell_id(self, cell_id_str: str) -> Optional[Dict]:
         """
@@ -168,7 +302,122 @@ class CellTowerDatabase:
             logger.debug(f"Error parsing cell ID '{cell_id_str}': {e}")
         
         return None
-
+    
+    def parse_cell_ids(self, cell_ids) -> pd.DataFrame:
+        """
+        Vectorized parse_cell_id over a whole column
+        
+        Distinct values are decoded once with pandas string ops (see
+        _decode_cell_ids) and mapped back. The rare value outside the plain
+        layouts falls back to parse_cell_id, so results always match it.
+        
+        Args:
+            cell_ids: Series (or array-like) of cell ID strings
+        
+        Returns:
+            DataFrame aligned to cell_ids with nullable Int64 columns mcc,
+            mnc, lac, cell_id and a categorical 'radio' guess ('gsm' or
+            'lte'); all NA where the ID cannot be parsed
+        """
+        if not isinstance(cell_ids, pd.Series):
+            cell_ids = pd.Series(list(cell_ids), dtype=object)
+        
+        codes, uniques = pd.factorize(cell_ids)
+        decoded = self._decode_cell_ids(pd.Series(uniques, dtype=object))
+        
+        # NaN has code -1, which reindexes to an all-NA row
+        result = decoded.reindex(codes)
+        result.index = cell_ids.index
+        return result
+    
+    def _decode_cell_ids(self, raw: pd.Series) -> pd.DataFrame:
+        """Decode distinct cell ID values (RangeIndex) into one row each"""
+        n = len(raw)
+        values = np.zeros((n, len(CELL_ID_COMPONENTS)), dtype=np.int64)
+        parsed = np.zeros(n, dtype=bool)
+        hexed = np.zeros(n, dtype=bool)
+        fallback = [np.empty(0, dtype=np.int64)]
+        
+        def store(rows: np.ndarray, columns: list) -> None:
+            """Record parsed rows; columns are digit-string Series or numbers, in component order"""
+            for k, column in enumerate(columns):
+                if isinstance(column, pd.Series):
+                    column = column.astype(_INTEGERS).to_numpy(np.int64)
+                values[rows, k] = column
+            parsed[rows] = True
+        
+        text = raw if pd.api.types.infer_dtype(raw, skipna=False) == 'string' else raw.astype(str)
+        text = text.astype(_STRINGS).str.strip().str.replace("'", "", regex=False)
+        
+        # Format 1: Airtel hyphenated MCC-MNC-LAC-CellID; parts after the fourth are ignored
+        hyphenated = text.str.contains('-', regex=False).to_numpy(bool)
+        parts = text[hyphenated].str.extract(AIRTEL_CELL_ID)
+        plain = parts['mcc'].notna().to_numpy(bool)
+        store(parts.index[plain], [parts[name][plain] for name in CELL_ID_COMPONENTS])
+        # Signs, spaces or unicode digits may still satisfy int(); fewer than four parts never do
+        odd = text[hyphenated][~plain]
+        fallback.append(odd.index[odd.str.count('-').to_numpy(np.int64) >= 3])
+        
+        # Format 2: concatenated Jio (405) / other Indian (404) IDs, split by length
+        length = text.str.len().to_numpy(np.int64)
+        prefix = text.str[:3]
+        jio = (prefix == '405').to_numpy(bool)
+        concatenated = ~hyphenated & (length >= 10) & (jio | (prefix == '404').to_numpy(bool))
+        numeric = np.zeros(n, dtype=bool)
+        numeric[concatenated] = text[concatenated].str.fullmatch('[0-9]+').to_numpy(bool)
+        others = text[concatenated & ~numeric]
+        hex_like = others.str.fullmatch('[0-9a-fA-F]+').to_numpy(bool)
+        fallback.append(others.index[~hex_like])
+        
+        # The Jio MNC is 3 digits from 13 characters up; LAC and cell split the rest
+        mnc_end = np.where(jio & (length >= 13), 6, 5)
+        layouts = length * 2 + jio
+        
+        for layout in np.unique(layouts[numeric]).tolist():
+            size, code = layout // 2, 405 if layout % 2 else 404
+            group = text[numeric & (layouts == layout)]
+            start = 6 if code == 405 and size >= 13 else 5
+            mid = start + (size - start) // 2
+            if max(mid - start, size - mid) > MAX_DECIMAL_DIGITS:
+                fallback.append(group.index)
+            elif size <= MAX_DECIMAL_DIGITS:
+                # The whole ID fits an int64: one cast, then split by powers of ten
+                number = group.astype(_INTEGERS).to_numpy(np.int64)
+                cell_digits, rest_digits = 10 ** (size - mid), 10 ** (size - start)
+                store(group.index, [code, number // rest_digits % 10 ** (start - 3),
+                                    number % rest_digits // cell_digits, number % cell_digits])
+            else:
+                store(group.index, [code, group.str[3:start], group.str[start:mid], group.str[mid:]])
+        
+        # Hex LTE IDs (Jio only): upper bits TAC, lower 8 bits cell; hex never parses for 404
+        lte = others[hex_like & jio[others.index]]
+        for start in np.unique(mnc_end[lte.index]).tolist():
+            group = lte[mnc_end[lte.index] == start]
+            mnc = group.str[3:start]
+            group = group[mnc.str.fullmatch('[0-9]+').to_numpy(bool)]
+            if len(group) == 0:
+                continue
+            long = length[group.index] - start > MAX_HEX_DIGITS
+            fallback.append(group.index[long])
+            group = group[~long]
+            number = _hex_values(group.str[start:])
+            store(group.index, [405, group.str[3:start], (number >> 8) & 0xFFFF, number & 0xFF])
+            hexed[group.index] = True
+        
+        for i in np.concatenate(fallback):
+            result = self.parse_cell_id(raw.iloc[i])
+            if result and all(0 <= v < 2**63 for v in result.values()):
+                values[i] = [result[name] for name in CELL_ID_COMPONENTS]
+                parsed[i] = True
+        
+        decoded = pd.DataFrame({
+            name: pd.arrays.IntegerArray(values[:, k], ~parsed) for k, name in enumerate(CELL_ID_COMPONENTS)
+        })
+        # LTE for hex IDs, Jio, and cell IDs too wide for a 16-bit GSM CI
+        mcc, mnc, cell = values[:, 0], values[:, 1], values[:, 3]
+        lte = hexed | ((mcc == 405) & np.isin(mnc, JIO_MNCS)) | (cell > 0xFFFF)
+        decoded['radio'] = pd.Categorical.from_codes(np.where(parsed, lte, -1), categories=['gsm', 'lte'])
+        return decoded
     
     def lookup_opencellid(self, mcc: int, mnc: int, lac: int, cell_id: int) -> Optional[Tuple[float, float]]:
         """
@@ -181,11 +430,15 @@ class CellTowerDatabase:
             return None
         
         cache_key = f"opencellid_{mcc}_{mnc}_{lac}_{cell_id}"
-        if cache_key in self.cache:
-            return tuple(self.cache[cache_key])
+        hit, result = self._cached(cache_key)
+        if hit:
+            return result
+        
+        if not self._acquire('opencellid'):
+            return None
         
         try:
-            url = "https://opencellid.org/cell/get"
+            url = self.endpoints['opencellid']
             params = {
                 'key': self.opencellid_key,
                 'mcc': mcc,
@@ -195,15 +448,18 @@ class CellTowerDatabase:
                 'format': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if 'lat' in data and 'lon' in data:
                     lat, lon = float(data['lat']), float(data['lon'])
-                    self.cache[cache_key] = [lat, lon]
-                    self._save_cache()
+                    self._remember(cache_key, lat, lon)
                     return (lat, lon)
+                if data.get('code') == 1:  # "Cell not found"
+                    self._remember_miss(cache_key)
+            elif response.status_code == 404:
+                self._remember_miss(cache_key)
         except Exception as e:
             logger.error(f"OpenCelliD lookup error: {e}")
         
@@ -217,11 +473,15 @@ class CellTowerDatabase:
         Database: https://location.services.mozilla.com/
         """
         cache_key = f"mls_{mcc}_{mnc}_{lac}_{cell_id}"
-        if cache_key in self.cache:
-            return tuple(self.cache[cache_key])
+        hit, result = self._cached(cache_key)
+        if hit:
+            return result
+        
+        if not self._acquire('mls'):
+            return None
         
         try:
-            url = "https://location.services.mozilla.com/v1/geolocate?key=test"
+            url = self.endpoints['mls']
             
             payload = {
                 "cellTowers": [{
@@ -233,16 +493,17 @@ class CellTowerDatabase:
                 }]
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.session.post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if 'location' in data:
                     lat = data['location']['lat']
                     lon = data['location']['lng']
-                    self.cache[cache_key] = [lat, lon]
-                    self._save_cache()
+                    self._remember(cache_key, lat, lon)
                     return (lat, lon)
+            elif response.status_code == 404:  # notFound
+                self._remember_miss(cache_key)
         except Exception as e:
             logger.error(f"Mozilla MLS lookup error: {e}")
         
@@ -259,11 +520,15 @@ class CellTowerDatabase:
             return None
         
         cache_key = f"unwired_{mcc}_{mnc}_{lac}_{cell_id}"
-        if cache_key in self.cache:
-            return tuple(self.cache[cache_key])
+        hit, result = self._cached(cache_key)
+        if hit:
+            return result
+        
+        if not self._acquire('unwired'):
+            return None
         
         try:
-            url = "https://us1.unwiredlabs.com/v2/process.php"
+            url = self.endpoints['unwired']
             
             payload = {
                 "token": self.unwired_key,
@@ -277,33 +542,36 @@ class CellTowerDatabase:
                 "address": 1
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.session.post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get('status') == 'ok':
                     lat = data['lat']
                     lon = data['lon']
-                    self.cache[cache_key] = [lat, lon]
-                    self._save_cache()
+                    self._remember(cache_key, lat, lon)
                     return (lat, lon)
+                if 'no matches' in str(data.get('message', '')).lower():
+                    self._remember_miss(cache_key)
         except Exception as e:
             logger.error(f"Unwired Labs lookup error: {e}")
         
         return None
     
-    def lookup_cell_tower(self, cell_id_str: str) -> Optional[Tuple[float, float]]:
+    def lookup_cell_tower(self, cell_id_str: str, offline_checked: bool = False) -> Optional[Tuple[float, float]]:
         """
         Lookup cell tower location using all available databases
         
         Tries in order:
-        1. Cache
-        2. Mozilla MLS (free, no key)
-        3. OpenCelliD (if API key available)
-        4. Unwired Labs (if API key available)
+        1. Offline OpenCelliD index (if built)
+        2. Cache (including cells a provider recently reported unknown)
+        3. Mozilla MLS (free, no key)
+        4. OpenCelliD (if API key available)
+        5. Unwired Labs (if API key available)
         
         Args:
             cell_id_str: Cell ID string (e.g., "404-96-290-128686112")
+            offline_checked: The caller already missed this cell in the offline index
         
         Returns:
             (lat, lon) tuple or None
@@ -317,6 +585,12 @@ class CellTowerDatabase:
         lac = parsed['lac']
         cell_id = parsed['cell_id']
         
+        # Offline index needs no network and answers from local disk
+        if self.offline_index is not None and not offline_checked:
+            result = self.offline_index.lookup(mcc, mnc, lac, cell_id)
+            if result:
+                return result
+        
         # Try Mozilla MLS first (free, no key required)
         result = self.lookup_mozilla_mls(mcc, mnc, lac, cell_id)
         if result:
@@ -336,62 +610,152 @@ class CellTowerDatabase:
         
         return None
     
+    def lookup_cell_towers(self, cell_ids: Iterable[str], max_workers: Optional[int] = None,
+                           offline_checked: bool = False) -> Dict[str, Tuple[float, float]]:
+        """
+        Lookup many cells concurrently over the shared session
+        
+        None of the providers offers a per-cell batch endpoint (a multi-cell
+        request is triangulated into one position), so cells are fanned out
+        over a thread pool instead. Each provider's token bucket keeps the
+        pool within its quota. Pass ``offline_checked`` when the cells were
+        already looked up in the offline index, to skip probing it again.
+        
+        Returns:
+            {cell_id: (lat, lon)} for the cells that resolved
+        """
+        cell_ids = list(dict.fromkeys(cell_ids))
+        if not cell_ids:
+            return {}
+        
+        results = {}
+        workers = min(max_workers or self.max_workers, len(cell_ids))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results_iter = pool.map(partial(self.lookup_cell_tower, offline_checked=offline_checked), cell_ids)
+            for i, (cell_id, result) in enumerate(zip(cell_ids, results_iter)):
+                if i % 100 == 0:
+                    logger.info(f"Progress: {i}/{len(cell_ids)} cell towers processed...")
+                if result:
+                    results[cell_id] = result
+        self.cache.flush()
+        return results
+    
+    def resolve_cells(self, cells) -> pd.DataFrame:
+        """
+        Resolve distinct cell IDs to a small location table
+        
+        The offline index (if any) answers in one vectorized pass; only the
+        remaining cells go to the online providers, concurrently.
+        
+        Args:
+            cells: Iterable of cell ID strings (duplicates are ignored)
+        
+        Returns:
+            DataFrame indexed by cell ID with Lat, Long and Source columns
+        """
+        cells = pd.Index(pd.unique(pd.Series(list(cells), dtype=object).dropna()))
+        table = pd.DataFrame({
+            'Lat': np.full(len(cells), np.nan),
+            'Long': np.full(len(cells), np.nan),
+            'Source': pd.Series([None] * len(cells), dtype=object).to_numpy(),
+        }, index=cells)
+        
+        if len(cells) == 0:
+            return table
+        
+        if self.offline_index is not None:
+            # cells are already distinct and non-null, so decode them without factorizing again
+            parts = self._decode_cell_ids(pd.Series(cells, dtype=object))
+            has_parts = parts['mcc'].notna().to_numpy()
+            if has_parts.any():
+                parts = parts.loc[has_parts, CELL_ID_COMPONENTS].astype('int64')
+                lat, lon, found = self.offline_index.lookup_many(
+                    parts['mcc'], parts['mnc'], parts['lac'], parts['cell_id']
+                )
+                rows = np.flatnonzero(has_parts)[found]
+                table.iloc[rows, 0] = lat[found]
+                table.iloc[rows, 1] = lon[found]
+                table.iloc[rows, 2] = 'Offline Index'
+        
+        pending = table.index[table['Source'].isna()]
+        logger.info(f"Looking up {len(pending)} of {len(cells)} cell towers online...")
+        online = self.lookup_cell_towers(pending, offline_checked=self.offline_index is not None)
+        for cell_id, (lat, lon) in online.items():
+            table.loc[cell_id, ['Lat', 'Long', 'Source']] = [lat, lon, 'Database']
+        
+        return table
+    
     def enrich_cdr_with_cell_towers(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Enrich CDR dataframe with cell tower locations
         
         Adds columns:
-        - Cell_Tower_Lat
-        - Cell_Tower_Long
-        - Cell_Tower_Source (which database provided the data)
+        - Cell_Tower_Lat / Cell_Tower_Long / Cell_Tower_Source (first cell)
+        - Last_Cell_Tower_Lat / Last_Cell_Tower_Long / Last_Cell_Tower_Source
+        
+        Distinct cells from both columns are resolved once into a lookup
+        table, which is then mapped onto every row in a single vectorized
+        pass per column.
         
         Supports both:
-        - Airtel format: 'First CGI' column
-        - Jio format: 'First Cell ID' column
+        - Airtel format: 'First CGI' / 'Last CGI' columns
+        - Jio format: 'First Cell ID' / 'Last Cell ID' columns
         """
         df = df.copy()
         
-        # Initialize new columns
-        df['Cell_Tower_Lat'] = None
-        df['Cell_Tower_Long'] = None
-        df['Cell_Tower_Source'] = None
+        # Determine which columns to use
+        targets = []
+        for prefix, candidates in [('Cell_Tower', ['First CGI', 'First Cell ID']),
+                                   ('Last_Cell_Tower', ['Last CGI', 'Last Cell ID'])]:
+            column = next((c for c in candidates if c in df.columns), None)
+            if column:
+                targets.append((prefix, column))
         
-        # Determine which column to use
-        cell_column = None
-        if 'First CGI' in df.columns:
-            cell_column = 'First CGI'
-        elif 'First Cell ID' in df.columns:
-            cell_column = 'First Cell ID'
-        
-        if cell_column:
-            unique_cells = df[cell_column].dropna().unique()
-            
-            logger.info(f"Looking up {len(unique_cells)} unique cell towers from '{cell_column}' column...")
-            
-            successful_lookups = 0
-            for i, cell_id in enumerate(unique_cells):
-                if i % 10 == 0:
-                    logger.info(f"Progress: {i}/{len(unique_cells)} cell towers processed...")
-                
-                result = self.lookup_cell_tower(cell_id)
-                
-                if result:
-                    lat, lon = result
-                    mask = df[cell_column] == cell_id
-                    df.loc[mask, 'Cell_Tower_Lat'] = lat
-                    df.loc[mask, 'Cell_Tower_Long'] = lon
-                    df.loc[mask, 'Cell_Tower_Source'] = 'Database'
-                    successful_lookups += 1
-            
-            logger.info(f"Successfully looked up {successful_lookups}/{len(unique_cells)} cell towers")
-        else:
+        if not targets:
             logger.warning("No cell ID column found (expected 'First CGI' or 'First Cell ID')")
+            for prefix in ['Cell_Tower', 'Last_Cell_Tower']:
+                df[f'{prefix}_Lat'] = np.nan
+                df[f'{prefix}_Long'] = np.nan
+                df[f'{prefix}_Source'] = None
+            return df
+        
+        table = self.resolve_cells(
+            pd.concat([pd.Series(df[column].unique()) for _, column in targets])
+        )
+        
+        # Row positions into the table; -1 (unknown) lands on the trailing empty row
+        lat = np.append(table['Lat'].to_numpy(dtype=float), np.nan)
+        lon = np.append(table['Long'].to_numpy(dtype=float), np.nan)
+        source = np.append(table['Source'].to_numpy(dtype=object), None)
+        
+        for prefix, column in targets:
+            positions = table.index.get_indexer(df[column])
+            df[f'{prefix}_Lat'] = lat[positions]
+            df[f'{prefix}_Long'] = lon[positions]
+            df[f'{prefix}_Source'] = source[positions]
+        
+        successful = int(table['Source'].notna().sum())
+        logger.info(f"Successfully looked up {successful}/{len(table)} cell towers")
         
         return df
     
+    def close(self) -> None:
+        """Flush buffered cache writes and release the HTTP session"""
+        self.cache.close()
+        self.session.close()
+    
     def get_database_info(self) -> Dict:
         """Get information about available databases"""
         return {
+            'offline_index': {
+                'name': 'Offline OpenCelliD Index',
+                'url': 'https://opencellid.org/downloads.php',
+                'api_key_required': False,
+                'free': True,
+                'rate_limit': 'Unlimited (local)',
+                'coverage': f"{len(self.offline_index):,} cells" if self.offline_index is not None else 'Not built',
+                'status': 'Available' if self.offline_index is not None else 'Run cell_tower_index.py to build'
+            },
             'mozilla_mls': {
                 'name': 'Mozilla Location Service',
                 'url': 'https://location.services.mozilla.com/',
@@ -0,0 +1,210 @@
+"""
+Offline Cell Tower Index Module
+Local, network-free cell tower lookup built from an OpenCelliD CSV dump
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bit widths of the packed (mcc, mnc, lac, cell) key. LAC/TAC are 16-bit in
+# 3GPP; 28 bits covers GSM CI, UMTS RNC+CI and LTE ECI. NR cells (36-bit NCI)
+# do not fit, and small NCIs would collide with LTE ECIs, so every NR row is
+# skipped at import time.
+MCC_BITS = 10
+MNC_BITS = 10
+LAC_BITS = 16
+CELL_BITS = 28
+
+OPENCELLID_COLUMNS = [
+    'radio', 'mcc', 'net', 'area', 'cell', 'unit', 'lon', 'lat', 'range',
+    'samples', 'changeable', 'created', 'updated', 'averageSignal'
+]
+
+
+def pack_cell_keys(mcc, mnc, lac, cell) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack (mcc, mnc, lac, cell) into sortable uint64 keys
+    
+    Accepts scalars or array-likes. Returns (keys, valid) where ``valid``
+    marks components that fit the key layout; invalid keys are 0.
+    """
+    mcc = np.asarray(mcc, dtype=np.int64)
+    mnc = np.asarray(mnc, dtype=np.int64)
+    lac = np.asarray(lac, dtype=np.int64)
+    cell = np.asarray(cell, dtype=np.int64)
+    
+    valid = (
+        (mcc >= 0) & (mcc < 1 << MCC_BITS)
+        & (mnc >= 0) & (mnc < 1 << MNC_BITS)
+        & (lac >= 0) & (lac < 1 << LAC_BITS)
+        & (cell >= 0) & (cell < 1 << CELL_BITS)
+    )
+    
+    keys = mcc.astype(np.uint64)
+    keys = (keys << np.uint64(MNC_BITS)) | mnc.astype(np.uint64)
+    keys = (keys << np.uint64(LAC_BITS)) | lac.astype(np.uint64)
+    keys = (keys << np.uint64(CELL_BITS)) | cell.astype(np.uint64)
+    return np.where(valid, keys, np.uint64(0)), valid
+
+
+class OfflineCellIndex:
+    """
+    Sorted, memory-mapped cell tower index
+    
+    The index is a directory of ``.npy`` arrays (packed keys, lat, lon,
+    range) sorted by key. Lookups are a vectorized ``np.searchsorted`` over
+    the memory-mapped key array, so millions of cells resolve per second
+    without any network access, and only touched pages are read from disk.
+    
+    Build it once from the OpenCelliD ``cell_towers.csv`` dump:
+        OfflineCellIndex.build('cell_towers.csv.gz', 'cell_index/')
+    """
+    
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.keys = np.load(os.path.join(index_dir, 'keys.npy'), mmap_mode='r')
+        self.lat = np.load(os.path.join(index_dir, 'lat.npy'), mmap_mode='r')
+        self.lon = np.load(os.path.join(index_dir, 'lon.npy'), mmap_mode='r')
+        self.range = np.load(os.path.join(index_dir, 'range.npy'), mmap_mode='r')
+        
+        info_path = os.path.join(index_dir, 'info.json')
+        self.info = {}
+        if os.path.exists(info_path):
+            with open(info_path, 'r') as f:
+                self.info = json.load(f)
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    @classmethod
+    def build(cls, csv_path: str, index_dir: str, mcc_filter: Optional[list] = None,
+              chunksize: int = 2_000_000) -> 'OfflineCellIndex':
+        """
+        Import an OpenCelliD-format CSV dump into a new index directory
+        
+        Args:
+            csv_path: Path to the dump (plain or .gz); header row optional
+            index_dir: Output directory (created if missing)
+            mcc_filter: Optional list of MCCs to keep, e.g. [404, 405] for India
+            chunksize: Rows read per chunk while importing
+        
+        Returns:
+            The opened index
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        
+        first = pd.read_csv(csv_path, nrows=1, header=None)
+        has_header = str(first.iloc[0, 0]).strip().lower() == 'radio'
+        
+        reader = pd.read_csv(
+            csv_path,
+            header=0 if has_header else None,
+            names=None if has_header else OPENCELLID_COLUMNS,
+            usecols=['radio', 'mcc', 'net', 'area', 'cell', 'lon', 'lat', 'range', 'updated'],
+            dtype={'radio': 'str', 'mcc': 'int64', 'net': 'int64', 'area': 'int64', 'cell': 'int64',
+                   'lon': 'float64', 'lat': 'float64', 'range': 'float64', 'updated': 'float64'},
+            chunksize=chunksize
+        )
+        
+        parts = {'keys': [], 'lat': [], 'lon': [], 'range': [], 'updated': []}
+        total = skipped = 0
+        with reader:
+            for chunk in reader:
+                total += len(chunk)
+                if mcc_filter is not None:
+                    chunk = chunk[chunk['mcc'].isin(mcc_filter)]
+                
+                keys, valid = pack_cell_keys(chunk['mcc'], chunk['net'], chunk['area'], chunk['cell'])
+                valid &= chunk['radio'].str.strip().str.upper().ne('NR').to_numpy()
+                skipped += int((~valid).sum())
+                
+                parts['keys'].append(keys[valid])
+                parts['lat'].append(chunk['lat'].to_numpy(np.float64)[valid])
+                parts['lon'].append(chunk['lon'].to_numpy(np.float64)[valid])
+                parts['range'].append(chunk['range'].fillna(0).clip(0, 2**31 - 1).to_numpy(np.int32)[valid])
+                parts['updated'].append(chunk['updated'].fillna(0).to_numpy(np.int64)[valid])
+        
+        arrays = {name: np.concatenate(values) if values else np.array([]) for name, values in parts.items()}
+        
+        # Sort by key, newest record last, then keep the last row per key
+        order = np.lexsort((arrays['updated'], arrays['keys']))
+        keys = arrays['keys'][order].astype(np.uint64)
+        last_of_key = np.ones(len(keys), dtype=bool)
+        last_of_key[:-1] = keys[1:] != keys[:-1]
+        keep = order[last_of_key]
+        
+        np.save(os.path.join(index_dir, 'keys.npy'), keys[last_of_key])
+        np.save(os.path.join(index_dir, 'lat.npy'), arrays['lat'][keep])
+        np.save(os.path.join(index_dir, 'lon.npy'), arrays['lon'][keep])
+        np.save(os.path.join(index_dir, 'range.npy'), arrays['range'][keep])
+        
+        info = {
+            'source': os.path.basename(csv_path),
+            'rows_read': total,
+            'rows_skipped': skipped,
+            'cells': int(last_of_key.sum()),
+        }
+        with open(os.path.join(index_dir, 'info.json'), 'w') as f:
+            json.dump(info, f)
+        
+        logger.info(f"Built offline cell index with {info['cells']:,} cells "
+                    f"({skipped:,} rows skipped) from {csv_path}")
+        return cls(index_dir)
+    
+    def lookup_many(self, mcc, mnc, lac, cell) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized lookup
+        
+        Returns:
+            (lat, lon, found) arrays; lat/lon are NaN where not found
+        """
+        keys, valid = pack_cell_keys(mcc, mnc, lac, cell)
+        keys = np.atleast_1d(keys)
+        valid = np.atleast_1d(valid)
+        
+        if len(self.keys) == 0:
+            found = np.zeros(len(keys), dtype=bool)
+        else:
+            pos = np.searchsorted(self.keys, keys)
+            pos = np.minimum(pos, len(self.keys) - 1)
+            found = valid & (self.keys[pos] == keys)
+        
+        lat = np.full(len(keys), np.nan)
+        lon = np.full(len(keys), np.nan)
+        if found.any():
+            lat[found] = self.lat[pos[found]]
+            lon[found] = self.lon[pos[found]]
+        return lat, lon, found
+    
+    def lookup(self, mcc: int, mnc: int, lac: int, cell_id: int) -> Optional[Tuple[float, float]]:
+        """Lookup a single cell; returns (lat, lon) or None"""
+        lat, lon, found = self.lookup_many(mcc, mnc, lac, cell_id)
+        if found[0]:
+            return (float(lat[0]), float(lon[0]))
+        return None
+    
+    def get_info(self) -> Dict:
+        """Summary of the imported dump"""
+        return dict(self.info, cells=len(self))
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description="Build an offline cell tower index from an OpenCelliD CSV dump")
+    parser.add_argument('csv_path', help="OpenCelliD cell_towers.csv(.gz) or per-MCC dump")
+    parser.add_argument('index_dir', help="Output directory for the index")
+    parser.add_argument('--mcc', type=int, nargs='*', help="Only keep these MCCs (e.g. 404 405)")
+    args = parser.parse_args()
+    
+    index = OfflineCellIndex.build(args.csv_path, args.index_dir, mcc_filter=args.mcc)
+    print(json.dumps(index.get_info(), indent=2))
@@ -3,28 +3,853 @@ Location Analyzer Module
 Location intelligence and movement pattern analysis
 """
 
+import heapq
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from math import radians, sin, cos, sqrt, asin
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Great-circle distance in km between coordinates given in degrees
+    
+    Arguments broadcast like NumPy arrays, so this covers point-to-point,
+    point-to-many and element-wise pairs of equal-length arrays. NaN
+    coordinates give NaN distances.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def track_distances(lat, lon) -> np.ndarray:
+    """Distance in km between each consecutive pair of points of a track (length n - 1)"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    if len(lat) < 2:
+        return np.empty(0)
+    cos_lat = np.cos(lat)
+    a = np.sin(np.diff(lat) / 2) ** 2 + cos_lat[:-1] * cos_lat[1:] * np.sin(np.diff(lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_matrix(lat1, lon1, lat2=None, lon2=None, chunk_size: int = 1024) -> np.ndarray:
+    """
+    All-pairs distance in km between two point sets (or one set and itself)
+    
+    Rows are computed chunk_size at a time, so temporaries stay at
+    chunk_size x len(lat2) regardless of the size of the first set.
+    """
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))
+    if lat2 is None:
+        lat2, lon2 = lat1, lon1
+    else:
+        lat2 = np.radians(np.asarray(lat2, dtype=np.float64))
+        lon2 = np.radians(np.asarray(lon2, dtype=np.float64))
+    
+    cos_lat2 = np.cos(lat2)
+    out = np.empty((len(lat1), len(lat2)))
+    for start in range(0, len(lat1), chunk_size):
+        rows = slice(start, start + chunk_size)
+        a = np.sin((lat2 - lat1[rows, None]) / 2) ** 2
+        a += np.cos(lat1[rows, None]) * cos_lat2 * np.sin((lon2 - lon1[rows, None]) / 2) ** 2
+        np.minimum(a, 1.0, out=a)
+        out[rows] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    return out
+
+
+def _as_ns(times) -> np.ndarray:
+    """Nanoseconds since the epoch as int64, from datetimes (or integer nanoseconds)"""
+    times = np.asarray(times)
+    if times.dtype.kind not in 'Mi':
+        times = pd.to_datetime(times).to_numpy()
+    return times.astype('datetime64[ns]').view(np.int64)
+
+
+def major_movement_indices(lat, lon, times=None, min_distance_km: float = 5.0,
+                           min_interval=None, max_speed_kmh: float = None) -> np.ndarray:
+    """
+    Positions of the points that are major movements along a time-ordered track
+    
+    The first located point is kept, then each point more than
+    min_distance_km from the last kept point. With times, a point must also
+    come at least min_interval (anything pd.Timedelta accepts) after the last
+    kept point, and is skipped as implausible if reaching it from there
+    implies more than max_speed_kmh. Points without coordinates are skipped.
+    
+    Each point depends on the last kept one, so this is a scan, but a reduced
+    one: the cumulative path length bounds the straight-line distance, so
+    points that cannot be far enough yet are skipped with a binary search.
+    The next few candidates are tested one by one and the rest in growing
+    NumPy blocks, and runs of consecutive movements are taken whole, so
+    both dense and sparse tracks take few Python steps.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    if (min_interval is not None or max_speed_kmh is not None) and times is None:
+        raise ValueError("min_interval and max_speed_kmh need times")
+    
+    located = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    if len(located) == 0:
+        return located
+    ns = np.zeros(len(located), dtype=np.int64) if times is None else _as_ns(times)[located]
+    if np.any(np.diff(ns) < 0):
+        raise ValueError("times must be sorted ascending")
+    min_gap = 0 if min_interval is None else pd.Timedelta(min_interval).value
+    max_speed = None if max_speed_kmh is None else max_speed_kmh / 3.6e12  # km per ns
+    
+    rad_lat, rad_lon = np.radians(lat[located]), np.radians(lon[located])
+    cos_lat = np.cos(rad_lat)
+    # Path length up to each point; a point is never further than the path to it
+    steps = track_distances(lat[located], lon[located])
+    path = np.concatenate([[0.0], np.cumsum(steps)])
+    # Runs where every step is itself a movement are kept whole without a Python step per point
+    step_ok = steps > min_distance_km
+    step_ok &= np.diff(ns) >= min_gap
+    if max_speed is not None:
+        step_ok &= steps <= max_speed * np.diff(ns)
+    step_breaks = np.flatnonzero(~step_ok) + 1
+    reach = min_distance_km - 1e-9 * (1 + min_distance_km)
+    
+    def is_movement(i: int, j: int) -> bool:
+        a = (sin((rad_lat[j] - rad_lat[i]) / 2) ** 2
+             + cos_lat[i] * cos_lat[j] * sin((rad_lon[j] - rad_lon[i]) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0)))
+        return distance > min_distance_km and (max_speed is None or distance <= max_speed * (ns[j] - ns[i]))
+    
+    n, last, probes = len(located), 0, 8
+    
+    def probe(start: int) -> Optional[int]:
+        """First of the next few points from start that is a movement, else None"""
+        for j in range(start, min(n, start + probes)):
+            if is_movement(last, j):
+                return j
+        return None
+    
+    kept = [0]
+    while True:
+        if last + 1 < n and step_ok[last]:
+            run_end = int(step_breaks[np.searchsorted(step_breaks, last + 1)]) \
+                if step_breaks.size and step_breaks[-1] > last else n
+            kept.extend(range(last + 1, run_end))
+            last = run_end - 1
+            continue
+        
+        # Jump past the points that cannot qualify yet, probe a few, then scan in blocks
+        start = max(last + 1, int(path.searchsorted(path[last] + reach, side='right')),
+                    int(ns.searchsorted(ns[last] + min_gap, side='left')))
+        found = probe(start)
+        if found is None:
+            start += probes
+            block = 64
+            while start < n:
+                stop = min(n, start + block)
+                a = np.sin((rad_lat[start:stop] - rad_lat[last]) / 2) ** 2
+                a += cos_lat[last] * cos_lat[start:stop] * np.sin((rad_lon[start:stop] - rad_lon[last]) / 2) ** 2
+                distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+                ok = distance > min_distance_km
+                if max_speed is not None:
+                    ok &= distance <= max_speed * (ns[start:stop] - ns[last])
+                hit = int(np.argmax(ok))
+                if ok[hit]:
+                    found = start + hit
+                    break
+                start, block = stop, block * 2
+        
+        if found is None:
+            break
+        kept.append(found)
+        last = found
+    
+    return located[np.asarray(kept)]
+
+
+def segment_track(times, lat, lon, places=None, radius_km: float = 1.0,
+                  min_duration='15min') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split a time-ordered track into stays and the trips between them
+    
+    Consecutive points at the same place form a run; without places, a run
+    lasts while points stay within radius_km of its first point (see
+    major_movement_indices). Runs lasting at least min_duration are stays,
+    and the points between two consecutive stays are a trip. Points without
+    coordinates are ignored.
+    
+    Returns:
+        (stays, trips). stays: arrive, depart, dwell, lat, lon (centroid),
+        place (its label, or the stay number without places), records,
+        first, last (positions of its first and last point).
+        trips: from_stay, to_stay, depart, arrive, duration, distance_km
+        (centroid to centroid), path_km (along the points), speed_kmh,
+        records (points in between)
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    located = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    ns = _as_ns(times)[located]
+    if np.any(np.diff(ns) < 0):
+        raise ValueError("times must be sorted ascending")
+    lat, lon = lat[located], lon[located]
+    
+    if places is not None:
+        places = np.asarray(places)[located]
+        starts = np.flatnonzero(np.concatenate([[True], places[1:] != places[:-1]])) if len(places) else located
+    else:
+        starts = major_movement_indices(lat, lon, min_distance_km=radius_km)
+    ends = np.append(starts[1:], len(lat))[:len(starts)] - 1
+    records = ends - starts + 1
+    run_lat = np.add.reduceat(lat, starts) / records if len(starts) else np.empty(0)
+    run_lon = np.add.reduceat(lon, starts) / records if len(starts) else np.empty(0)
+    
+    stay = ns[ends] - ns[starts] >= pd.Timedelta(min_duration).value
+    starts, ends, records, run_lat, run_lon = starts[stay], ends[stay], records[stay], run_lat[stay], run_lon[stay]
+    stays = pd.DataFrame({
+        'arrive': ns[starts].astype('datetime64[ns]'),
+        'depart': ns[ends].astype('datetime64[ns]'),
+        'dwell': (ns[ends] - ns[starts]).astype('timedelta64[ns]'),
+        'lat': run_lat,
+        'lon': run_lon,
+        'place': places[starts] if places is not None else np.arange(len(starts)),
+        'records': records,
+        'first': located[starts],
+        'last': located[ends],
+    })
+    
+    path = np.concatenate([[0.0], np.cumsum(track_distances(lat, lon))])
+    leave, reach = ends[:-1], starts[1:]
+    duration = ns[reach] - ns[leave]
+    distance = haversine_km(run_lat[:-1], run_lon[:-1], run_lat[1:], run_lon[1:])
+    hours = duration / 3.6e12
+    trips = pd.DataFrame({
+        'from_stay': np.arange(len(leave)),
+        'to_stay': np.arange(1, len(leave) + 1),
+        'depart': ns[leave].astype('datetime64[ns]'),
+        'arrive': ns[reach].astype('datetime64[ns]'),
+        'duration': duration.astype('timedelta64[ns]'),
+        'distance_km': distance,
+        'path_km': path[reach] - path[leave],
+        'speed_kmh': np.divide(distance, hours, out=np.full(len(hours), np.nan), where=hours > 0),
+        'records': reach - leave - 1,
+    })
+    return stays, trips
+
+
+def _concat_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)]) without the loop"""
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = starts - np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.repeat(shift, lengths) + np.arange(total)
+
+
+def _connected_components(n: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Component label (its smallest member) of each of n nodes joined by edges (i, j)"""
+    labels = np.arange(n)
+    while True:
+        # Hook each edge's larger root under the smaller, then flatten the trees
+        low = np.minimum(labels[i], labels[j])
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[i], low)
+        np.minimum.at(hooked, labels[j], low)
+        while True:
+            flat = hooked[hooked]
+            if np.array_equal(flat, hooked):
+                break
+            hooked = flat
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def dbscan_towers(index: 'SpatialIndex', eps_km: float, min_records: int) -> np.ndarray:
+    """
+    DBSCAN over the towers of a SpatialIndex, weighting each tower by its records
+    
+    A tower is a core point when the towers within eps_km (itself included)
+    hold at least min_records records. Core towers within eps_km of each
+    other share a region; other towers join the region of their nearest
+    core tower within eps_km, or are noise.
+    
+    Returns:
+        Region label per tower, -1 for noise, numbered from the region with
+        the most records down
+    """
+    i, j, distance = index.neighbor_pairs(eps_km)
+    weight = index.tower_records
+    nearby = weight + np.bincount(i, weights=weight[j], minlength=len(index)) \
+        + np.bincount(j, weights=weight[i], minlength=len(index))
+    core = nearby >= min_records
+    
+    both = core[i] & core[j]
+    labels = np.where(core, _connected_components(len(index), i[both], j[both]), -1)
+    
+    # Border towers take the label of their nearest core neighbour
+    border = np.concatenate([j[core[i] & ~core[j]], i[core[j] & ~core[i]]])
+    via = np.concatenate([i[core[i] & ~core[j]], j[core[j] & ~core[i]]])
+    gap = np.concatenate([distance[core[i] & ~core[j]], distance[core[j] & ~core[i]]])
+    order = np.lexsort((gap, border))
+    first = order[np.unique(border[order], return_index=True)[1]]
+    labels[border[first]] = labels[via[first]]
+    
+    regions, labels[labels >= 0] = np.unique(labels[labels >= 0], return_inverse=True)
+    records = np.bincount(labels[labels >= 0], weights=weight[labels >= 0], minlength=len(regions))
+    rank = np.empty(len(regions), dtype=np.int64)
+    rank[np.argsort(-records, kind='stable')] = np.arange(len(regions))
+    labels[labels >= 0] = rank[labels[labels >= 0]]
+    return labels
+
+
+def simplify_track(lat, lon, tolerance_km: float = 0.0, max_points: int = None) -> np.ndarray:
+    """
+    Positions of the points kept by Douglas-Peucker simplification of a track
+    
+    Top-down: starting from the end points, the point furthest from the
+    kept polyline is added, largest deviation first, until every dropped
+    point is within tolerance_km of it or max_points are kept. Deviations
+    are measured to the chord segment on a local equirectangular plane.
+    Points must have coordinates.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = len(lat)
+    if n <= 2 or (max_points is not None and max_points <= 2):
+        return np.unique([0, n - 1]) if n else np.empty(0, dtype=np.int64)
+    
+    y = lat * KM_PER_DEGREE
+    x = lon * KM_PER_DEGREE * np.cos(np.radians(np.median(lat)))
+    
+    def furthest(a: int, b: int) -> Tuple[float, int]:
+        dx, dy = x[b] - x[a], y[b] - y[a]
+        px, py = x[a + 1:b] - x[a], y[a + 1:b] - y[a]
+        length = dx * dx + dy * dy
+        t = np.clip((px * dx + py * dy) / length, 0, 1) if length > 0 else 0.0
+        deviation = np.hypot(px - t * dx, py - t * dy)
+        # Towers repeat, so ties are common; splitting at the middle one keeps the work near n log n
+        ties = np.flatnonzero(deviation == deviation.max())
+        k = int(ties[np.searchsorted(ties, (b - a) // 2 - 1).clip(max=len(ties) - 1)])
+        return float(deviation[k]), a + 1 + k
+    
+    kept = [0, n - 1]
+    deviation, k = furthest(0, n - 1)
+    heap = [(-deviation, 0, n - 1, k)]
+    limit = n if max_points is None else max_points
+    while heap and len(kept) < limit:
+        deviation, a, b, k = heapq.heappop(heap)
+        if -deviation <= tolerance_km:
+            break
+        kept.append(k)
+        for start, stop in ((a, k), (k, b)):
+            if stop - start > 1:
+                deviation, split = furthest(start, stop)
+                heapq.heappush(heap, (-deviation, start, stop, split))
+    return np.sort(np.asarray(kept))
+
+
+def decimate_frames(times, max_frames: int) -> np.ndarray:
+    """
+    Positions of at most max_frames points spread evenly in time over a sorted track
+    
+    The time span is cut into equal bins and the first point of each
+    non-empty bin is kept; the first and last times are always present.
+    """
+    ns = _as_ns(times)
+    if len(ns) <= max_frames:
+        return np.arange(len(ns))
+    span = max(int(ns[-1] - ns[0]), 1)
+    bins = np.floor((ns - ns[0]) / span * (max_frames - 1)).astype(np.int64)
+    return np.flatnonzero(np.diff(bins, prepend=-1) != 0)
+
+
+def zoom_tolerance_km(zoom: float, lat: float, pixels: float = 2.0) -> float:
+    """Ground distance in km of a few screen pixels at a web-map zoom level and latitude"""
+    return pixels * 156.543034 * np.cos(np.radians(lat)) / 2 ** zoom
+
+
+def track_level_of_detail(times, lat, lon, max_points: int = 2000, max_frames: int = 200,
+                          zoom: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (path positions, frame positions) to draw a long sorted track
+    
+    The path is simplified with simplify_track to at most max_points, and,
+    given a map zoom, no finer than a couple of pixels at that zoom. Frames
+    for an animation are decimate_frames(times, max_frames). Both index the
+    input, so the full-resolution track stays available.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    tolerance = 0.0 if zoom is None or len(lat) == 0 else zoom_tolerance_km(zoom, float(np.median(lat)))
+    return simplify_track(lat, lon, tolerance, max_points), decimate_frames(times, max_frames)
+
+
+def find_colocations(frames: Dict[str, pd.DataFrame], radius_km: float = 0.5, window='15min',
+                     merge_gap=None) -> pd.DataFrame:
+    """
+    Meetings between targets: times two of them were on the same or nearby towers
+    
+    Records of two targets match when their towers are within radius_km and
+    their times within window of each other. Each target's records are first
+    collapsed to presences (one per tower and window-long time slot), and
+    presences are bucketed by (time slot, grid cell), so only presences in
+    the same or adjacent buckets are compared. The cost grows with the
+    presences and matches, not with the product of the frames. Matches of a
+    pair of targets less than merge_gap (default: window) apart are merged
+    into one meeting.
+    
+    Args:
+        frames: Parsed CDR frame per target name
+        radius_km: Furthest apart two towers count as the same place
+        window: Furthest apart two records count as the same time
+        merge_gap: Largest gap inside one meeting
+    
+    Returns:
+        One row per meeting, earliest first: target_a, target_b, start, end,
+        duration, lat, lon (mean midpoint of the matched towers), distance_km
+        (closest matched towers), matches (matched presence pairs)
+    """
+    columns = ['target_a', 'target_b', 'start', 'end', 'duration', 'lat', 'lon', 'distance_km', 'matches']
+    names = list(frames)
+    window_ns = pd.Timedelta(window).value
+    gap_ns = window_ns if merge_gap is None else pd.Timedelta(merge_gap).value
+    
+    targets, lats, lons, times = [], [], [], []
+    for number, name in enumerate(names):
+        df = frames[name]
+        lat = df['First_Lat'].to_numpy(dtype=np.float64)
+        lon = df['First_Long'].to_numpy(dtype=np.float64)
+        located = np.isfinite(lat) & np.isfinite(lon)
+        targets.append(np.full(located.sum(), number))
+        lats.append(lat[located])
+        lons.append(lon[located])
+        times.append(_as_ns(df['DateTime'].to_numpy())[located])
+    target, ns = np.concatenate(targets), np.concatenate(times)
+    if len(np.unique(target)) < 2:
+        return pd.DataFrame(columns=columns)
+    
+    # Presences: one per target, tower and time slot
+    tower, towers = pd.factorize(np.concatenate(lats) + 1j * np.concatenate(lons))
+    slot = (ns - ns.min()) // window_ns
+    presence_key = (target * len(towers) + tower) * (int(slot.max()) + 1) + slot
+    order = np.lexsort((ns, presence_key))
+    starts = np.flatnonzero(np.diff(presence_key[order], prepend=-1) != 0)
+    ends = np.append(starts[1:], len(order)) - 1
+    p_target, p_tower, p_slot = target[order[starts]], tower[order[starts]], slot[order[starts]]
+    p_first, p_last = ns[order[starts]], ns[order[ends]]
+    tower_lat, tower_lon = towers.real, towers.imag
+    
+    # Same or next time slot, same or adjacent grid cell (half of the neighbourhood, so each pair once)
+    rows, cols = _neighbor_cells(tower_lat[p_tower], tower_lon[p_tower], radius_km)
+    height, width = int(rows.max()) + 3, int(cols.max()) + 3
+    keys = (p_slot * height + rows + 1) * width + cols + 1
+    later = height * width
+    offsets = [0, 1, width - 1, width, width + 1] + \
+        [later + dr * width + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+    i, j = _bucket_pairs(keys, offsets)
+    
+    i, j = i[p_target[i] != p_target[j]], j[p_target[i] != p_target[j]]
+    distance = haversine_km(tower_lat[p_tower[i]], tower_lon[p_tower[i]], tower_lat[p_tower[j]], tower_lon[p_tower[j]])
+    apart = np.maximum(p_first[i], p_first[j]) - np.minimum(p_last[i], p_last[j])
+    match = (distance <= radius_km) & (apart <= window_ns)
+    i, j, distance = i[match], j[match], distance[match]
+    if len(i) == 0:
+        return pd.DataFrame(columns=columns)
+    
+    matches = pd.DataFrame({
+        'a': np.minimum(p_target[i], p_target[j]),
+        'b': np.maximum(p_target[i], p_target[j]),
+        'start': np.minimum(p_first[i], p_first[j]),
+        'end': np.maximum(p_last[i], p_last[j]),
+        'lat': (tower_lat[p_tower[i]] + tower_lat[p_tower[j]]) / 2,
+        'lon': (tower_lon[p_tower[i]] + tower_lon[p_tower[j]]) / 2,
+        'distance_km': distance,
+    }).sort_values(['a', 'b', 'start'], kind='stable')
+    
+    # A new meeting starts when a match begins after everything so far for the pair, plus the gap
+    pair = [matches['a'], matches['b']]
+    reached = matches.groupby(pair)['end'].cummax().groupby(pair).shift()
+    meeting = (reached.isna() | (matches['start'] > reached + gap_ns)).cumsum()
+    meetings = matches.groupby(meeting).agg(
+        a=('a', 'first'), b=('b', 'first'), start=('start', 'min'), end=('end', 'max'),
+        lat=('lat', 'mean'), lon=('lon', 'mean'), distance_km=('distance_km', 'min'), matches=('a', 'size'))
+    
+    labels = np.asarray(names, dtype=object)
+    result = pd.DataFrame({
+        'target_a': labels[meetings['a'].to_numpy()],
+        'target_b': labels[meetings['b'].to_numpy()],
+        'start': meetings['start'].to_numpy().astype('datetime64[ns]'),
+        'end': meetings['end'].to_numpy().astype('datetime64[ns]'),
+        'duration': (meetings['end'] - meetings['start']).to_numpy().astype('timedelta64[ns]'),
+        'lat': meetings['lat'].to_numpy(),
+        'lon': meetings['lon'].to_numpy(),
+        'distance_km': meetings['distance_km'].to_numpy(),
+        'matches': meetings['matches'].to_numpy(),
+    })
+    return result.sort_values(['start', 'target_a', 'target_b'], kind='stable').reset_index(drop=True)
+
+
+def _neighbor_cells(lat: np.ndarray, lon: np.ndarray, size_km: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Grid (row, column) from 0 of each point, for cells at least size_km across
+    
+    Columns are sized at the highest latitude present, so points within
+    size_km of each other are always in the same or adjacent cells.
+    """
+    cell_lat = size_km / KM_PER_DEGREE
+    widest = min(np.abs(lat).max() + cell_lat, 89.0)
+    rows = np.floor(lat / cell_lat).astype(np.int64)
+    cols = np.floor(lon / (cell_lat / np.cos(np.radians(widest)))).astype(np.int64)
+    return rows - rows.min(), cols - cols.min()
+
+
+def _bucket_pairs(keys: np.ndarray, offsets) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs (i, j) of items whose bucket keys differ by one of the offsets
+    
+    Offset 0 pairs items within a bucket, each pair once with i before j in
+    key order; any other offset pairs every item of a bucket with every item
+    of the bucket offset keys above it. Each product is expanded in one step.
+    """
+    order = np.argsort(keys, kind='stable')
+    cells, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    
+    lefts, rights = [], []
+    for offset in offsets:
+        position = np.minimum(np.searchsorted(cells, cells + offset), len(cells) - 1)
+        found = np.flatnonzero(cells[position] == cells + offset)
+        a, b = found, position[found]
+        sizes = counts[a] * counts[b]
+        pair = np.repeat(np.arange(len(a)), sizes)
+        local = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        left = starts[a][pair] + local // counts[b][pair]
+        right = starts[b][pair] + local % counts[b][pair]
+        if offset == 0:
+            keep = left < right
+            left, right = left[keep], right[keep]
+        lefts.append(order[left])
+        rights.append(order[right])
+    return np.concatenate(lefts), np.concatenate(rights)
+
+
+class SpatialIndex:
+    """
+    Grid index over the distinct tower coordinates of a set of records
+    
+    Towers are bucketed into square cells about cell_km on a side, keyed
+    row-major like a geohash, and records are grouped by tower. A radius or
+    bounding-box query reads one sorted key range per grid row and tests
+    only the towers found there; nearest-tower queries widen the radius
+    until enough towers are found, then fall back to a scan of all towers.
+    
+    Attributes:
+        tower_lat, tower_lon: coordinates of each distinct tower
+        tower_records: number of records at each tower
+        record_towers: tower of each input record (-1 without coordinates)
+        bounds: (min_lat, min_lon, max_lat, max_lon) of the towers, None if empty
+    """
+    
+    def __init__(self, lat, lon, cell_km: float = 1.0):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self.cell_km = cell_km
+        
+        # Distinct towers, hashing each (lat, lon) pair as one complex number
+        codes, towers = pd.factorize(lat + 1j * lon)
+        self.tower_lat = towers.real.copy()
+        self.tower_lon = towers.imag.copy()
+        self.record_towers = codes
+        self.tower_records = np.bincount(codes[codes >= 0], minlength=len(towers))
+        self.bounds = (self.tower_lat.min(), self.tower_lon.min(), self.tower_lat.max(), self.tower_lon.max()) \
+            if len(towers) else None
+        
+        # Records grouped by tower (CSR layout)
+        located = np.flatnonzero(codes >= 0)
+        self._tower_rows = located[np.argsort(codes[located], kind='stable')]
+        self._tower_starts = np.concatenate([[0], np.cumsum(self.tower_records)])
+        
+        # Cells are cell_km tall everywhere and cell_km wide at the median latitude
+        self._cell_lat = cell_km / KM_PER_DEGREE
+        ref_lat = np.median(self.tower_lat) if len(towers) else 0.0
+        self._cell_lon = self._cell_lat / max(np.cos(np.radians(ref_lat)), 0.1)
+        rows = np.floor(self.tower_lat / self._cell_lat).astype(np.int64)
+        cols = np.floor(self.tower_lon / self._cell_lon).astype(np.int64)
+        self._row_range = (rows.min(), rows.max()) if len(towers) else (0, -1)
+        self._col_range = (cols.min(), cols.max()) if len(towers) else (0, -1)
+        self._width = self._col_range[1] - self._col_range[0] + 1
+        keys = self._keys(rows, cols)
+        self._cell_towers = np.argsort(keys, kind='stable')
+        self._cell_keys = keys[self._cell_towers]
+    
+    def __len__(self) -> int:
+        return len(self.tower_lat)
+    
+    def _keys(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        return (rows - self._row_range[0]) * self._width + (cols - self._col_range[0])
+    
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Towers in the grid cells overlapping a bounding box"""
+        row_lo = max(int(np.floor(min_lat / self._cell_lat)), self._row_range[0])
+        row_hi = min(int(np.floor(max_lat / self._cell_lat)), self._row_range[1])
+        col_lo = max(int(np.floor(min_lon / self._cell_lon)), self._col_range[0])
+        col_hi = min(int(np.floor(max_lon / self._cell_lon)), self._col_range[1])
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.empty(0, dtype=np.int64)
+        
+        rows = np.arange(row_lo, row_hi + 1)
+        starts = np.searchsorted(self._cell_keys, self._keys(rows, col_lo), side='left')
+        stops = np.searchsorted(self._cell_keys, self._keys(rows, col_hi), side='right')
+        return self._cell_towers[_concat_ranges(starts, stops)]
+    
+    def towers_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Towers inside a bounding box (edges included)"""
+        towers = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lat, lon = self.tower_lat[towers], self.tower_lon[towers]
+        return np.sort(towers[(lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)])
+    
+    def towers_within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(towers, distances in km) within radius_km of a point, nearest first"""
+        dlat = radius_km / KM_PER_DEGREE
+        edge_lat = min(abs(lat) + dlat, 90.0)
+        dlon = 360.0 if edge_lat >= 89.9 else radius_km / (KM_PER_DEGREE * np.cos(np.radians(edge_lat)))
+        towers = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        distance = haversine_km(lat, lon, self.tower_lat[towers], self.tower_lon[towers])
+        inside = distance <= radius_km
+        towers, distance = towers[inside], distance[inside]
+        order = np.argsort(distance, kind='stable')
+        return towers[order], distance[order]
+    
+    def nearest_towers(self, lat: float, lon: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(towers, distances in km) of the k towers nearest to a point"""
+        if len(self):
+            # Past the far corner of the towers' bounding box, widening no longer pays
+            min_lat, min_lon, max_lat, max_lon = self.bounds
+            reach = haversine_km(lat, lon, [min_lat, min_lat, max_lat, max_lat],
+                                 [min_lon, max_lon, min_lon, max_lon]).max()
+            radius = self.cell_km
+            while radius < reach:
+                towers, distance = self.towers_within(lat, lon, radius)
+                if len(towers) >= k:
+                    return towers[:k], distance[:k]
+                radius *= 2
+        
+        distance = haversine_km(lat, lon, self.tower_lat, self.tower_lon)
+        towers = np.argsort(distance, kind='stable')[:k]
+        return towers, distance[towers]
+    
+    def records_at(self, towers: np.ndarray) -> np.ndarray:
+        """Positions of the records at the given towers, in input order"""
+        towers = np.asarray(towers, dtype=np.int64)
+        rows = self._tower_rows[_concat_ranges(self._tower_starts[towers], self._tower_starts[towers + 1])]
+        return np.sort(rows)
+    
+    def records_within(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Positions of the records within radius_km of a point"""
+        return self.records_at(self.towers_within(lat, lon, radius_km)[0])
+    
+    def records_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Positions of the records inside a bounding box"""
+        return self.records_at(self.towers_in_bbox(min_lat, min_lon, max_lat, max_lon))
+    
+    def neighbor_pairs(self, radius_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every pair of towers within radius_km of each other, as (i, j, distance) with i < j
+        
+        Towers are bucketed into cells at least radius_km across at every
+        latitude present, so only towers in the same or adjacent cells are
+        compared, all at once.
+        """
+        if len(self) < 2:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        rows, cols = _neighbor_cells(self.tower_lat, self.tower_lon, radius_km)
+        # One spare column each side, so a neighbouring column never wraps into the next row
+        width = cols.max() + 2
+        keys = rows * width + cols + 1
+        i, j = _bucket_pairs(keys, (0, 1, width - 1, width, width + 1))
+        distance = haversine_km(self.tower_lat[i], self.tower_lon[i], self.tower_lat[j], self.tower_lon[j])
+        near = distance <= radius_km
+        i, j = np.minimum(i[near], j[near]), np.maximum(i[near], j[near])
+        return i, j, distance[near]
+    
+    def cell_summary(self) -> pd.DataFrame:
+        """Records per grid cell with their record-weighted centroid, busiest first"""
+        cells, towers = np.unique(self._cell_keys, return_inverse=True)
+        weights = self.tower_records[self._cell_towers]
+        records = np.bincount(towers, weights=weights)
+        summary = pd.DataFrame({
+            'cell': cells,
+            'lat': np.bincount(towers, weights=weights * self.tower_lat[self._cell_towers]) / records,
+            'lon': np.bincount(towers, weights=weights * self.tower_lon[self._cell_towers]) / records,
+            'towers': np.bincount(towers),
+            'records': records.astype(np.int64),
+        })
+        return summary.sort_values('records', ascending=False, kind='stable').reset_index(drop=True)
+
 
 class LocationAnalyzer:
-    """Analyze location patterns from tower data"""
+    """
+    Analyze location patterns from tower data
+    
+    The frame is shared with the caller (and the other analyzers), not
+    copied, and is never modified here; treat it as read-only.
+    """
     
     def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
-        # Filter valid coordinates
-        self.valid_df = df.dropna(subset=['First_Lat', 'First_Long'])
+        self.df = df
+        self._valid_rows = None
+        self._spatial_indexes = {}
+        self._stay_regions = {}
+        self._tower_regions = {}
+    
+    @property
+    def valid_rows(self) -> np.ndarray:
+        """Positions of records with coordinates, found on first use"""
+        if self._valid_rows is None:
+            self._valid_rows = np.flatnonzero(
+                self.df['First_Lat'].notna().to_numpy() & self.df['First_Long'].notna().to_numpy())
+        return self._valid_rows
+    
+    @property
+    def valid_df(self) -> pd.DataFrame:
+        """Records with coordinates (sliced on access, not kept)"""
+        return self.df.iloc[self.valid_rows]
+    
+    def _valid_columns(self, columns: List[str]) -> pd.DataFrame:
+        """Just the given columns of the records with coordinates"""
+        return self.df.iloc[self.valid_rows, self.df.columns.get_indexer(columns)]
+    
+    def get_spatial_index(self, cell_km: float = 1.0) -> SpatialIndex:
+        """Grid index over the frame's tower coordinates, built once per cell size"""
+        if cell_km not in self._spatial_indexes:
+            self._spatial_indexes[cell_km] = SpatialIndex(
+                self.df['First_Lat'].to_numpy(), self.df['First_Long'].to_numpy(), cell_km)
+        return self._spatial_indexes[cell_km]
+    
+    def get_records_within(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Row positions (for df.iloc) of the records within radius_km of a point"""
+        return self.get_spatial_index().records_within(lat, lon, radius_km)
+    
+    def get_records_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Row positions (for df.iloc) of the records inside a bounding box"""
+        return self.get_spatial_index().records_in_bbox(min_lat, min_lon, max_lat, max_lon)
+    
+    def get_nearest_towers(self, lat: float, lon: float, k: int = 5) -> pd.DataFrame:
+        """The k towers nearest to a point, with distance and record count"""
+        index = self.get_spatial_index()
+        towers, distance = index.nearest_towers(lat, lon, k)
+        return pd.DataFrame({
+            'lat': index.tower_lat[towers],
+            'lon': index.tower_lon[towers],
+            'distance_km': distance,
+            'records': index.tower_records[towers],
+        })
+    
+    def _region_labels(self, eps_km: float, min_records: int) -> np.ndarray:
+        """Stay region of each tower of the spatial index (-1 outside every region)"""
+        key = (eps_km, min_records)
+        if key not in self._tower_regions:
+            self._tower_regions[key] = dbscan_towers(self.get_spatial_index(), eps_km, min_records)
+        return self._tower_regions[key]
+    
+    def get_stay_regions(self, eps_km: float = 0.5, min_records: int = 20, max_gap='8h') -> pd.DataFrame:
+        """
+        Regions the target stays in: density clusters of nearby towers
+        
+        Towers are clustered with dbscan_towers (eps_km, min_records). Dwell
+        time adds up the gaps between consecutive located records that are
+        both in the region, skipping gaps longer than max_gap. The shares
+        are the fractions of the region's records at night, day and evening.
+        
+        Returns:
+            One row per region, most records first: region, lat, lon
+            (record-weighted centroid), radius_km (to the furthest tower),
+            towers, records, first_seen, last_seen, days, dwell_hours,
+            night_share, day_share, evening_share
+        """
+        key = (eps_km, min_records, max_gap)
+        if key in self._stay_regions:
+            return self._stay_regions[key]
+        
+        index = self.get_spatial_index()
+        tower_labels = self._region_labels(eps_km, min_records)
+        count = int(tower_labels.max()) + 1 if len(tower_labels) else 0
+        
+        towers = np.flatnonzero(tower_labels >= 0)
+        tower_region = tower_labels[towers]
+        weight = index.tower_records[towers]
+        records = np.bincount(tower_region, weights=weight, minlength=count)
+        lat = np.bincount(tower_region, weights=weight * index.tower_lat[towers], minlength=count) / records
+        lon = np.bincount(tower_region, weights=weight * index.tower_lon[towers], minlength=count) / records
+        radius = np.zeros(count)
+        np.maximum.at(radius, tower_region, haversine_km(lat[tower_region], lon[tower_region],
+                                                         index.tower_lat[towers], index.tower_lon[towers]))
+        
+        # Located records in time order, with their region (-1 outside every region)
+        rows = self.valid_rows
+        ns = self.df['DateTime'].to_numpy()[rows].astype('datetime64[ns]').view(np.int64)
+        order = np.argsort(ns, kind='stable')
+        rows, ns = rows[order], ns[order]
+        labels = tower_labels[index.record_towers[rows]]
+        
+        gaps = np.diff(ns)
+        stayed = (labels[1:] == labels[:-1]) & (labels[1:] >= 0) & (gaps <= pd.Timedelta(max_gap).value)
+        dwell = np.bincount(labels[1:][stayed], weights=gaps[stayed], minlength=count) / 3.6e12
+        
+        inside = labels >= 0
+        labels, ns, rows = labels[inside], ns[inside], rows[inside]
+        first = np.full(count, np.iinfo(np.int64).max)
+        last = np.full(count, np.iinfo(np.int64).min)
+        np.minimum.at(first, labels, ns)
+        np.maximum.at(last, labels, ns)
+        region_days = np.unique(labels * (1 << 20) + ns // (86400 * 10**9) % (1 << 20))
         
-    def get_location_clusters(self) -> List[Dict]:
-        """Get clusters of frequently visited locations"""
-        if len(self.valid_df) == 0:
+        regions = pd.DataFrame({
+            'region': np.arange(count),
+            'lat': lat,
+            'lon': lon,
+            'radius_km': radius,
+            'towers': np.bincount(tower_region, minlength=count),
+            'records': records.astype(np.int64),
+            'first_seen': pd.to_datetime(first),
+            'last_seen': pd.to_datetime(last),
+            'days': np.bincount(region_days >> 20, minlength=count),
+            'dwell_hours': dwell,
+        })
+        for period in ('Night', 'Day', 'Evening'):
+            flags = self.df[f'Is_{period}'].to_numpy()[rows].astype(np.float64)
+            regions[f'{period.lower()}_share'] = np.bincount(labels, weights=flags, minlength=count) / records
+        
+        self._stay_regions[key] = regions
+        return regions
+    
+    def get_location_clusters(self, cell_km: float = None) -> List[Dict]:
+        """
+        Get clusters of frequently visited locations
+        
+        By default each exact tower coordinate is a location; with cell_km,
+        towers in the same grid cell of that size are merged and reported at
+        their record-weighted centroid.
+        """
+        valid = len(self.valid_rows)
+        if valid == 0:
             return []
         
-        location_counts = self.valid_df.groupby(['First_Lat', 'First_Long']).size()
-        location_counts = location_counts.sort_values(ascending=False)
+        if cell_km is not None:
+            cells = self.get_spatial_index(cell_km).cell_summary()
+            return [
+                {'lat': float(lat), 'lon': float(lon), 'count': int(count), 'percentage': float(count / valid * 100)}
+                for lat, lon, count in zip(cells['lat'], cells['lon'], cells['records'])
+            ]
+        
+        location_counts = self._valid_columns(['First_Lat', 'First_Long']).groupby(['First_Lat', 'First_Long']).size()
+        location_counts = location_counts.sort_values(ascending=False, kind='stable')
         
         clusters = []
         for (lat, lon), count in location_counts.items():
@@ -32,7 +857,7 @@ class LocationAnalyzer:
                 'lat': float(lat),
                 'lon': float(lon),
                 'count': int(count),
-                'percentage': float(count / len(self.valid_df) * 100)
+                'percentage': float(count / valid * 100)
             })
         
         return clusters
@@ -45,8 +870,10 @@ class LocationAnalyzer:
             'evening': []
         }
         
+        valid_df = self._valid_columns(['First_Lat', 'First_Long', 'Is_Night', 'Is_Day', 'Is_Evening'])
+        
         # Night locations
-        night_df = self.valid_df[self.valid_df['Is_Night'] == 1]
+        night_df = valid_df[valid_df['Is_Night'] == 1]
         if len(night_df) > 0:
             night_locs = night_df.groupby(['First_Lat', 'First_Long']).size()
             locations['night'] = [
@@ -55,7 +882,7 @@ class LocationAnalyzer:
             ]
         
         # Day locations
-        day_df = self.valid_df[self.valid_df['Is_Day'] == 1]
+        day_df = valid_df[valid_df['Is_Day'] == 1]
         if len(day_df) > 0:
             day_locs = day_df.groupby(['First_Lat', 'First_Long']).size()
             locations['day'] = [
@@ -64,7 +891,7 @@ class LocationAnalyzer:
             ]
         
         # Evening locations
-        evening_df = self.valid_df[self.valid_df['Is_Evening'] == 1]
+        evening_df = valid_df[valid_df['Is_Evening'] == 1]
         if len(evening_df) > 0:
             evening_locs = evening_df.groupby(['First_Lat', 'First_Long']).size()
             locations['evening'] = [
@@ -75,35 +902,91 @@ class LocationAnalyzer:
         return locations
     
     def get_movement_timeline(self) -> List[Dict]:
-        """Get chronological movement data"""
-        if len(self.valid_df) == 0:
+        """Get chronological movement data (for a columnar view, see get_stays_and_trips)"""
+        if len(self.valid_rows) == 0:
             return []
         
-        timeline = []
-        sorted_df = self.valid_df.sort_values('DateTime')
+        sorted_df = self._valid_columns(
+            ['DateTime', 'First_Lat', 'First_Long', 'Call_Category', 'B_Party_Clean']).sort_values('DateTime')
         
-        for _, row in sorted_df.iterrows():
-            timeline.append({
-                'datetime': row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
-                'lat': float(row['First_Lat']),
-                'lon': float(row['First_Long']),
-                'call_type': row['Call_Category'],
-                'contact': row['B_Party_Clean']
-            })
+        return [
+            {'datetime': when, 'lat': lat, 'lon': lon, 'call_type': call_type, 'contact': contact}
+            for when, lat, lon, call_type, contact in zip(
+                sorted_df['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+                sorted_df['First_Lat'].astype(np.float64).tolist(),
+                sorted_df['First_Long'].astype(np.float64).tolist(),
+                sorted_df['Call_Category'],
+                sorted_df['B_Party_Clean'])
+        ]
+    
+    def get_track_lod(self, max_points: int = 2000, max_frames: int = 200,
+                      zoom: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row positions (for df.iloc) of a simplified path and of animation frames
         
-        return timeline
+        Both come from the time-ordered located track; see
+        track_level_of_detail. The full track is still valid_rows.
+        """
+        rows = self.valid_rows
+        rows = rows[np.argsort(self.df['DateTime'].to_numpy()[rows], kind='stable')]
+        path, frames = track_level_of_detail(
+            self.df['DateTime'].to_numpy()[rows], self.df['First_Lat'].to_numpy()[rows],
+            self.df['First_Long'].to_numpy()[rows], max_points, max_frames, zoom)
+        return rows[path], rows[frames]
     
-    def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate approximate distance between two coordinates (in km)"""
-        from math import radians, sin, cos, sqrt, atan2
+    def get_stays_and_trips(self, min_duration='15min', eps_km: float = 0.5,
+                            min_records: int = 20) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Visits (stays) and the trips between them along the time-ordered track
         
-        R = 6371  # Earth's radius in km
+        A record's place is its stay region (get_stay_regions with eps_km and
+        min_records) or, outside every region, its own tower, so hopping
+        between towers of one region stays a single visit. See segment_track
+        for the columns; stays also get the region (-1 for a lone tower),
+        and first/last are row positions for df.iloc.
+        """
+        index = self.get_spatial_index()
+        tower_labels = self._region_labels(eps_km, min_records)
+        regions = int(tower_labels.max()) + 1 if len(tower_labels) else 0
         
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        rows = self.valid_rows
+        rows = rows[np.argsort(self.df['DateTime'].to_numpy()[rows], kind='stable')]
+        towers = index.record_towers[rows]
+        places = np.where(tower_labels[towers] >= 0, tower_labels[towers], regions + towers)
+        
+        stays, trips = segment_track(self.df['DateTime'].to_numpy()[rows], self.df['First_Lat'].to_numpy()[rows],
+                                     self.df['First_Long'].to_numpy()[rows], places, min_duration=min_duration)
+        stays['region'] = np.where(stays['place'] < regions, stays['place'], -1)
+        stays['first'] = rows[stays['first']]
+        stays['last'] = rows[stays['last']]
+        return stays, trips
+    
+    def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """
+        Calculate approximate distance between two coordinates (in km)
         
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
+        Scalar version; use haversine_km / track_distances / distance_matrix
+        for arrays.
+        """
+        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+        a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0)))
+    
+    def get_major_movements(self, min_distance_km: float = 5.0, min_interval=None,
+                            max_speed_kmh: float = None) -> np.ndarray:
+        """
+        Row positions (for df.iloc) of the major movements in time order
         
-        return R * c
+        See major_movement_indices for the thresholds.
+        """
+        order = self.valid_rows[np.argsort(self.df['DateTime'].to_numpy()[self.valid_rows], kind='stable')]
+        keep = major_movement_indices(
+            self.df['First_Lat'].to_numpy()[order], self.df['First_Long'].to_numpy()[order],
+            self.df['DateTime'].to_numpy()[order], min_distance_km, min_interval, max_speed_kmh)
+        return order[keep]
+    
+    def get_track_distances(self) -> pd.Series:
+        """Distance in km from the previous located record, in time order (first record: 0)"""
+        track = self._valid_columns(['DateTime', 'First_Lat', 'First_Long']).sort_values('DateTime', kind='stable')
+        steps = track_distances(track['First_Lat'].to_numpy(), track['First_Long'].to_numpy())
+        return pd.Series(np.concatenate([[0.0], steps]) if len(track) else steps, index=track.index)
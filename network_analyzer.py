@@ -3,6 +3,7 @@ Network Analysis Module
 Analyzes contact networks and relationships from CDR data
 """
 
+import numpy as np
 import pandas as pd
 import networkx as nx
 from typing import Dict, List, Tuple
@@ -11,8 +12,20 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _contact_counts(contacts: pd.Series) -> pd.Series:
+    """
+    Records per contact, largest first
+    
+    Ties keep the order contacts first appear in, for object and categorical
+    columns alike (value_counts breaks ties by category order instead).
+    """
+    codes, uniques = pd.factorize(contacts)
+    counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)), index=pd.Index(uniques, dtype=object))
+    return counts.sort_values(ascending=False, kind='stable')
+
+
 class NetworkAnalyzer:
-    """Analyze contact networks from CDR data"""
+    """Analyze contact networks from CDR data (shares the caller's frame read-only)"""
     
     def __init__(self, df: pd.DataFrame):
         self.df = df
@@ -46,7 +59,7 @@ class NetworkAnalyzer:
             return G
 
         # Count interactions per contact
-        contact_counts = self.df[contact_column].value_counts()
+        contact_counts = _contact_counts(self.df[contact_column])
         
         # Add edges for each contact
         for contact, count in contact_counts.items():
@@ -118,7 +131,7 @@ class NetworkAnalyzer:
         
         # Determine contact column
         contact_col = 'B_Party_Clean' if 'B_Party_Clean' in self.df.columns else 'Called Party Telephone Number'
-        contact_counts = self.df[contact_col].value_counts()
+        contact_counts = _contact_counts(self.df[contact_col])
         
         for contact, count in contact_counts.items():
             if contact == 'Unknown':
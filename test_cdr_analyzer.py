@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Test script for the CDR analyzer
+Checks the aggregate-backed analyses against direct pandas computations
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cdr_parser import CDRParser
+from cdr_analyzer import CDRAnalyzer, VOICE_CATEGORIES
+from location_analyzer import LocationAnalyzer
+from network_analyzer import NetworkAnalyzer
+from test_cdr_parser import write_airtel_cdr
+
+
+def parsed_airtel_frame(rows: int, seed: int = 0, compact: bool = False) -> pd.DataFrame:
+    """Parse a synthetic Airtel CDR through the real parser"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'airtel.csv')
+        write_airtel_cdr(path, rows, seed)
+        return CDRParser(path, compact=compact).parse()
+
+
+def test_temporal_cube_matches_direct_filters():
+    """Temporal metrics read from the cube equal filtering the full frame"""
+    for compact in (False, True):
+        df = parsed_airtel_frame(3000, compact=compact)
+        temporal = CDRAnalyzer(df).get_temporal_analysis()
+
+        night = df[df['Is_Night'] == 1]
+        day = df[df['Is_Day'] == 1]
+        summary = temporal['night_day_summary']
+        assert summary['night_count'] == len(night)
+        assert summary['day_count'] == len(day)
+        assert summary['evening_count'] == int(df['Is_Evening'].sum())
+
+        night_activity = temporal['night_activity']
+        assert night_activity['late_night_03_06'] == int(((df['Hour'] >= 3) & (df['Hour'] < 6)).sum())
+        assert night_activity['night_duration_total'] == int(night['Dur(s)'].sum())
+        assert np.isclose(night_activity['night_duration_avg'], night['Dur(s)'].mean())
+        expected_types = night['Call_Category'].value_counts()
+        assert night_activity['night_call_types'] == expected_types[expected_types > 0].to_dict()
+
+        # Top contacts: same counts, each listed contact with its true count
+        expected = day['B_Party_Clean'].value_counts()
+        top_day = temporal['day_activity']['top_day_contacts']
+        assert sorted(top_day.values(), reverse=True) == expected.head(10).tolist()
+        assert all(expected[contact] == count for contact, count in top_day.items())
+
+        hourly = df['Hour'].value_counts()
+        assert temporal['hourly_distribution'] == {str(h): int(hourly.get(h, 0)) for h in range(24)}
+        assert hourly[temporal['peak_hours']['overall']] == hourly.max()
+
+        patterns = temporal['suspicious_patterns']
+        assert patterns['late_night_activity'] == int((df['Hour'] < 4).sum())
+        assert np.isclose(patterns['night_activity_percentage'], df['Is_Night'].mean() * 100)
+
+
+def test_helpers_match_time_ordered_scan():
+    """Vectorized helpers equal a row-by-row scan, and pages cover the full result"""
+    df = parsed_airtel_frame(3000, seed=1)
+    df = df.sample(frac=1, random_state=0).reset_index(drop=True)  # out of time order
+    analyzer = CDRAnalyzer(df)
+
+    expected_contacts, expected_changes, seen, prev = [], [], set(), None
+    for row in df.sort_values('DateTime', kind='stable').itertuples():
+        if row.B_Party_Clean not in seen and row.B_Party_Clean != 'Unknown':
+            seen.add(row.B_Party_Clean)
+            expected_contacts.append((row.DateTime.strftime('%Y-%m-%d'), row.B_Party_Clean))
+        if prev is not None and row.IMEI != prev:
+            expected_changes.append((prev, row.IMEI))
+        prev = row.IMEI
+
+    pages = [analyzer.get_new_contacts(page, page_size=40) for page in (1, 2, 3)]
+    assert pages[0]['total'] == len(expected_contacts) > 80
+    assert pages[0]['pages'] == -(-len(expected_contacts) // 40)
+    contacts = [(item['date'], item['contact']) for page in pages for item in page['items']]
+    assert contacts == expected_contacts[:120]
+
+    changes = analyzer.get_device_changes(page_size=len(df))
+    assert [(c['from_imei'], c['to_imei']) for c in changes['items']] == expected_changes
+    assert analyzer.get_device_changes(page=2, page_size=len(df))['items'] == []
+
+    contact_analysis = analyzer.get_contact_analysis()
+    assert contact_analysis['new_contacts_total'] == len(expected_contacts)
+    assert len(contact_analysis['new_contacts_timeline']) == min(50, len(expected_contacts))
+
+
+def test_sections_are_memoized_until_invalidated():
+    """Repeat calls reuse results; invalidate() or a new frame forces recomputation"""
+    df = parsed_airtel_frame(500)
+    analyzer = CDRAnalyzer(df.copy())  # edited in place below
+    getters = [analyzer.get_temporal_analysis, analyzer.get_contact_analysis,
+               analyzer.get_location_analysis, analyzer.get_communication_patterns,
+               analyzer.get_device_analysis]
+    first = [get() for get in getters]
+    assert all(get() is result for get, result in zip(getters, first))
+
+    analyzer.df.loc[analyzer.df.index[:100], 'Hour'] = 3
+    assert analyzer.get_temporal_analysis() is first[0]  # in-place edits need invalidate()
+    version = analyzer.version
+    analyzer.invalidate()
+    assert analyzer.version == version + 1
+    temporal = analyzer.get_temporal_analysis()
+    assert temporal is not first[0]
+    assert temporal['hourly_distribution']['3'] == int((analyzer.df['Hour'] == 3).sum())
+
+    analyzer.df = df.iloc[:200]
+    assert analyzer.get_contact_analysis()['new_contacts_total'] == \
+        CDRAnalyzer(df.iloc[:200]).get_new_contacts()['total']
+    assert analyzer.get_temporal_analysis() is not temporal
+
+
+def test_append_matches_rebuild():
+    """Appending top-ups gives the same results as analyzing the concatenated frame"""
+    df = parsed_airtel_frame(3000, seed=2, compact=True).sort_values('DateTime', kind='stable')
+    parts = [df.iloc[:1500], df.iloc[1500:2200], df.iloc[2200:]]
+    full = CDRAnalyzer(df)
+
+    analyzer = CDRAnalyzer(parts[0])
+    analyzer.get_temporal_analysis()
+    analyzer.get_communication_patterns()
+    analyzer.get_contact_analysis()
+    analyzer.get_device_analysis()
+    analyzer.get_activity_cube()
+    analyzer.get_activity_cube(contact_buckets=1000)
+    analyzer.detect_bursts(window='1D', step='6h', sigma=1.0)
+    for part in parts[1:]:
+        analyzer.append(part)
+
+    # Running aggregates are merged without concatenating the chunks
+    pd.testing.assert_frame_equal(analyzer.get_temporal_cube(), full.get_temporal_cube())
+    # Every contact has its own bucket, so new contacts just add buckets
+    pd.testing.assert_frame_equal(analyzer.get_activity_cube(1000), full.get_activity_cube(1000))
+    assert analyzer.get_temporal_analysis() == full.get_temporal_analysis()
+    assert analyzer.get_new_contacts(page_size=len(df)) == full.get_new_contacts(page_size=len(df))
+    assert analyzer.get_device_changes(page_size=len(df)) == full.get_device_changes(page_size=len(df))
+    assert ('window_counts', 86400 * 10**9, 6 * 3600 * 10**9) in analyzer._results
+    assert len(analyzer._frames) == 3
+    pd.testing.assert_frame_equal(analyzer.get_activity_cube(), full.get_activity_cube())
+
+    # Burst window counts are merged too; only the flagged intervals are read back
+    for baseline in ('robust', 'weekday'):
+        bursts = analyzer.detect_bursts(window='1D', step='6h', baseline=baseline, sigma=1.0)
+        assert len(bursts) > 0
+        pd.testing.assert_frame_equal(bursts, full.detect_bursts(window='1D', step='6h', baseline=baseline, sigma=1.0))
+
+    assert analyzer.get_communication_patterns() == full.get_communication_patterns()
+    assert analyzer.get_device_analysis() == full.get_device_analysis()
+    assert analyzer.get_contact_analysis() == full.get_contact_analysis()
+    assert len(analyzer.df) == len(df)
+    assert analyzer.df.index.equals(pd.RangeIndex(len(df)))
+
+    # Contacts tied after a top-up rank by first appearance, as in a rebuild
+    times = pd.date_range('2024-01-01', periods=6, freq='h')
+    tie = pd.DataFrame({'DateTime': times, 'Hour': times.hour, 'Call_Category': 'Outgoing Call',
+                        'B_Party_Clean': ['Z', 'B', 'B', 'Z', 'M', 'A'], 'Dur(s)': 10.0, 'Is_Night': False})
+    analyzer = CDRAnalyzer(tie.iloc[:3])
+    analyzer.get_activity_cube(contact_buckets=2)
+    analyzer.append(tie.iloc[3:])
+    full = CDRAnalyzer(tie)
+    assert list(analyzer._contact_counts().index) == list(full._contact_counts().index) == ['Z', 'B', 'M', 'A']
+    assert ('activity_cube', 2) in analyzer._results
+    pd.testing.assert_frame_equal(analyzer.get_activity_cube(contact_buckets=2),
+                                  full.get_activity_cube(contact_buckets=2))
+
+    # A top-up that starts before the existing records falls back to a full recompute
+    analyzer = CDRAnalyzer(parts[2])
+    analyzer.get_device_analysis()
+    analyzer.detect_bursts(window='1D', step='6h', sigma=1.0)
+    analyzer.append(parts[0])
+    expected = CDRAnalyzer(pd.concat([parts[2], parts[0]]))
+    assert analyzer.get_device_analysis() == expected.get_device_analysis()
+    pd.testing.assert_frame_equal(analyzer.detect_bursts(window='1D', step='6h', sigma=1.0),
+                                  expected.detect_bursts(window='1D', step='6h', sigma=1.0))
+    assert analyzer.get_new_contacts()['total'] == expected.get_new_contacts()['total']
+
+    # Separately parsed compact top-ups have their own categories; merging keeps them categorical
+    frames = [parsed_airtel_frame(800, seed=seed, compact=True) for seed in (5, 6)]
+    assert not frames[0]['B_Party_Clean'].dtype == frames[1]['B_Party_Clean'].dtype
+    analyzer = CDRAnalyzer(frames[0])
+    analyzer.get_contact_analysis()
+    analyzer.append(frames[1])
+    expected, _ = CDRParser.compact_dtypes(pd.concat(frames, ignore_index=True))
+    assert analyzer.df.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(analyzer.df, expected)
+    assert analyzer.get_contact_analysis() == CDRAnalyzer(expected).get_contact_analysis()
+
+
+def test_analyzers_share_frame_read_only():
+    """Analyzers keep a reference to the caller's frame and never modify it"""
+    df = parsed_airtel_frame(800, seed=4)
+    before = df.copy()
+
+    analyzer = CDRAnalyzer(df)
+    location = LocationAnalyzer(df)
+    network = NetworkAnalyzer(df)
+    assert analyzer.df is df and location.df is df and network.df is df
+
+    for section in (analyzer.get_temporal_analysis, analyzer.get_contact_analysis,
+                     analyzer.get_location_analysis, analyzer.get_communication_patterns,
+                     analyzer.get_device_analysis, location.get_location_clusters,
+                     location.get_time_based_locations, location.get_movement_timeline,
+                     network.build_network_graph):
+        section()
+    pd.testing.assert_frame_equal(df, before)
+
+    valid = df.dropna(subset=['First_Lat', 'First_Long'])
+    pd.testing.assert_frame_equal(location.valid_df, valid)
+    clusters = location.get_location_clusters()
+    assert sum(c['count'] for c in clusters) == len(valid)
+    assert len(clusters) == analyzer.get_location_analysis()['unique_towers']
+
+
+def test_sliding_bursts_straddle_hours():
+    """A burst across an hour boundary is found, with exact record and contact counts"""
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp('2024-03-04').value
+    background = np.sort(rng.integers(start, start + 28 * 86400 * 10**9, 8000))
+    burst = pd.Timestamp('2024-03-13 13:55').value + rng.integers(0, 10 * 60 * 10**9, 40)
+    df = pd.DataFrame({
+        'DateTime': pd.to_datetime(np.r_[background, burst]),
+        'B_Party_Clean': np.r_[rng.integers(0, 200, len(background)).astype(str),
+                               ['9999999999'] * 30 + ['8888888888'] * 10],
+    }).sample(frac=1, random_state=0)
+    analyzer = CDRAnalyzer(df)
+
+    for baseline in ('robust', 'weekday'):
+        bursts = analyzer.detect_bursts(window='15min', step='5min', baseline=baseline)
+        hits = bursts[(bursts['start'] <= '2024-03-13 13:56') & (bursts['end'] >= '2024-03-13 14:05')]
+        assert len(hits) == 1
+        assert list(hits['contacts'].iloc[0].items())[:2] == [('9999999999', 30), ('8888888888', 10)]
+        assert (bursts['peak_count'] > bursts['threshold']).all()
+
+        for burst in bursts.itertuples():
+            inside = df[(df['DateTime'] >= burst.start) & (df['DateTime'] < burst.end)]
+            assert burst.records == len(inside)
+            assert burst.contacts == inside['B_Party_Clean'].value_counts().to_dict()
+
+    assert analyzer.detect_bursts() is analyzer.detect_bursts()
+    assert analyzer.detect_bursts(min_count=10**6).empty
+
+
+def test_contact_stats_match_per_contact_filters():
+    """Every per-contact statistic equals filtering the frame for that contact"""
+    df = parsed_airtel_frame(3000, seed=5)
+    analyzer = CDRAnalyzer(df)
+    stats = analyzer.get_contact_stats(page_size=len(df))
+    assert stats['total'] == df['B_Party_Clean'].nunique()
+    assert [row['total'] for row in stats['items']] == sorted((row['total'] for row in stats['items']), reverse=True)
+
+    for row in stats['items'][:5] + stats['items'][-5:]:
+        records = df[df['B_Party_Clean'] == row['contact']]
+        call_type = records['Call Type']
+        assert row['total'] == len(records)
+        assert row['incoming'] == (call_type == 'IN').sum()
+        assert row['outgoing'] == (call_type == 'OUT').sum()
+        assert row['sms'] == call_type.str.contains('SM').sum()
+        assert row['total_duration'] == records['Dur(s)'].sum()
+        voice = records[call_type.isin(['IN', 'OUT'])]
+        assert np.isclose(row['avg_duration'], voice['Dur(s)'].sum() / len(voice) if len(voice) else 0)
+        assert row['first_seen'] == records['DateTime'].min()
+        assert row['last_seen'] == records['DateTime'].max()
+        assert np.isclose(row['night_share'], records['Is_Night'].mean())
+        assert row['distinct_cells'] == records['First CGI'].nunique()
+
+    call_types = analyzer.get_contact_analysis()['contact_call_types']
+    assert list(call_types) == [row['contact'] for row in stats['items'][:10]]
+
+
+def test_activity_cube_slices_match_frame():
+    """Dashboard slices of the activity cube equal grouping the raw frame"""
+    for compact in (False, True):
+        df = parsed_airtel_frame(4000, seed=3, compact=compact)
+        analyzer = CDRAnalyzer(df)
+        cube = analyzer.get_activity_cube(contact_buckets=5)
+        assert cube['count'].sum() == len(df)
+        assert np.isclose(cube['duration'].sum(), df['Dur(s)'].sum())
+
+        dates = pd.to_datetime(df['DateTime'].dt.date)
+        assert cube.groupby('Date')['count'].sum().to_dict() == dates.value_counts().to_dict()
+        assert cube.groupby('Hour')['count'].sum().to_dict() == df['Hour'].value_counts().to_dict()
+        by_category = cube.groupby('Call_Category', observed=True)['count'].sum()
+        assert by_category.to_dict() == df['Call_Category'].astype(object).value_counts().to_dict()
+
+        buckets = cube.groupby('Contact_Bucket', observed=True)['count'].sum()
+        top = df['B_Party_Clean'].value_counts().head(5)
+        assert buckets.drop('Other').sort_values(ascending=False).tolist() == top.tolist()
+        assert buckets['Other'] == len(df) - top.sum()
+
+        calls = df[df['Call_Category'].isin(VOICE_CATEGORIES)]
+        top_calls = analyzer.top_contacts(10, VOICE_CATEGORIES)
+        assert list(top_calls.values()) == calls['B_Party_Clean'].value_counts().head(10).tolist()
+
+        patterns = analyzer.get_communication_patterns()
+        daily = df.groupby('Date_Only', observed=True).size()
+        assert patterns['daily_patterns'] == {
+            'avg_daily_activity': float(daily.mean()),
+            'max_daily_activity': int(daily.max()),
+            'min_daily_activity': int(daily.min()),
+            'active_days': len(daily),
+        }
+        weekdays = df['DayOfWeek'].astype(object).value_counts()
+        assert patterns['day_of_week'] == weekdays.to_dict()
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 CDR Analyzer Test Suite\n")
+    test_temporal_cube_matches_direct_filters()
+    print("✅ Temporal cube matches direct filters")
+    test_helpers_match_time_ordered_scan()
+    print("✅ Vectorized helpers match time-ordered scan")
+    test_sections_are_memoized_until_invalidated()
+    print("✅ Sections memoized until invalidated")
+    test_append_matches_rebuild()
+    print("✅ Append matches rebuild")
+    test_analyzers_share_frame_read_only()
+    print("✅ Analyzers share the frame read-only")
+    test_sliding_bursts_straddle_hours()
+    print("✅ Sliding-window bursts straddle hours")
+    test_contact_stats_match_per_contact_filters()
+    print("✅ Contact stats match per-contact filters")
+    test_activity_cube_slices_match_frame()
+    print("✅ Activity cube slices match the frame")
+
+
+if __name__ == "__main__":
+    main()
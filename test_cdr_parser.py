@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Test script for the CDR parser
+Builds synthetic Airtel CDRs and checks the streaming and full parse paths agree
+"""
+
+import sys
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cdr_parser import CDRParser, AIRTEL_CALL_CATEGORIES, JIO_CALL_CATEGORIES, parse_cdr_batch
+from cdr_cache import CDRCache
+from cdr_analyzer import CDRAnalyzer
+from location_analyzer import LocationAnalyzer
+from network_analyzer import NetworkAnalyzer
+
+AIRTEL_HEADER = (
+    "Target No,Call Type,TOC,B Party No,LRN No,LRN TSP-LSA,Date,Time,Dur(s),"
+    "First CGI Lat/Long,First CGI,Last CGI Lat/Long,Last CGI,SMSC No,Service Type,"
+    "IMEI,IMSI,Call Fow No,Roam Nw,SW & MSC ID,IN TG,OUT TG,IP Address,Port No"
+)
+
+
+def write_airtel_cdr(path: str, rows: int, seed: int = 0) -> None:
+    """Write a synthetic Airtel CDR export with banner, header and footer"""
+    rng = random.Random(seed)
+    call_types = ['IN', 'OUT', 'SMT', 'SMO', 'IN', 'OUT']
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("BHARTI AIRTEL LIMITED\n")
+        f.write("Call Details of Mobile No '9876543210' for the period '01/01/2024' to '31/12/2024'\n\n")
+        f.write(AIRTEL_HEADER + "\n")
+        for _ in range(rows):
+            b_party = rng.choice([
+                "'91%010d'" % rng.randint(6000000000, 6000000300),
+                "AD-HDFCBK",
+                "'%010d'" % rng.randint(7000000000, 7000000100),
+                "",
+                "12345",
+            ])
+            first = f"{28.5 + rng.random() * 0.3:.6f}/{77.0 + rng.random() * 0.3:.6f}" if rng.random() > 0.1 else ""
+            last = f"{28.5 + rng.random() * 0.3:.6f}/{77.0 + rng.random() * 0.3:.6f}"
+            date = f"'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024'"
+            time = f"'{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}'"
+            f.write(
+                f"'9876543210',{rng.choice(call_types)},Post,{b_party},,,{date},{time},"
+                f"{rng.randint(0, 900)},{first},404-96-290-{rng.randint(1000, 1300)},"
+                f"{last},404-96-290-{rng.randint(1000, 1300)},,Voice,"
+                f"35{rng.randint(10, 99)}{rng.randint(0, 3)},404960000,,,,,,,\n"
+            )
+        f.write("\n This is System generated report, and needs no signature.\n")
+
+
+JIO_HEADER = (
+    "Calling Party Telephone Number,Called Party Telephone Number,Call Date,Call Time,"
+    "Call Duration,Call Type,First Cell ID,Last Cell ID"
+)
+
+
+def write_jio_cdr(path: str, rows: int, seed: int = 0) -> None:
+    """Write a synthetic Jio CDR export with its banner and header"""
+    rng = random.Random(seed)
+    call_types = ['A_IN', 'A_OUT', 'SMSIN', 'SMSOUT', 'A_IN', 'A_OUT']
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("Input Value : MSISDN '9876543210'\n")
+        f.write(f"Total Records : {rows}\n\n")
+        f.write(JIO_HEADER + "\n")
+        for _ in range(rows):
+            b_party = rng.choice(["91%010d" % rng.randint(6000000000, 6000000300), "JD-JIOINF", ""])
+            date = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+            time = f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+            f.write(
+                f"9876543210,{b_party},{date},{time},{rng.randint(0, 900)},{rng.choice(call_types)},"
+                f"405-872-{rng.randint(100, 120)}-{rng.randint(1000, 1300):X},"
+                f"405-872-{rng.randint(100, 120)}-{rng.randint(1000, 1300):X}\n"
+            )
+
+def test_streaming_matches_full_parse():
+    """Concatenated streaming chunks should equal a full parse"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'airtel.csv')
+        write_airtel_cdr(path, 5000)
+
+        full_parser = CDRParser(path)
+        full = full_parser.parse()
+
+        stream_parser = CDRParser(path)
+        chunks = list(stream_parser.iter_chunks(chunksize=700))
+
+        assert len(chunks) > 1
+        assert stream_parser.format_type == 'airtel'
+        assert stream_parser.metadata == full_parser.metadata
+        pd.testing.assert_frame_equal(pd.concat(chunks), full)
+
+
+def test_compact_chunks_concatenate():
+    """Compact chunks joined with concat_compact should equal a compact full parse"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'airtel.csv')
+        write_airtel_cdr(path, 5000)
+
+        full = CDRParser(path, compact=True).parse()
+        chunks = list(CDRParser(path, compact=True).iter_chunks(chunksize=700))
+        assert len({tuple(chunk['B_Party_Clean'].cat.categories) for chunk in chunks}) > 1
+
+        joined = CDRParser.concat_compact(chunks)
+        assert joined.dtypes.to_dict() == full.dtypes.to_dict()
+        for column in ['Call Type', 'B_Party_Clean', 'Date_Only']:
+            assert isinstance(joined[column].dtype, pd.CategoricalDtype), column
+        pd.testing.assert_frame_equal(joined, full.reset_index(drop=True))
+
+
+def test_vectorized_helpers_match_scalar():
+    """Column-level cleaning helpers should agree with the per-value versions"""
+    hours = pd.Series(list(range(24)) * 3)
+    assert CDRParser._classify_time_periods(hours).tolist() == hours.apply(CDRParser._classify_time_period).tolist()
+
+    coords = pd.Series(['28.5/77.1', ' 28.5 / 77.1 ', 'a/b', '1/2/3', '', np.nan, '28.5/', '1e3/2', '28.5/77.1'])
+    lat, lon = CDRParser._parse_coordinate_series(coords)
+    expected = coords.apply(CDRParser._parse_coordinates)
+    pd.testing.assert_series_equal(lat, expected.apply(lambda x: x[0]).astype(float))
+    pd.testing.assert_series_equal(lon, expected.apply(lambda x: x[1]).astype(float))
+
+    numbers = pd.Series([
+        "'919876543210'", 'AD-HDFCBK', '12345', np.nan, '', '-12', '9-876543210',
+        "'+91 98765 43210'", "  'JD-ABC'  ", "'919876543210'"
+    ], dtype=object)
+    assert CDRParser._clean_phone_numbers(numbers).tolist() == numbers.apply(CDRParser._clean_phone_number).tolist()
+
+    call_types = pd.Series(['IN', 'OUT', 'SMT', 'SMO', 'sms', 'x', np.nan, 'a_in', 'A_OUT',
+                            'P2P_SMSIN', 'SMSOUT', 'P2AOUT', 'MTC', 'IN'])
+    assert (CDRParser._classify_call_types(call_types, AIRTEL_CALL_CATEGORIES).tolist()
+            == call_types.apply(CDRParser._classify_call_type).tolist())
+    assert (CDRParser._classify_call_types(call_types, JIO_CALL_CATEGORIES).tolist()
+            == call_types.apply(CDRParser._classify_jio_call_type).tolist())
+
+    times = pd.Series(['12:34:56', '00:00:00', '23:59:59', '9:05:01', '24:00:00', '12:60:00', '12:00:60', '1a:00:00',
+                       '', 'nan', '12:00', '\u0661\u0662:34:56', '12:34:56 ', '12-34-56', '12:34:5\u00e9'], dtype=object)
+    expected = pd.to_datetime(times, format='%H:%M:%S', errors='coerce') - pd.Timestamp('1900-01-01')
+    assert CDRParser._parse_clock(times).tolist() == expected.to_numpy().view(np.int64).tolist()
+
+    dates = pd.Series(["'01/02/2024'", "'01/02/2024'", "'31/02/2024'", np.nan, "' 05/06/2024 '", "'05/06/2024'"])
+    clocks = pd.Series(["'10:00:00'", "'bad'", "'10:00:00'", "'10:00:00'", np.nan, "'07:08:09'"])
+    strip = lambda v: v.astype(str).str.strip().str.strip("'\"")
+    stripped_dates, stripped_times, stamps = CDRParser._parse_date_time(dates, clocks, strip)
+    assert stripped_dates.tolist() == strip(dates).tolist()
+    assert stripped_times.tolist() == strip(clocks).tolist()
+    day = pd.to_datetime(strip(dates), format='%d/%m/%Y', errors='coerce')
+    clock = pd.to_datetime(strip(clocks), format='%H:%M:%S', errors='coerce') - pd.Timestamp('1900-01-01')
+    pd.testing.assert_series_equal(stamps, day + clock.fillna(pd.Timedelta(0)))
+
+    frame = pd.DataFrame({'Date': [np.nan, '01/02/2024', np.nan, np.nan], 'Time': [np.nan, np.nan, '10:00:00', np.nan]})
+    pd.testing.assert_frame_equal(CDRParser._drop_empty_rows(frame, 'Date'), frame.dropna(how='all'))
+
+
+def test_parse_cache_round_trip():
+    """A second parse of the same bytes should come from the cache unchanged"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'airtel.csv')
+        write_airtel_cdr(path, 2000)
+        cache = CDRCache(os.path.join(tmp, 'cache'))
+        if not cache.enabled:
+            print("⚠️  pyarrow not installed, skipping cache test")
+            return
+
+        first = CDRParser(path, cache=cache).parse()
+        assert len(os.listdir(cache.cache_dir)) == 2
+
+        reopened = CDRParser(path, cache=cache)
+        second = reopened.parse()
+        assert reopened.format_type == 'airtel'
+        assert reopened.metadata['target_number'] == '9876543210'
+        pd.testing.assert_frame_equal(second, first)
+        for column in first.columns[(first.dtypes == object).to_numpy()]:
+            assert second[column].map(type).equals(first[column].map(type)), column  # NaN stays NaN
+
+        # Sessions storing the same entry at once each write their own temp files
+        key = CDRCache.key_for(path)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            stored = list(pool.map(lambda _: cache.store(key, first, reopened.metadata, 'airtel'), range(8)))
+        assert all(stored)
+        assert sorted(os.listdir(cache.cache_dir)) == [key + '.feather', key + '.json']
+        pd.testing.assert_frame_equal(cache.load(key)[0], first)
+
+
+def test_parse_cache_round_trip_jio():
+    """Jio's all-None coordinate columns should come back None, not NaN"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jio.csv')
+        write_jio_cdr(path, 2000)
+        cache = CDRCache(os.path.join(tmp, 'cache'))
+        if not cache.enabled:
+            print("⚠️  pyarrow not installed, skipping cache test")
+            return
+
+        first = CDRParser(path, cache=cache).parse()
+        assert first['First_Lat'].map(lambda v: v is None).all()
+
+        reopened = CDRParser(path, cache=cache)
+        second = reopened.parse()
+        assert reopened.format_type == 'jio'
+        assert reopened.metadata['target_number'] == '9876543210'
+        pd.testing.assert_frame_equal(second, first)
+        for column in first.columns[(first.dtypes == object).to_numpy()]:
+            assert second[column].map(type).equals(first[column].map(type)), column
+
+
+def assert_same_results(expected, actual, atol: float = 0.0, path: str = 'result') -> None:
+    """Recursively compare analyzer outputs, ignoring dtype (the compact schema narrows them)"""
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_categorical=False,
+                                      check_index_type=False, check_column_type=False, rtol=0, atol=atol, obj=path)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(actual, expected, check_dtype=False, check_categorical=False,
+                                       check_index_type=False, rtol=0, atol=atol, obj=path)
+    elif isinstance(expected, np.ndarray):
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=atol, err_msg=path)
+    elif isinstance(expected, dict):
+        assert list(actual) == list(expected), path
+        for key in expected:
+            assert_same_results(expected[key], actual[key], atol, f'{path}[{key!r}]')
+    elif isinstance(expected, (list, tuple)):
+        assert len(actual) == len(expected), path
+        for i, (left, right) in enumerate(zip(expected, actual)):
+            assert_same_results(left, right, atol, f'{path}[{i}]')
+    elif isinstance(expected, float) and not isinstance(actual, str):
+        assert (pd.isna(expected) and pd.isna(actual)) or abs(expected - actual) <= atol, (path, expected, actual)
+    else:
+        assert actual == expected, (path, expected, actual)
+
+
+def test_compact_schema_preserves_analysis():
+    """Analyzers give the same answers on compact and default parses"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'airtel.csv')
+        write_airtel_cdr(path, 3000)
+        full = CDRParser(path).parse()
+        parser = CDRParser(path, compact=True)
+        compact = parser.parse()
+
+        assert isinstance(compact['B_Party_Clean'].dtype, pd.CategoricalDtype)
+        assert compact['First_Lat'].dtype == np.float32
+        assert parser.memory_report['after_bytes'] < parser.memory_report['before_bytes']
+
+        # Categorical groupbys must not report empty categories
+        default, narrow = CDRAnalyzer(full), CDRAnalyzer(compact)
+        for method in ['get_temporal_analysis', 'get_contact_analysis', 'get_communication_patterns', 'get_device_analysis', 'get_temporal_cube',
+                       'get_activity_cube', 'top_contacts', 'get_new_contacts', 'get_device_changes',
+                       'get_contact_stats', 'detect_bursts']:
+            assert_same_results(getattr(default, method)(), getattr(narrow, method)(), path=method)
+        assert_same_results(default.top_contacts(5, categories=['Outgoing Call'], hours=[9, 10]),
+                            narrow.top_contacts(5, categories=['Outgoing Call'], hours=[9, 10]))
+
+        # Coordinates are float32 (~0.2 m at these latitudes), so compare locations to the metre
+        assert_same_results(default.get_location_analysis(), narrow.get_location_analysis(), atol=1e-5)
+
+        default, narrow = LocationAnalyzer(full), LocationAnalyzer(compact)
+        for method in ['get_time_based_locations', 'get_movement_timeline', 'get_stay_regions',
+                       'get_stays_and_trips', 'get_major_movements', 'get_track_lod', 'get_track_distances']:
+            assert_same_results(getattr(default, method)(), getattr(narrow, method)(), atol=1e-3, path=method)
+        # Tied clusters are ordered by coordinate, and float32 can merge neighbouring latitudes
+        by_place = lambda clusters: sorted(clusters, key=lambda c: (-c['count'], np.float32(c['lat']),
+                                                                    np.float32(c['lon'])))
+        assert_same_results(by_place(default.get_location_clusters()), by_place(narrow.get_location_clusters()),
+                            atol=1e-5, path='get_location_clusters')
+
+        default, narrow = NetworkAnalyzer(full), NetworkAnalyzer(compact)
+        assert_same_results(default.get_network_metrics(), narrow.get_network_metrics(), path='get_network_metrics')
+        assert_same_results(default.cluster_contacts(), narrow.cluster_contacts(), path='cluster_contacts')
+        assert list(default.graph.edges(data=True)) == list(narrow.graph.edges(data=True))
+        contact = default.cluster_contacts()['very_frequent'][0]['contact']
+        assert_same_results(default.get_contact_timeline(contact), narrow.get_contact_timeline(contact))
+
+
+def test_batch_parse_tags_sources():
+    """Batch ingest should concatenate every file and tag each record"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(3):
+            write_airtel_cdr(os.path.join(tmp, f'target_{i}.csv'), 500, seed=i)
+
+        combined, failures, memory_report = parse_cdr_batch(tmp, max_workers=2)
+
+        assert failures == []
+        assert memory_report is None
+        assert sorted(combined['Source_File'].unique()) == ['target_0.csv', 'target_1.csv', 'target_2.csv']
+        assert set(combined['Target_Number']) == {'9876543210'}
+        assert set(combined['Operator']) == {'Airtel'}
+        assert len(combined) == sum(
+            len(CDRParser(os.path.join(tmp, f'target_{i}.csv')).parse()) for i in range(3)
+        )
+
+        compact, _, memory_report = parse_cdr_batch(tmp, max_workers=2, compact=True)
+        assert memory_report['after_bytes'] == compact.memory_usage(deep=True).sum()
+        assert memory_report['after_bytes'] < memory_report['before_bytes']
+        assert memory_report['columns']['B_Party_Clean']['before_bytes'] == (
+            combined['B_Party_Clean'].memory_usage(deep=True, index=False))
+        assert set(memory_report['columns']) >= {'Source_File', 'Target_Number', 'Operator', 'First_Lat'}
+        for column in ['Call Type', 'B_Party_Clean', 'Date_Only', 'Source_File']:
+            assert isinstance(compact[column].dtype, pd.CategoricalDtype), column
+
+        # A single file (e.g. a top-up) is tagged the same way, and can go through the cache
+        cache = CDRCache(os.path.join(tmp, 'cache'))
+        path = os.path.join(tmp, 'target_1.csv')
+        for _ in range(2):
+            single, failures, _ = parse_cdr_batch([path], cache=cache)
+            assert failures == []
+            assert list(single.columns) == list(combined.columns)
+            assert set(single['Source_File']) == {'target_1.csv'}
+            assert set(single['Target_Number']) == {'9876543210'}
+        assert not cache.enabled or len(os.listdir(cache.cache_dir)) == 2
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 CDR Parser Test Suite\n")
+    test_streaming_matches_full_parse()
+    print("✅ Streaming parse matches full parse")
+    test_compact_chunks_concatenate()
+    print("✅ Compact chunks concatenate")
+    test_vectorized_helpers_match_scalar()
+    print("✅ Vectorized cleaning matches scalar helpers")
+    test_parse_cache_round_trip()
+    print("✅ Parse cache round trip")
+    test_parse_cache_round_trip_jio()
+    print("✅ Parse cache round trip (Jio)")
+    test_compact_schema_preserves_analysis()
+    print("✅ Compact schema preserves analysis")
+    test_batch_parse_tags_sources()
+    print("✅ Batch parse tags sources")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Test script for cell tower lookups
+Runs the concurrent lookup engine against a local stub HTTP server
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cell_tower_db import CellTowerDatabase, TokenBucket, PROVIDER_LIMITERS
+from cell_tower_cache import CellTowerCache, NEGATIVE
+from cell_tower_index import OfflineCellIndex
+
+import numpy as np
+import pandas as pd
+
+# Golden cell IDs: every branch of parse_cell_id plus the inputs it rejects
+GOLDEN_CELL_IDS = [
+    "404-96-290-128686112", "'404-96-290-1'", " 404-96-290-1-7 ", "404-96-290", "404 - 96-290-5",
+    "404--290-5", "404-96-290-12a", "404-+96-290-5", "abc-def-ghi-jkl", "404-96-290-\uff11\uff12",
+    "4058722113210", "40587201f9011", "405872113210", "4058721132", "405872ABCDEF1", "405abc1234567",
+    "40487211321", "404872113a1", "'4058722113210'", "40587221 13210", "4051234567890123456789012345",
+    "4058722113210.0", "40512", "405-", "12345", "---", "", None, float('nan'), 4058722113210,
+]
+
+
+class StubMLSHandler(BaseHTTPRequestHandler):
+    """Answers MLS geolocate requests; location is derived from the cell ID"""
+
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        tower = body['cellTowers'][0]
+        with StubMLSHandler.lock:
+            StubMLSHandler.requests_seen += 1
+
+        # Cells ending in 9 are unknown to the stub provider
+        if tower['cellId'] % 10 == 9:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        payload = json.dumps({'location': {'lat': 28.0 + tower['cellId'] / 1e4, 'lng': 77.0}}).encode()
+        time.sleep(0.01)  # simulated network latency
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_concurrent_lookups_against_stub():
+    """Every cell hits the network once; repeat lookups (hits and misses) come from cache"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubMLSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubMLSHandler.requests_seen = 0
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = CellTowerDatabase(
+                cache_file=os.path.join(tmp, 'cache.db'),
+                offline_index_dir=os.path.join(tmp, 'no_index'),
+                endpoints={'mls': f"http://127.0.0.1:{server.server_port}/v1/geolocate"},
+                max_workers=8
+            )
+            db.limiters['mls'] = TokenBucket(rate=1000, capacity=100)  # stub has no fair-use limit
+            cells = [f"404-96-290-{1000 + i}" for i in range(60)]
+
+            results = db.lookup_cell_towers(cells)
+
+            assert len(results) == 54  # 6 cells end in 9
+            assert results['404-96-290-1000'] == (28.1, 77.0)
+            assert StubMLSHandler.requests_seen == 60
+
+            assert db.lookup_cell_towers(cells) == results
+            assert StubMLSHandler.requests_seen == 60  # misses are negatively cached
+            db.close()
+
+            reopened = CellTowerCache(os.path.join(tmp, 'cache.db'))
+            assert len(reopened) == 60
+            assert reopened.get('mls_404_96_290_1009') == NEGATIVE
+            reopened.close()
+    finally:
+        server.shutdown()
+
+
+def test_enrich_matches_per_cell_masks():
+    """Offline hits skip the network, misses go online once, and both CGI columns are enriched"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubMLSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubMLSHandler.requests_seen = 0
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dump = os.path.join(tmp, 'cells.csv')
+            with open(dump, 'w') as f:
+                f.write("radio,mcc,net,area,cell,unit,lon,lat,range,samples,changeable,created,updated,averageSignal\n")
+                f.write("GSM,404,96,290,1000,0,70.5,20.5,1000,5,1,0,100,0\n")
+                f.write("LTE,404,96,290,1001,0,70.6,20.6,1000,5,1,0,100,0\n")
+            OfflineCellIndex.build(dump, os.path.join(tmp, 'index'))
+
+            db = CellTowerDatabase(
+                cache_file=os.path.join(tmp, 'cache.db'),
+                offline_index_dir=os.path.join(tmp, 'index'),
+                endpoints={'mls': f"http://127.0.0.1:{server.server_port}/v1/geolocate"},
+                max_workers=4
+            )
+            db.limiters['mls'] = TokenBucket(rate=1000, capacity=100)
+
+            offline_lookups = []
+            lookup_many = db.offline_index.lookup_many
+            db.offline_index.lookup_many = lambda *parts: offline_lookups.append(1) or lookup_many(*parts)
+            db.offline_index.lookup = lambda *parts: offline_lookups.append(1)
+
+            first = ['404-96-290-1000', '404-96-290-2000', '404-96-290-1000', 'garbage',
+                     '404-96-290-2009', None, '404-96-290-2000']
+            last = ['404-96-290-1001', '404-96-290-2001', '404-96-290-1000', '404-96-290-2000',
+                    '404-96-290-2009', '404-96-290-1001', None]
+            df = pd.DataFrame({'First CGI': first, 'Last CGI': last, 'Duration': range(len(first))})
+
+            enriched = db.enrich_cdr_with_cell_towers(df)
+
+            assert len(offline_lookups) == 1  # one vectorized pass; online cells are not re-probed
+            assert StubMLSHandler.requests_seen == 3  # 2000, 2001 and 2009 (a miss)
+
+            # Reference: the per-cell mask assignment the lookup table replaced
+            table = db.resolve_cells(pd.concat([df['First CGI'], df['Last CGI']]))
+            for prefix, column in [('Cell_Tower', 'First CGI'), ('Last_Cell_Tower', 'Last CGI')]:
+                expected = df.copy()
+                expected[f'{prefix}_Lat'] = np.nan
+                expected[f'{prefix}_Long'] = np.nan
+                expected[f'{prefix}_Source'] = None
+                for cell_id, row in table.iterrows():
+                    mask = df[column] == cell_id
+                    expected.loc[mask, f'{prefix}_Lat'] = row['Lat']
+                    expected.loc[mask, f'{prefix}_Long'] = row['Long']
+                    expected.loc[mask, f'{prefix}_Source'] = row['Source']
+                for suffix in ['Lat', 'Long', 'Source']:
+                    pd.testing.assert_series_equal(enriched[f'{prefix}_{suffix}'], expected[f'{prefix}_{suffix}'],
+                                                   check_dtype=False)
+
+            assert enriched['Cell_Tower_Source'].tolist() == [
+                'Offline Index', 'Database', 'Offline Index', None, None, None, 'Database'
+            ]
+            assert enriched['Last_Cell_Tower_Lat'].tolist()[:2] == [20.6, 28.2001]
+            assert enriched['Last_Cell_Tower_Source'].iloc[5] == 'Offline Index'
+            assert enriched['Duration'].tolist() == list(range(len(first)))
+            db.close()
+    finally:
+        server.shutdown()
+
+
+def test_cache_batches_writes_and_expires_misses():
+    """Writes reach SQLite per batch; negative entries expire after the TTL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, 'towers.json')
+        with open(legacy, 'w') as f:
+            json.dump({'mls_404_96_290_1': [28.5, 77.1]}, f)
+
+        cache = CellTowerCache(os.path.join(tmp, 'towers.db'), batch_size=3,
+                               flush_interval=3600, negative_ttl=0.05)
+        assert cache.get('mls_404_96_290_1') == (28.5, 77.1)  # imported from JSON
+
+        cache.put('a', 1.0, 2.0)
+        cache.put_negative('b')
+        assert len(cache.pending) == 2
+        assert cache.get('b') == NEGATIVE
+        cache.put('c', 3.0, 4.0)
+        assert cache.pending == []  # third write committed the batch
+
+        time.sleep(0.1)
+        assert cache.get('b') is None
+        assert cache.get('a') == (1.0, 2.0)
+        cache.close()
+
+
+def test_vectorized_cell_id_parse_matches_scalar():
+    """parse_cell_ids must agree with parse_cell_id on golden and generated IDs"""
+    rng = random.Random(0)
+    generated = []
+    for _ in range(3000):
+        kind = rng.random()
+        if kind < 0.3:
+            generated.append(f"404-{rng.randint(0, 99)}-{rng.randint(0, 65535)}-{rng.randint(0, 2**28)}")
+        elif kind < 0.6:
+            generated.append("405" + "".join(rng.choice("0123456789") for _ in range(rng.randint(5, 16))))
+        elif kind < 0.8:
+            generated.append("405" + "".join(rng.choice("0123456789abcdefABCDEF") for _ in range(rng.randint(5, 16))))
+        else:
+            generated.append("'404" + "".join(rng.choice("0123456789a") for _ in range(rng.randint(5, 16))) + "'")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CellTowerDatabase(cache_file=os.path.join(tmp, 'cache.db'),
+                               offline_index_dir=os.path.join(tmp, 'no_index'))
+        cell_ids = pd.Series(GOLDEN_CELL_IDS + generated, dtype=object)
+        decoded = db.parse_cell_ids(cell_ids)
+
+        assert decoded.index.equals(cell_ids.index)
+        for cell_id, (_, row) in zip(cell_ids, decoded.iterrows()):
+            expected = db.parse_cell_id(cell_id)
+            actual = None if pd.isna(row['mcc']) else {
+                name: int(row[name]) for name in ['mcc', 'mnc', 'lac', 'cell_id']
+            }
+            assert actual == expected, (cell_id, actual, expected)
+            assert pd.isna(row['radio']) == (expected is None)
+
+        assert decoded['radio'].tolist()[:2] == ['lte', 'gsm']
+        assert decoded['radio'].iloc[11] == 'lte'  # hex Jio ID
+        db.close()
+
+
+def test_token_bucket_limits_rate():
+    """A bucket never hands out more than capacity + rate * elapsed tokens"""
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    granted = sum(bucket.acquire(timeout=0.1) for _ in range(20))
+    elapsed = time.monotonic() - start
+
+    assert granted <= 5 + 50 * elapsed + 1
+    assert not TokenBucket(rate=0, capacity=0).acquire(timeout=0.01)
+
+
+def test_rate_limits_are_process_wide():
+    """Every database instance draws from the same provider buckets"""
+    with tempfile.TemporaryDirectory() as tmp:
+        first = CellTowerDatabase(cache_file=os.path.join(tmp, 'a.db'), offline_index_dir=os.path.join(tmp, 'no_index'))
+        second = CellTowerDatabase(cache_file=os.path.join(tmp, 'b.db'), offline_index_dir=os.path.join(tmp, 'no_index'))
+
+        for provider in PROVIDER_LIMITERS:
+            assert first.limiters[provider] is second.limiters[provider] is PROVIDER_LIMITERS[provider]
+
+        first.limiters['mls'] = TokenBucket(rate=1000, capacity=100)
+        assert second.limiters['mls'] is PROVIDER_LIMITERS['mls']
+        first.close()
+        second.close()
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 Cell Tower Lookup Test Suite\n")
+    test_concurrent_lookups_against_stub()
+    print("✅ Concurrent lookups against stub server")
+    test_enrich_matches_per_cell_masks()
+    print("✅ Enrichment matches per-cell masks")
+    test_cache_batches_writes_and_expires_misses()
+    print("✅ Batched SQLite cache with negative TTL")
+    test_vectorized_cell_id_parse_matches_scalar()
+    print("✅ Vectorized cell ID parse matches scalar")
+    test_token_bucket_limits_rate()
+    print("✅ Token bucket rate limiting")
+    test_rate_limits_are_process_wide()
+    print("✅ Process-wide rate limits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline cell tower index
+Builds indexes from small OpenCelliD-format dumps and checks lookups
+"""
+
+import sys
+import os
+import gzip
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cell_tower_index import OfflineCellIndex, pack_cell_keys, CELL_BITS, LAC_BITS, MCC_BITS, MNC_BITS
+
+OPENCELLID_HEADER = "radio,mcc,net,area,cell,unit,lon,lat,range,samples,changeable,created,updated,averageSignal"
+
+MAX_MCC, MAX_MNC, MAX_LAC, MAX_CELL = (1 << MCC_BITS) - 1, (1 << MNC_BITS) - 1, (1 << LAC_BITS) - 1, (1 << CELL_BITS) - 1
+
+# (radio, mcc, net, area, cell, lon, lat, updated)
+DUMP_ROWS = [
+    ('GSM', 404, 96, 290, 1000, 77.1, 28.1, 100),
+    ('GSM', 404, 96, 290, 1000, 77.3, 28.3, 300),   # newest row for this cell wins
+    ('GSM', 404, 96, 290, 1000, 77.2, 28.2, 200),
+    ('UMTS', 404, 96, 290, 1001, 77.4, 28.4, 100),
+    ('LTE', MAX_MCC, MAX_MNC, MAX_LAC, MAX_CELL, 10.5, 20.5, 100),
+    ('LTE', 405, 872, 100, MAX_CELL + 1, 11.0, 21.0, 100),       # ECI wider than the key
+    ('LTE', 405, 872, MAX_LAC + 1, 5, 11.0, 21.0, 100),           # TAC wider than the key
+    ('NR', 405, 872, 100, 2**36 - 1, 12.0, 22.0, 100),           # 36-bit NCI
+    ('NR', 405, 872, 100, 7, 13.0, 23.0, 100),                   # small NCI: would collide with LTE
+    ('LTE', 405, 872, 100, 8, 14.0, 24.0, 100),
+]
+
+
+def write_dump(path: str, rows=DUMP_ROWS, header: bool = True) -> None:
+    """Write an OpenCelliD-format CSV (gzip when the path ends in .gz)"""
+    lines = [OPENCELLID_HEADER] if header else []
+    for radio, mcc, net, area, cell, lon, lat, updated in rows:
+        lines.append(f"{radio},{mcc},{net},{area},{cell},0,{lon},{lat},1000,5,1,0,{updated},0")
+    text = "\n".join(lines) + "\n"
+    with (gzip.open(path, 'wt') if path.endswith('.gz') else open(path, 'w')) as f:
+        f.write(text)
+
+
+def test_build_and_lookup():
+    """Hits, misses, newest duplicate, NR skipped, and keys at each field's maximum width"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'cells.csv')
+        write_dump(csv_path)
+        index = OfflineCellIndex.build(csv_path, os.path.join(tmp, 'index'))
+
+        assert len(index) == 4
+        assert index.get_info() == {'source': 'cells.csv', 'rows_read': 10, 'rows_skipped': 4, 'cells': 4}
+        assert (index.keys[1:] > index.keys[:-1]).all()
+
+        assert index.lookup(404, 96, 290, 1000) == (28.3, 77.3)
+        assert index.lookup(404, 96, 290, 1001) == (28.4, 77.4)
+        assert index.lookup(MAX_MCC, MAX_MNC, MAX_LAC, MAX_CELL) == (20.5, 10.5)
+        assert index.lookup(405, 872, 100, 8) == (24.0, 14.0)
+
+        assert index.lookup(404, 96, 290, 1002) is None
+        assert index.lookup(405, 872, 100, 7) is None  # NR row was skipped
+        assert index.lookup(405, 872, 100, MAX_CELL + 1) is None
+        assert index.lookup(-1, 96, 290, 1000) is None
+
+        lat, lon, found = index.lookup_many(
+            [404, 404, 405, MAX_MCC, 0], [96, 96, 872, MAX_MNC, 0],
+            [290, 291, 100, MAX_LAC, 0], [1000, 1000, 8, MAX_CELL, 0]
+        )
+        assert found.tolist() == [True, False, True, True, False]
+        assert lat[found].tolist() == [28.3, 24.0, 20.5]
+        assert np.isnan(lon[~found]).all()
+
+        # Reopening reads the memory-mapped arrays back
+        reopened = OfflineCellIndex(os.path.join(tmp, 'index'))
+        assert reopened.lookup(404, 96, 290, 1000) == (28.3, 77.3)
+
+
+def test_pack_keys_field_widths():
+    """Each field packs into its own bits; one past the maximum is invalid"""
+    keys, valid = pack_cell_keys([MAX_MCC, 1, 0, 0, 0], [0, MAX_MNC, 0, 0, 0],
+                                 [0, 0, MAX_LAC, 0, 0], [0, 0, 0, MAX_CELL, 0])
+    assert valid.all()
+    assert keys.tolist() == [
+        MAX_MCC << (MNC_BITS + LAC_BITS + CELL_BITS),
+        (1 << (MNC_BITS + LAC_BITS + CELL_BITS)) | (MAX_MNC << (LAC_BITS + CELL_BITS)),
+        MAX_LAC << CELL_BITS,
+        MAX_CELL,
+        0,
+    ]
+
+    _, valid = pack_cell_keys([MAX_MCC + 1, 0, 0, 0], [0, MAX_MNC + 1, 0, 0],
+                              [0, 0, MAX_LAC + 1, 0], [0, 0, 0, MAX_CELL + 1])
+    assert not valid.any()
+
+
+def test_build_headerless_gzip_with_mcc_filter():
+    """Headerless gzip dumps import too; mcc_filter drops other countries before packing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'cells.csv.gz')
+        write_dump(csv_path, header=False)
+        index = OfflineCellIndex.build(csv_path, os.path.join(tmp, 'index'), mcc_filter=[404], chunksize=3)
+
+        assert len(index) == 2
+        assert index.lookup(404, 96, 290, 1000) == (28.3, 77.3)
+        assert index.lookup(405, 872, 100, 8) is None
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 Offline Cell Index Test Suite\n")
+    test_build_and_lookup()
+    print("✅ Build and lookup")
+    test_pack_keys_field_widths()
+    print("✅ Key packing at field widths")
+    test_build_headerless_gzip_with_mcc_filter()
+    print("✅ Headerless gzip dump with MCC filter")
+
+
+if __name__ == "__main__":
+    main()
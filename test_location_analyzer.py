@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Test script for the location analyzer
+Checks the spatial kernels, index and track analyses against brute-force scans
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from location_analyzer import (LocationAnalyzer, SpatialIndex, dbscan_towers, distance_matrix, find_colocations,
+                               haversine_km, major_movement_indices, segment_track, simplify_track,
+                               track_distances, track_level_of_detail)
+from test_cdr_analyzer import parsed_airtel_frame
+
+
+def home_work_frame() -> pd.DataFrame:
+    """Two weeks of hourly records: nights at home (two towers 100 m apart), days at work 10 km away"""
+    times = pd.date_range('2024-01-01', periods=24 * 14, freq='h')
+    hour = times.hour
+    at_home = (hour >= 19) | (hour < 8)
+    df = pd.DataFrame({
+        'DateTime': times,
+        'First_Lat': np.where(at_home, 28.600 + 0.0009 * (hour % 2), 28.690),
+        'First_Long': np.where(at_home, 77.200, 77.200),
+        'Is_Night': ((hour >= 22) | (hour < 6)).astype(int),
+        'Is_Day': ((hour >= 6) & (hour < 18)).astype(int),
+        'Is_Evening': ((hour >= 18) & (hour < 22)).astype(int),
+    })
+    # One record on a passing tower
+    df.loc[5, ['First_Lat', 'First_Long']] = [29.0, 78.0]
+    return df
+
+
+def test_distance_kernels_match_scalar():
+    """Vectorized haversine kernels agree with calculate_distance"""
+    df = parsed_airtel_frame(2000, seed=9)
+    location = LocationAnalyzer(df)
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-80, 80, 300)
+    lon = rng.uniform(-180, 180, 300)
+    scalar = np.array([[location.calculate_distance(a, b, c, d) for c, d in zip(lat, lon)]
+                       for a, b in zip(lat[:40], lon[:40])])
+
+    assert np.allclose(distance_matrix(lat[:40], lon[:40], lat, lon, chunk_size=7), scalar)
+    assert np.allclose(haversine_km(lat[3], lon[3], lat, lon), scalar[3])
+    assert np.allclose(track_distances(lat[:40], lon[:40]), np.diag(scalar, 1)[:39])
+    assert np.allclose(distance_matrix(lat, lon).diagonal(), 0)
+    assert np.isnan(haversine_km(np.nan, 0, 0, 0))
+    assert track_distances([1.0], [2.0]).size == 0
+
+    steps = location.get_track_distances()
+    track = df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime', kind='stable')
+    assert steps.index.equals(track.index) and steps.iloc[0] == 0
+    coords = track[['First_Lat', 'First_Long']].to_numpy()
+    assert len(coords) > 100
+    expected = [location.calculate_distance(*coords[i - 1], *coords[i]) for i in range(1, len(coords))]
+    assert np.allclose(steps.iloc[1:], expected)
+
+
+def test_major_movements_match_scan():
+    """The reduced scan keeps the same points as the row-by-row filter"""
+    def reference(lat, lon, ns, min_distance_km, min_gap, max_speed_kmh):
+        kept = []
+        for i in np.flatnonzero(np.isfinite(lat)):
+            if kept:
+                k = kept[-1]
+                distance = location.calculate_distance(lat[k], lon[k], lat[i], lon[i])
+                hours = (ns[i] - ns[k]) / 3.6e12
+                if distance <= min_distance_km or ns[i] - ns[k] < min_gap:
+                    continue
+                if max_speed_kmh is not None and distance > max_speed_kmh * hours:
+                    continue
+            kept.append(i)
+        return kept
+
+    df = parsed_airtel_frame(2000, seed=4)
+    location = LocationAnalyzer(df)
+    rng = np.random.default_rng(2)
+    for _ in range(100):
+        n = int(rng.integers(1, 300))
+        towers = rng.random((int(rng.integers(1, 20)), 2)) * rng.choice([0.05, 0.3, 2.0]) + [28, 77]
+        lat, lon = towers[rng.integers(0, len(towers), n)].T.copy()
+        lat[rng.random(n) < 0.05] = np.nan
+        ns = np.sort(rng.integers(0, 5 * 86400 * 10**9, n))
+        min_distance_km = float(rng.choice([0, 1, 5, 20]))
+        min_gap = int(rng.choice([0, 600, 3600])) * 10**9
+        max_speed_kmh = rng.choice([None, 30.0, 200.0])
+
+        keep = major_movement_indices(lat, lon, ns.astype('datetime64[ns]'), min_distance_km,
+                                      pd.Timedelta(min_gap) if min_gap else None, max_speed_kmh)
+        assert keep.tolist() == reference(lat, lon, ns, min_distance_km, min_gap, max_speed_kmh)
+        assert major_movement_indices(lat, lon, min_distance_km=min_distance_km).tolist() == \
+            reference(lat, lon, ns, min_distance_km, 0, None)
+
+    track = df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime', kind='stable')
+    rows = location.get_major_movements(min_distance_km=2)
+    expected = reference(track['First_Lat'].to_numpy(), track['First_Long'].to_numpy(),
+                         track['DateTime'].to_numpy().astype(np.int64), 2, 0, None)
+    assert df.index[rows].tolist() == track.index[expected].tolist()
+    assert major_movement_indices([np.nan], [np.nan]).size == 0
+
+
+def test_spatial_index_matches_brute_force():
+    """Radius, bounding-box and nearest-tower queries equal a scan of every record"""
+    rng = np.random.default_rng(6)
+    for spread, cell_km in ((0.05, 0.2), (0.5, 1.0), (5.0, 5.0), (40.0, 1.0)):
+        towers = rng.random((300, 2)) * spread + [28, 77]
+        lat, lon = towers[rng.integers(0, len(towers), 3000)].T.copy()
+        lat[rng.random(3000) < 0.1] = np.nan
+        index = SpatialIndex(lat, lon, cell_km)
+        assert index.tower_records.sum() == np.isfinite(lat).sum()
+
+        for _ in range(20):
+            point_lat, point_lon = 28 + rng.random() * spread, 77 + rng.random() * spread
+            radius = float(rng.choice([0.5, 2.0, 20.0, 500.0]))
+            distance = haversine_km(point_lat, point_lon, lat, lon)
+            assert index.records_within(point_lat, point_lon, radius).tolist() == \
+                np.flatnonzero(distance <= radius).tolist()
+
+            box = (point_lat - 0.1, point_lon - 0.2, point_lat + 0.2, point_lon + 0.1)
+            inside = (lat >= box[0]) & (lat <= box[2]) & (lon >= box[1]) & (lon <= box[3])
+            assert index.records_in_bbox(*box).tolist() == np.flatnonzero(inside).tolist()
+
+            _, nearest = index.nearest_towers(point_lat, point_lon, 4)
+            all_towers = haversine_km(point_lat, point_lon, index.tower_lat, index.tower_lon)
+            assert np.allclose(nearest, np.sort(all_towers)[:4])
+
+    df = parsed_airtel_frame(2000, seed=8)
+    location = LocationAnalyzer(df)
+    assert location.get_spatial_index() is location.get_spatial_index()
+    clusters = location.get_location_clusters(cell_km=5.0)
+    assert sum(cluster['count'] for cluster in clusters) == df['First_Lat'].notna().sum()
+    assert len(clusters) <= len(location.get_location_clusters())
+    center = location.get_location_clusters()[0]
+    near = location.get_records_within(center['lat'], center['lon'], 1.0)
+    assert len(near) >= center['count']
+    assert location.get_nearest_towers(center['lat'], center['lon'], 1)['records'].iloc[0] == center['count']
+
+
+def test_stay_regions_cluster_nearby_towers():
+    """Weighted DBSCAN partitions towers like a brute-force search; regions report dwell"""
+    rng = np.random.default_rng(11)
+    for _ in range(20):
+        towers = rng.random((int(rng.integers(2, 150)), 2)) * rng.choice([0.02, 0.1, 0.5]) + [28, 77]
+        lat, lon = np.repeat(towers, rng.integers(1, 15, len(towers)), axis=0).T
+        index = SpatialIndex(lat, lon)
+        eps_km, min_records = float(rng.choice([0.3, 1.0, 3.0])), int(rng.choice([1, 10, 60]))
+        labels = dbscan_towers(index, eps_km, min_records)
+
+        near = distance_matrix(index.tower_lat, index.tower_lon) <= eps_km
+        core = near @ index.tower_records >= min_records
+        joined = near & core[:, None] & core[None, :]
+        for _ in range(len(core)):
+            joined = joined | (joined.astype(int) @ joined.astype(int) > 0)
+        assert np.array_equal(labels >= 0, core | (near[:, core].any(axis=1)))
+        assert np.array_equal((labels[:, None] == labels[None, :])[np.ix_(core, core)], joined[np.ix_(core, core)])
+
+    df = home_work_frame()
+    regions = LocationAnalyzer(df).get_stay_regions(eps_km=0.5, min_records=10)
+
+    assert len(regions) == 2 and regions['records'].sum() == len(df) - 1
+    home, work = regions.iloc[0], regions.iloc[1]
+    assert home['towers'] == 2 and work['towers'] == 1
+    assert np.isclose(home['radius_km'], 0.05, atol=0.01) and work['radius_km'] == 0
+    assert np.isclose(home['night_share'], (8 * 14 - 1) / 181) and np.isclose(work['day_share'], 10 / 11)
+    assert home['days'] == 14 and work['days'] == 14
+    # Work: 10 hourly gaps a day. Home: 7 on the first morning, 12 a night for 13
+    # nights, 4 on the last evening, less the two around the passing tower
+    assert work['dwell_hours'] == 14 * 10 and home['dwell_hours'] == 7 + 13 * 12 + 4 - 2
+    assert work['first_seen'] == pd.Timestamp('2024-01-01 08:00')
+
+
+def test_stays_and_trips_segment_track():
+    """Runs of one place become stays; trips carry distance, path and speed"""
+    rng = np.random.default_rng(12)
+    for with_places in (True, False):
+        towers = rng.random((6, 2)) * 0.05 + [28, 77]
+        tower = np.repeat(rng.integers(0, len(towers), 60), rng.integers(1, 6, 60))
+        lat, lon = towers[tower].T.copy()
+        lat[rng.random(len(lat)) < 0.05] = np.nan
+        ns = np.sort(rng.integers(0, 86400 * 10**9, len(lat)))
+        stays, trips = segment_track(ns, lat, lon, tower if with_places else None, 1.0, '10min')
+
+        runs = []
+        for i in np.flatnonzero(np.isfinite(lat)):
+            anchor = runs[-1][0] if runs else None
+            if anchor is not None and (tower[i] == tower[anchor] if with_places else
+                                       haversine_km(lat[anchor], lon[anchor], lat[i], lon[i]) <= 1.0):
+                runs[-1].append(i)
+            else:
+                runs.append([i])
+        runs = [run for run in runs if ns[run[-1]] - ns[run[0]] >= 600 * 10**9]
+        assert stays['first'].tolist() == [run[0] for run in runs]
+        assert stays['records'].tolist() == [len(run) for run in runs]
+        assert np.allclose(stays['lat'], [lat[run].mean() for run in runs])
+        assert len(trips) == len(stays) - 1
+        for trip in trips.itertuples():
+            between = [i for i in range(stays['last'][trip.from_stay], stays['first'][trip.to_stay] + 1)
+                       if np.isfinite(lat[i])]
+            assert trip.records == len(between) - 2
+            assert np.isclose(trip.path_km, track_distances(lat[between], lon[between]).sum())
+
+    stays, trips = LocationAnalyzer(home_work_frame()).get_stays_and_trips('15min', eps_km=0.5, min_records=10)
+    # The first morning is split by the passing tower; then 14 days at work and 13 nights at home
+    assert len(stays) == 2 + 14 + 13 + 1 and len(trips) == len(stays) - 1
+    assert stays['region'].tolist()[:4] == [0, 0, 1, 0]
+    assert stays['dwell'].iloc[3] == pd.Timedelta(hours=12) and stays['dwell'].iloc[2] == pd.Timedelta(hours=10)
+    commute = trips.iloc[1]
+    assert commute['duration'] == pd.Timedelta(hours=1) and commute['records'] == 0
+    assert np.isclose(commute['distance_km'], commute['speed_kmh'], rtol=1e-9)
+    assert 9 < commute['distance_km'] < 11
+    assert trips.iloc[0]['records'] == 1
+
+
+def test_colocations_match_record_pairs():
+    """Meetings cover exactly the record pairs that are close in space and time"""
+    rng = np.random.default_rng(13)
+    for _ in range(25):
+        towers = rng.random((int(rng.integers(1, 30)), 2)) * rng.choice([0.01, 0.05, 0.3]) + [28, 77]
+        frames = {}
+        for target in range(int(rng.integers(2, 5))):
+            count = int(rng.integers(0, 150))
+            lat, lon = towers[rng.integers(0, len(towers), count)].T.copy()
+            lat[rng.random(count) < 0.05] = np.nan
+            times = pd.to_datetime(np.sort(rng.integers(0, 2 * 86400 * 10**9, count)))
+            frames[f"T{target}"] = pd.DataFrame({'DateTime': times, 'First_Lat': lat, 'First_Long': lon})
+        radius_km, window = float(rng.choice([0.2, 0.5, 2.0])), pd.Timedelta(minutes=int(rng.choice([5, 15, 60])))
+        meetings = find_colocations(frames, radius_km, window)
+
+        pairs = []
+        names = list(frames)
+        for x, first in enumerate(names):
+            for second in names[x + 1:]:
+                a, b = frames[first].dropna(), frames[second].dropna()
+                near = haversine_km(a['First_Lat'].to_numpy()[:, None], a['First_Long'].to_numpy()[:, None],
+                                    b['First_Lat'].to_numpy(), b['First_Long'].to_numpy()) <= radius_km
+                close = np.abs(a['DateTime'].to_numpy()[:, None] - b['DateTime'].to_numpy()) <= window
+                for i, j in zip(*np.nonzero(near & close)):
+                    times = sorted([a['DateTime'].iloc[i], b['DateTime'].iloc[j]])
+                    pairs.append((first, second, times[0], times[1]))
+
+        assert set(zip(meetings['target_a'], meetings['target_b'])) == {(a, b) for a, b, _, _ in pairs}
+        for first, second, start, end in pairs:
+            same = meetings[(meetings['target_a'] == first) & (meetings['target_b'] == second)]
+            assert ((same['start'] <= start) & (same['end'] >= end)).any()
+        for meeting in meetings.itertuples():
+            assert any(a == meeting.target_a and b == meeting.target_b and meeting.start <= start and end <= meeting.end
+                       for a, b, start, end in pairs)
+
+    lone = pd.DataFrame({'DateTime': pd.to_datetime(['2024-01-01']), 'First_Lat': [28.0], 'First_Long': [77.0]})
+    assert find_colocations({'only': lone}).empty
+
+
+def test_track_level_of_detail_caps_points_and_frames():
+    """Simplified paths keep the end points and stay within tolerance; frames are capped and spread in time"""
+    rng = np.random.default_rng(17)
+    for _ in range(20):
+        count = int(rng.integers(3, 400))
+        lat = 19 + np.cumsum(rng.normal(0, 0.002, count))
+        lon = 72.8 + np.cumsum(rng.normal(0, 0.002, count))
+        tolerance = float(rng.choice([0.0, 0.05, 0.5]))
+        kept = simplify_track(lat, lon, tolerance)
+        assert kept[0] == 0 and kept[-1] == count - 1 and (np.diff(kept) > 0).all()
+
+        # Every dropped point is within tolerance of the chord between its kept neighbours
+        y = lat * 111.19492664455873
+        x = lon * 111.19492664455873 * np.cos(np.radians(np.median(lat)))
+        for a, b in zip(kept[:-1], kept[1:]):
+            for i in range(a + 1, b):
+                dx, dy = x[b] - x[a], y[b] - y[a]
+                t = min(max(((x[i] - x[a]) * dx + (y[i] - y[a]) * dy) / (dx * dx + dy * dy), 0), 1)
+                assert np.hypot(x[i] - x[a] - t * dx, y[i] - y[a] - t * dy) <= tolerance + 1e-9
+
+        max_points = int(rng.integers(2, 50))
+        assert len(simplify_track(lat, lon, max_points=max_points)) == min(max_points, count)
+
+        times = pd.to_datetime(np.sort(rng.integers(0, 30 * 86400, count)), unit='s')
+        max_frames = int(rng.integers(2, 100))
+        path, frames = track_level_of_detail(times, lat, lon, max_points=max_points, max_frames=max_frames, zoom=12)
+        assert len(path) <= max_points and len(frames) <= max_frames
+        assert frames[0] == 0 and times[frames[-1]] == times[-1]
+        if count <= max_frames:
+            assert (frames == np.arange(count)).all()
+
+    df = home_work_frame()
+    location = LocationAnalyzer(df)
+    path, frames = location.get_track_lod(max_points=10, max_frames=5)
+    assert len(path) <= 10 and len(frames) <= 5
+    assert df['First_Lat'].iloc[path].notna().all()
+    assert df['DateTime'].iloc[frames].is_monotonic_increasing
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 Location Analyzer Test Suite\n")
+    test_distance_kernels_match_scalar()
+    print("✅ Distance kernels match the scalar haversine")
+    test_major_movements_match_scan()
+    print("✅ Major movements match the row-by-row filter")
+    test_spatial_index_matches_brute_force()
+    print("✅ Spatial index matches brute-force scans")
+    test_stay_regions_cluster_nearby_towers()
+    print("✅ Stay regions cluster nearby towers")
+    test_stays_and_trips_segment_track()
+    print("✅ Stays and trips segment the track")
+    test_colocations_match_record_pairs()
+    print("✅ Co-locations match close record pairs")
+    test_track_level_of_detail_caps_points_and_frames()
+    print("✅ Track level of detail caps points and frames")
+
+
+if __name__ == "__main__":
+    main()